@@ -0,0 +1,30 @@
+"""Add composite index for expense keyset pagination
+
+Revision ID: add_expenses_keyset_index
+Revises: add_email_thread_support
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_expenses_keyset_index'
+down_revision = 'add_email_thread_support'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves ORDER BY date DESC, created_at DESC, id DESC per user (scanned backwards)
+    op.create_index(
+        'ix_expenses_user_id_date_created_at_id',
+        'expenses',
+        ['user_id', 'date', 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_expenses_user_id_date_created_at_id', table_name='expenses')
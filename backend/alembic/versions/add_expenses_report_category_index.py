@@ -0,0 +1,30 @@
+"""Add composite index for category-filtered expense reports
+
+Revision ID: add_expenses_report_category_index
+Revises: add_expenses_keyset_index
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_expenses_report_category_index'
+down_revision = 'add_expenses_keyset_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves WHERE user_id = ? AND category IN (...) AND date BETWEEN ? AND ? ORDER BY date
+    op.create_index(
+        'ix_expenses_user_id_category_date',
+        'expenses',
+        ['user_id', 'category', 'date'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_expenses_user_id_category_date', table_name='expenses')
@@ -12,6 +12,7 @@ celery_app = Celery(
     backend=settings.CELERY_RESULT_BACKEND,
     include=[
         "src.email_processing.tasks",  # Email processing tasks
+        "src.expenses.tasks",  # Background receipt OCR
     ]
 )
 
@@ -29,10 +30,15 @@ celery_app.conf.update(
         "src.email_processing.tasks.process_email": {"queue": "email_processing"},
         "src.email_processing.tasks.sync_gmail_messages": {"queue": "email_sync"},
         "src.email_processing.tasks.extract_transaction_data": {"queue": "ocr_processing"},
+        "src.expenses.tasks.process_receipt_ocr": {"queue": "ocr_processing"},
     },
     
     # Worker settings
-    worker_prefetch_multiplier=1,
+    worker_prefetch_multiplier=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
+    worker_max_tasks_per_child=settings.CELERY_WORKER_MAX_TASKS_PER_CHILD,
+    # Ack after the task finishes. Tasks that are safe to rerun also set
+    # reject_on_worker_lost so they are requeued if the worker process dies;
+    # OCR tasks don't, since a crash caused by the input would just repeat.
     task_acks_late=True,
     
     # Result backend settings
@@ -13,9 +13,25 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Async engine connection pool (per process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # The server's max_connections; start_api.py keeps its default worker
+    # count within it (workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW))
+    DB_MAX_CONNECTIONS: int = 100
+
     # Celery settings
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
+    # Messages each worker process reserves ahead; with late acks a reserved
+    # message is redelivered if the worker dies, so this only trades latency
+    # fairness for fewer broker round trips. Workers consuming the OCR queue
+    # always use 1 (see start_worker.py).
+    CELERY_WORKER_PREFETCH_MULTIPLIER: int = 4
+    # Recycle worker processes after this many tasks to bound memory growth
+    CELERY_WORKER_MAX_TASKS_PER_CHILD: int = 500
 
     # Gmail API settings
     GMAIL_CLIENT_ID: str = ""
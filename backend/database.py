@@ -1,6 +1,9 @@
+from contextlib import asynccontextmanager
+
+from fastapi import Depends
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from config import settings
 
 # Convert async database URL to sync for compatibility with sync operations
@@ -15,9 +18,15 @@ def get_sync_database_url(async_url: str) -> str:
         return async_url
 
 # Use async engine for FastAPI compatibility
+# Connections are pooled per process and reused across requests; recycling
+# and pre-ping keep the pool from handing out connections the server dropped
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=True, # Log SQL queries, useful for debugging
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
 )
 
 # Create sync engine for operations that require sync sessions
@@ -49,4 +58,36 @@ Base = declarative_base()
 # Dependency to get DB session in FastAPI routes
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+# Dependency for sessions that must outlive the request, such as the one a
+# StreamingResponse body reads from after get_db has already been closed.
+# Override it alongside get_db in tests.
+def get_session_factory() -> sessionmaker:
+    return AsyncSessionLocal
+
+# Commit/rollback scope for work on an existing session. Unlike session.begin(),
+# this also works when the session already autobegan a transaction (e.g. after
+# the auth dependency looked up the current user on the same session).
+@asynccontextmanager
+async def transaction(session: AsyncSession):
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+
+# Dependency for write endpoints: shares the request's session (so the auth
+# lookup doesn't need a second connection) and commits once when the endpoint
+# returns, or rolls back if it raised. Endpoints using it must not commit.
+async def get_db_tx(session: AsyncSession = Depends(get_db)) -> AsyncSession:
+    async with transaction(session):
+        yield session
+
+# Skip waiting for the WAL flush when the current transaction commits. Only use
+# this for writes the client can safely retry: a crash right after commit can
+# lose the transaction (but never corrupts the database). No-op off PostgreSQL.
+async def relax_synchronous_commit(session: AsyncSession) -> None:
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(text("SET LOCAL synchronous_commit = OFF"))
@@ -5,7 +5,7 @@
 source .venv/bin/activate
 
 # Install Python dependencies
-pip install opencv-python-headless pytesseract spacy dateparser pytest pytest-asyncio httpx
+pip install opencv-python-headless pytesseract tesserocr spacy dateparser pytest pytest-asyncio httpx
 
 # Download spaCy model
 python -m spacy download en_core_web_sm
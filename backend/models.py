@@ -1,6 +1,6 @@
 import enum
 from sqlalchemy import (Column, Integer, String, Boolean, Date, Text,
-                      ForeignKey, DateTime, Numeric, Enum, func, JSON)
+                      ForeignKey, DateTime, Numeric, Enum, func, JSON, Index)
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -106,6 +106,12 @@ class TransactionApproval(Base):
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        # Matches the keyset ordering used by GET /api/expenses
+        Index("ix_expenses_user_id_date_created_at_id", "user_id", "date", "created_at", "id"),
+        # Category-filtered report queries (see src/reports/service.build_report_query)
+        Index("ix_expenses_user_id_category_date", "user_id", "category", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -4,7 +4,7 @@ Email content parsing and attachment extraction service.
 import logging
 import base64
 import re
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
 import emails
 from emails.loader import from_string
@@ -16,6 +16,67 @@ from .logging_config import email_parser_logger, log_email_decision, log_extract
 
 logger = email_parser_logger
 
+# Hyperscan compiles many regexes into one automaton and scans a text for all
+# of them in a single pass. It is optional: without it every pattern is run.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+class PatternPrefilter:
+    """
+    Tells which of a list of regexes can match a text, using one Hyperscan scan.
+
+    Hyperscan can't return capture groups, so it only narrows down the patterns
+    worth running with re. The database is compiled in prefilter mode, which may
+    report a pattern that re would not match but never misses one that it would.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(dict.fromkeys(patterns))
+        self.database = None
+        if hyperscan is None:
+            return
+
+        flags = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP |
+                 hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_ALLOWEMPTY)
+        try:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[pattern.encode('utf-8') for pattern in self.patterns],
+                ids=list(range(len(self.patterns))),
+                elements=len(self.patterns),
+                flags=[flags] * len(self.patterns),
+            )
+            self.database = database
+        except Exception as e:
+            logger.warning(f"Could not compile Hyperscan prefilter, running all patterns: {e}")
+
+    def candidates(self, text: str) -> Optional[Set[str]]:
+        """Returns the patterns that may match text, or None if every pattern must be tried."""
+        if self.database is None:
+            return None
+
+        found = set()
+
+        def on_match(pattern_id, start, end, flags, context):
+            found.add(self.patterns[pattern_id])
+
+        try:
+            self.database.scan(text.encode('utf-8'), match_event_handler=on_match)
+        except Exception as e:  # e.g. lone surrogates that can't be encoded
+            logger.debug(f"Hyperscan prefilter scan failed, running all patterns: {e}")
+            return None
+        return found
+
+
+def select_candidate_patterns(compiled_patterns: Iterable[re.Pattern], candidates: Optional[Set[str]]) -> Iterable[re.Pattern]:
+    """Filters compiled patterns down to PatternPrefilter candidates (all of them if None)."""
+    if candidates is None:
+        return compiled_patterns
+    return [compiled for compiled in compiled_patterns if compiled.pattern in candidates]
+
 
 class EmailContentExtractor:
     """Service for extracting content and attachments from emails."""
@@ -341,6 +402,303 @@ class EmailContentExtractor:
         'insurance', 'tax', 'fine', 'penalty'
     ]
     
+    # Single strong financial keywords checked in the subject
+    STRONG_SUBJECT_KEYWORDS = (
+        'payment', 'transaction', 'receipt', 'invoice', 'bill', 'charge', 'statement',
+        'transfer', 'deposit', 'withdrawal', 'refund', 'settlement', 'confirmation',
+        'debit', 'credit', 'purchase', 'order', 'subscription', 'renewal'
+    )
+
+    # Currency symbols and amounts in the body
+    CURRENCY_PATTERNS = [
+        # Nepali Rupee patterns
+        r'rs\.?\s*\d+', r'npr\s*\d+', r'₹\s*\d+', r'\d+\s*rs\.?', r'\d+\s*npr', r'\d+\s*₹',
+        r'rupees?\s*\d+', r'\d+\s*rupees?', r'paisa\s*\d+', r'\d+\s*paisa',
+
+        # International currency patterns
+        r'\$\s*\d+', r'usd\s*\d+', r'\d+\s*usd', r'dollars?\s*\d+', r'\d+\s*dollars?',
+        r'€\s*\d+', r'eur\s*\d+', r'\d+\s*eur', r'euros?\s*\d+', r'\d+\s*euros?',
+        r'£\s*\d+', r'gbp\s*\d+', r'\d+\s*gbp', r'pounds?\s*\d+', r'\d+\s*pounds?',
+        r'¥\s*\d+', r'jpy\s*\d+', r'\d+\s*jpy', r'yen\s*\d+', r'\d+\s*yen',
+        r'¥\s*\d+', r'cny\s*\d+', r'\d+\s*cny', r'yuan\s*\d+', r'\d+\s*yuan',
+
+        # Amount patterns with commas and decimals
+        r'[\$₹€£¥]\s*[\d,]+\.?\d*', r'[\d,]+\.?\d*\s*[\$₹€£¥]',
+        r'amount[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
+        r'total[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
+        r'price[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
+        r'cost[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
+        r'fee[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
+        r'charge[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*'
+    ]
+
+    # Transaction-specific terms in the body
+    TRANSACTION_TERMS = (
+        'debited', 'credited', 'transferred', 'paid to', 'received from',
+        'transaction id', 'reference number', 'confirmation code',
+        'account balance', 'available balance', 'current balance',
+        'payment successful', 'payment failed', 'payment pending',
+        'order confirmed', 'order placed', 'purchase confirmed',
+        'refund processed', 'refund initiated', 'amount charged',
+        'amount deducted', 'amount added', 'balance updated',
+        'transaction successful', 'transaction failed', 'transaction pending',
+        'payment received', 'payment sent', 'money transferred',
+        'funds transferred', 'wire transfer', 'bank transfer',
+        'direct deposit', 'automatic payment', 'recurring payment'
+    )
+
+    # Financial institution specific terms in the body
+    BANK_TERMS = (
+        'account number', 'card number', 'atm', 'debit card', 'credit card',
+        'internet banking', 'mobile banking', 'net banking', 'upi', 'imps', 'neft',
+        'rtgs', 'swift', 'iban', 'routing number', 'sort code', 'bsb',
+        'bank statement', 'monthly statement', 'account statement',
+        'overdraft', 'credit limit', 'available credit', 'minimum payment',
+        'due date', 'payment due', 'late fee', 'interest charge',
+        'annual fee', 'service charge', 'maintenance fee',
+        'esewa', 'khalti', 'ime pay', 'fonepay', 'connectips',
+        'paypal', 'stripe', 'square', 'venmo', 'wise', 'remitly',
+        'western union', 'moneygram', 'skrill', 'neteller'
+    )
+
+    # Amount patterns (various currencies and formats)
+    AMOUNT_PATTERNS = [
+        # Currency symbol before amount (comprehensive)
+        r'(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|GBP|¥|JPY|CNY)\s*([0-9,]+\.?[0-9]*)',
+        # Currency symbol after amount (comprehensive)
+        r'([0-9,]+\.?[0-9]*)\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|GBP|¥|JPY|CNY|dollars?|rupees?|euros?|pounds?|yen|yuan)',
+
+        # Labeled amounts (enhanced)
+        r'(?:Amount|Total|Paid|Charge|Cost|Price|Fee|Bill|Sum|Value|Worth)[:=\s]*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+        r'(?:Grand\s+Total|Sub\s+Total|Net\s+Amount|Gross\s+Amount)[:=\s]*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+
+        # Transaction amounts in common formats (enhanced)
+        r'(?:Transaction|Payment|Transfer|Purchase|Order)\s+(?:of|amount|value)?\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+        r'(?:You\s+(?:paid|spent|charged|transferred))\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+        r'(?:Received|Sent|Transferred)\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+
+        # Debit/Credit amounts (enhanced)
+        r'(?:Debited|Credited|Debit|Credit|Withdrawn|Deposited)\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+        r'(?:Account\s+(?:debited|credited))\s+(?:with\s+)?(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+
+        # Amount in parentheses or brackets (enhanced)
+        r'[\(\[](?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)[\)\]]',
+
+        # E-wallet and digital payment specific patterns
+        r'(?:Balance|Wallet)\s+(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+        r'(?:Cashback|Reward|Bonus)\s+(?:of\s+)?(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+        r'(?:Top-?up|Recharge)\s+(?:of\s+)?(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+
+        # Bank statement patterns
+        r'(?:Available\s+Balance|Current\s+Balance|Account\s+Balance)[:=\s]*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+        r'(?:Outstanding|Due|Payable)[:=\s]*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
+
+        # Generic amount patterns with better formatting
+        r'(?:^|\s)([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})?)\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)',
+        r'(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})?)',
+
+        # Decimal amounts without currency symbols
+        r'(?:Amount|Total|Price|Cost|Fee|Bill|Charge)[:=\s]+([0-9,]+\.[0-9]{2})',
+        r'([0-9,]+\.[0-9]{2})\s+(?:charged|paid|debited|credited|transferred)',
+
+        # Standalone numbers that look like amounts (with commas or decimals)
+        r'\b([0-9]{1,3}(?:,[0-9]{3})+(?:\.[0-9]{2})?)\b',
+        r'\b([0-9]+\.[0-9]{2})\b'
+    ]
+
+    # Date patterns
+    DATE_PATTERNS = [
+        # Standard date formats
+        r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b',  # DD/MM/YYYY or MM/DD/YYYY
+        r'\b(\d{4}[/-]\d{1,2}[/-]\d{1,2})\b',    # YYYY-MM-DD
+        r'\b(\d{1,2}\.\d{1,2}\.\d{2,4})\b',      # DD.MM.YYYY
+        r'\b(\d{4}\.\d{1,2}\.\d{1,2})\b',        # YYYY.MM.DD
+
+        # Month name formats
+        r'\b(\w+ \d{1,2}, \d{4})\b',             # Month DD, YYYY
+        r'\b(\d{1,2} \w+ \d{4})\b',              # DD Month YYYY
+        r'\b(\w+ \d{1,2} \d{4})\b',              # Month DD YYYY
+        r'\b(\d{1,2}-\w+-\d{4})\b',              # DD-Month-YYYY
+        r'\b(\w+-\d{1,2}-\d{4})\b',              # Month-DD-YYYY
+
+        # Labeled date patterns
+        r'(?:Date|On|Transaction\s+date|Payment\s+date|Order\s+date)[:=\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'(?:Date|On|Transaction\s+date|Payment\s+date|Order\s+date)[:=\s]*(\d{4}[/-]\d{1,2}[/-]\d{1,2})',
+        r'(?:Date|On|Transaction\s+date|Payment\s+date|Order\s+date)[:=\s]*(\w+ \d{1,2}, \d{4})',
+        r'(?:Date|On|Transaction\s+date|Payment\s+date|Order\s+date)[:=\s]*(\d{1,2} \w+ \d{4})',
+
+        # Time with date (enhanced)
+        r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?',
+        r'\b(\d{4}[/-]\d{1,2}[/-]\d{1,2})\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?',
+        r'\b(\w+ \d{1,2}, \d{4})\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?',
+
+        # ISO format dates (enhanced)
+        r'\b(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{3})?(?:Z|[+-]\d{2}:\d{2})?)\b',
+        r'\b(\d{4}-\d{2}-\d{2})\b',
+
+        # Relative dates (enhanced)
+        r'(?:Today|Yesterday|on)\s+(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'(?:Today|Yesterday|on)\s+(\w+ \d{1,2}, \d{4})',
+        r'(?:Today|Yesterday|on)\s+(\d{1,2} \w+ \d{4})',
+
+        # Banking specific date patterns
+        r'(?:Statement\s+date|Billing\s+date|Due\s+date)[:=\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'(?:Statement\s+date|Billing\s+date|Due\s+date)[:=\s]*(\w+ \d{1,2}, \d{4})',
+
+        # E-commerce date patterns
+        r'(?:Order\s+placed|Shipped|Delivered)\s+(?:on\s+)?(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+        r'(?:Order\s+placed|Shipped|Delivered)\s+(?:on\s+)?(\w+ \d{1,2}, \d{4})',
+
+        # Nepali date formats (BS - Bikram Sambat)
+        r'\b(\d{4}[/-]\d{1,2}[/-]\d{1,2})\s*(?:BS|B\.S\.)',
+        r'(?:BS|B\.S\.)\s*(\d{4}[/-]\d{1,2}[/-]\d{1,2})',
+
+        # Short date formats
+        r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2})\b',    # DD/MM/YY
+        r'\b(\d{2}[/-]\d{1,2}[/-]\d{1,2})\b',    # YY/MM/DD
+    ]
+
+    # Transaction ID patterns
+    TRANSACTION_ID_PATTERNS = [
+        # Standard transaction IDs (enhanced)
+        r'(?:Transaction|TXN|ID|Order|Ref|Reference)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Transaction|TXN)\s*(?:ID|Number|No)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Order|Purchase)\s*(?:ID|Number|No)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Reference|Ref)\s*(?:ID|Number|No)[\s#:]*([A-Z0-9]{6,20})',
+
+        # Payment processor IDs (enhanced)
+        r'(?:Payment|Pay)\s*(?:ID|Number|No)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Authorization|Auth)\s*(?:ID|Code|Number)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Approval|Appr)\s*(?:Code|Number)[\s#:]*([A-Z0-9]{6,20})',
+
+        # Bank transaction IDs (enhanced)
+        r'(?:UTR|UPI|IMPS|NEFT|RTGS|SWIFT)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Bank|Wire)\s*(?:Reference|Ref)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Trace|Tracking)\s*(?:Number|No|ID)[\s#:]*([A-Z0-9]{6,20})',
+
+        # E-wallet transaction IDs (enhanced)
+        r'(?:eSewa|Khalti|IME|FonePay|ConnectIPS|PrabhupPay)[\s#:]*(?:ID|TXN|Number)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Wallet|Digital)\s*(?:Transaction|TXN|ID)[\s#:]*([A-Z0-9]{6,20})',
+
+        # Receipt and confirmation patterns (enhanced)
+        r'Receipt[\s#:]*(?:No|Number|ID)?[\s#:]*([A-Z0-9]{6,20})',
+        r'Confirmation[\s#:]*(?:Code|Number|ID)?[\s#:]*([A-Z0-9]{6,20})',
+        r'Voucher[\s#:]*(?:No|Number|ID)?[\s#:]*([A-Z0-9]{6,20})',
+        r'Invoice[\s#:]*(?:No|Number|ID)?[\s#:]*([A-Z0-9]{6,20})',
+
+        # Credit card specific patterns
+        r'(?:Card|Credit)\s*(?:Transaction|TXN)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Merchant|POS)\s*(?:Reference|Ref)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Terminal|POS)\s*(?:ID|Number)[\s#:]*([A-Z0-9]{6,20})',
+
+        # E-commerce specific patterns
+        r'(?:Amazon|eBay|Shopify|Stripe|PayPal)\s*(?:Order|Transaction|ID)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:Tracking|Shipment)\s*(?:Number|ID)[\s#:]*([A-Z0-9]{6,20})',
+
+        # Generic patterns (enhanced)
+        r'\b([A-Z]{2,4}[0-9]{6,16})\b',          # Letters followed by numbers
+        r'\b([0-9]{6,16}[A-Z]{2,4})\b',          # Numbers followed by letters
+        r'\b([A-Z0-9]{8,20})\b(?=\s*(?:is|was|for|on|at))',  # Alphanumeric with context
+
+        # UUID-like patterns
+        r'\b([A-F0-9]{8}-[A-F0-9]{4}-[A-F0-9]{4}-[A-F0-9]{4}-[A-F0-9]{12})\b',
+
+        # Specific format patterns
+        r'\b([A-Z]{3}[0-9]{10,15})\b',           # 3 letters + 10-15 numbers
+        r'\b([0-9]{4}-[0-9]{4}-[0-9]{4}-[0-9]{4})\b',  # Hyphenated numbers
+        r'\b([A-Z0-9]{4}-[A-Z0-9]{4}-[A-Z0-9]{4})\b',  # Hyphenated alphanumeric
+
+        # Amazon-style order patterns
+        r'#([A-Z]{3}-[0-9]{5}-[0-9]{5})\b',      # Amazon order format: #AMZ-12345-67890
+        r'Order\s*#\s*([A-Z]{3}-[0-9]{5}-[0-9]{5})\b',  # Order #AMZ-12345-67890
+
+        # Nepali specific patterns
+        r'(?:NCHL|ConnectIPS|eSewa|Khalti)[\s#:]*([A-Z0-9]{6,20})',
+        r'(?:NRB|Nepal\s*Rastra\s*Bank)[\s#:]*([A-Z0-9]{6,20})',
+    ]
+
+    # Merchant patterns
+    MERCHANT_PATTERNS = [
+        # Preposition-based patterns (enhanced)
+        r'(?:at|from|to|with|via)\s+([A-Z][A-Za-z\s&\.\-\'\(\)]+?)(?:\s+on|\s+for|\s+at|\s+via|\s*$)',
+        r'(?:purchased\s+(?:at|from)|bought\s+(?:at|from))\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:charged\s+by|billed\s+by)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # Labeled merchant fields (enhanced)
+        r'(?:Merchant|Store|Shop|Vendor|Business|Company|Retailer)[:=\s]*([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Merchant\s+Name|Store\s+Name|Business\s+Name)[:=\s]*([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Payee|Recipient|Beneficiary)[:=\s]*([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # Payment patterns (enhanced)
+        r'(?:Payment|Paid|Transfer|Sent)\s+to\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Money\s+sent\s+to|Funds\s+transferred\s+to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Bill\s+payment\s+to|Payment\s+made\s+to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # Transaction patterns (enhanced)
+        r'(?:Transaction|Purchase|Order)\s+(?:at|with|from|via)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Debit\s+card\s+purchase|Credit\s+card\s+purchase)\s+(?:at|from)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Online\s+purchase|Web\s+purchase)\s+(?:at|from)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # E-commerce patterns (enhanced)
+        r'(?:Order|Purchase|Item)\s+from\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Shipped\s+by|Sold\s+by|Fulfilled\s+by)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Amazon|eBay|Etsy|Shopify)\s+(?:order|purchase)\s+from\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # Service provider patterns (enhanced)
+        r'(?:Service|Bill|Subscription|Membership)\s+(?:from|at|with)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Utility\s+bill|Phone\s+bill|Internet\s+bill)\s+(?:from|to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Insurance\s+premium|Policy\s+payment)\s+(?:to|for)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # Banking patterns (enhanced)
+        r'(?:Transfer|Payment|Wire)\s+to\s+([A-Z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Direct\s+deposit|Salary|Payroll)\s+from\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Loan\s+payment|EMI)\s+to\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # ATM and POS patterns
+        r'(?:ATM|POS)\s+(?:at|from)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Cash\s+withdrawal|ATM\s+withdrawal)\s+(?:at|from)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # Digital wallet patterns
+        r'(?:eSewa|Khalti|IME\s+Pay|FonePay)\s+(?:payment\s+to|transfer\s+to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Wallet\s+payment|Digital\s+payment)\s+(?:to|at)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # Subscription and recurring patterns
+        r'(?:Subscription|Recurring\s+payment|Auto-pay)\s+(?:to|for)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+        r'(?:Netflix|Spotify|Amazon\s+Prime|YouTube\s+Premium)\s+subscription',
+
+        # Generic patterns with better context
+        r'(?:^|\s)([A-Z][A-Za-z\s&\.\-\'\(\)]{2,30}?)(?:\s+(?:charged|billed|paid|received))',
+        r'(?:charged|billed|paid|received)\s+(?:by|from|to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
+
+        # Nepali specific patterns
+        r'(?:Daraz|Sastodeal|Foodmandu|Pathao|Tootle)\s+(?:order|payment|purchase)',
+        r'(?:NEA|NTC|Ncell|WorldLink|Vianet)\s+(?:bill|payment)',
+
+        # Generic merchant in transaction context
+        r'(?:charged|billed|paid)\s+(?:by|to)\s+([A-Za-z][A-Za-z\s&\.\-]+)',
+        # Merchant name in quotes or brackets
+        r'["\']([A-Za-z][A-Za-z\s&\.\-]+)["\']',
+        # Common Nepali merchants
+        r'\b((?:Daraz|Sastodeal|Gyapu|Hamrobazar|Foodmandu|Pathao|Tootle)[A-Za-z\s]*)\b'
+    ]
+
+    # Patterns are compiled once here rather than looked up in re's cache on
+    # every call; the *_RE alternations test a whole list in one pass
+    FINANCIAL_SENDER_RES = tuple(re.compile(pattern) for pattern in FINANCIAL_SENDERS)
+    FINANCIAL_SENDER_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in FINANCIAL_SENDERS))
+    CURRENCY_PATTERN_RES = tuple(re.compile(pattern) for pattern in CURRENCY_PATTERNS)
+    CURRENCY_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in CURRENCY_PATTERNS))
+    AMOUNT_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in AMOUNT_PATTERNS)
+    DATE_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in DATE_PATTERNS)
+    TRANSACTION_ID_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in TRANSACTION_ID_PATTERNS)
+    MERCHANT_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in MERCHANT_PATTERNS)
+    NON_AMOUNT_CHARS_RE = re.compile(r'[^\d.]')
+    DIGITS_ONLY_RE = re.compile(r'^\d+$')
+    MERCHANT_STOPWORDS = frozenset({'the', 'and', 'for', 'you', 'your', 'this', 'that'})
+    EXTRACTION_PREFILTER = PatternPrefilter(
+        AMOUNT_PATTERNS + DATE_PATTERNS + TRANSACTION_ID_PATTERNS + MERCHANT_PATTERNS
+    )
+
     def is_financial_email(self, sender: str, subject: str, body_text: str = "") -> Tuple[bool, float]:
         """
         Determine if an email is likely to contain financial information with confidence score.
@@ -362,12 +720,15 @@ class EmailContentExtractor:
 
         # High confidence indicators (sender-based) - 0.8 confidence
         sender_matched = False
-        for pattern in self.FINANCIAL_SENDERS:
-            if re.match(pattern, sender_lower):
-                confidence_score = max(confidence_score, 0.8)
-                detection_reasons.append(f"sender_pattern_match: {pattern}")
-                sender_matched = True
-                break
+        # One match against the combined pattern instead of one per sender
+        # pattern; only on a hit look for the first pattern (for the reason)
+        if self.FINANCIAL_SENDER_RE.match(sender_lower):
+            for pattern, compiled in zip(self.FINANCIAL_SENDERS, self.FINANCIAL_SENDER_RES):
+                if compiled.match(sender_lower):
+                    confidence_score = max(confidence_score, 0.8)
+                    detection_reasons.append(f"sender_pattern_match: {pattern}")
+                    sender_matched = True
+                    break
 
         # Medium confidence indicators (subject-based)
         financial_keyword_count = 0
@@ -384,13 +745,8 @@ class EmailContentExtractor:
             detection_reasons.append(f"subject_keywords_medium: {financial_keyword_count} keywords")
 
         # Single strong financial keyword in subject - 0.5 confidence
-        strong_keywords = [
-            'payment', 'transaction', 'receipt', 'invoice', 'bill', 'charge', 'statement',
-            'transfer', 'deposit', 'withdrawal', 'refund', 'settlement', 'confirmation',
-            'debit', 'credit', 'purchase', 'order', 'subscription', 'renewal'
-        ]
         strong_keyword_found = None
-        for keyword in strong_keywords:
+        for keyword in self.STRONG_SUBJECT_KEYWORDS:
             if keyword in subject_lower:
                 confidence_score = max(confidence_score, 0.5)
                 strong_keyword_found = keyword
@@ -400,51 +756,20 @@ class EmailContentExtractor:
         # Check body content for financial indicators (if available)
         if body_lower:
             # Look for currency symbols and amounts - 0.6 confidence
-            currency_patterns = [
-                # Nepali Rupee patterns
-                r'rs\.?\s*\d+', r'npr\s*\d+', r'₹\s*\d+', r'\d+\s*rs\.?', r'\d+\s*npr', r'\d+\s*₹',
-                r'rupees?\s*\d+', r'\d+\s*rupees?', r'paisa\s*\d+', r'\d+\s*paisa',
-
-                # International currency patterns
-                r'\$\s*\d+', r'usd\s*\d+', r'\d+\s*usd', r'dollars?\s*\d+', r'\d+\s*dollars?',
-                r'€\s*\d+', r'eur\s*\d+', r'\d+\s*eur', r'euros?\s*\d+', r'\d+\s*euros?',
-                r'£\s*\d+', r'gbp\s*\d+', r'\d+\s*gbp', r'pounds?\s*\d+', r'\d+\s*pounds?',
-                r'¥\s*\d+', r'jpy\s*\d+', r'\d+\s*jpy', r'yen\s*\d+', r'\d+\s*yen',
-                r'¥\s*\d+', r'cny\s*\d+', r'\d+\s*cny', r'yuan\s*\d+', r'\d+\s*yuan',
-
-                # Amount patterns with commas and decimals
-                r'[\$₹€£¥]\s*[\d,]+\.?\d*', r'[\d,]+\.?\d*\s*[\$₹€£¥]',
-                r'amount[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
-                r'total[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
-                r'price[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
-                r'cost[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
-                r'fee[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*',
-                r'charge[:\s]*[\$₹€£¥]?\s*[\d,]+\.?\d*'
-            ]
             currency_found = False
-            for pattern in currency_patterns:
-                if re.search(pattern, body_lower):
-                    confidence_score = max(confidence_score, 0.6)
-                    detection_reasons.append(f"currency_pattern: {pattern}")
-                    currency_found = True
-                    break
+            # One search over the combined pattern rules out most bodies; only
+            # on a hit look for the first individual pattern (for the reason)
+            if self.CURRENCY_RE.search(body_lower):
+                for pattern, compiled in zip(self.CURRENCY_PATTERNS, self.CURRENCY_PATTERN_RES):
+                    if compiled.search(body_lower):
+                        confidence_score = max(confidence_score, 0.6)
+                        detection_reasons.append(f"currency_pattern: {pattern}")
+                        currency_found = True
+                        break
 
             # Look for transaction-specific terms in body - 0.7 confidence
-            transaction_terms = [
-                'debited', 'credited', 'transferred', 'paid to', 'received from',
-                'transaction id', 'reference number', 'confirmation code',
-                'account balance', 'available balance', 'current balance',
-                'payment successful', 'payment failed', 'payment pending',
-                'order confirmed', 'order placed', 'purchase confirmed',
-                'refund processed', 'refund initiated', 'amount charged',
-                'amount deducted', 'amount added', 'balance updated',
-                'transaction successful', 'transaction failed', 'transaction pending',
-                'payment received', 'payment sent', 'money transferred',
-                'funds transferred', 'wire transfer', 'bank transfer',
-                'direct deposit', 'automatic payment', 'recurring payment'
-            ]
             transaction_term_found = None
-            for term in transaction_terms:
+            for term in self.TRANSACTION_TERMS:
                 if term in body_lower:
                     confidence_score = max(confidence_score, 0.7)
                     transaction_term_found = term
@@ -452,20 +777,8 @@ class EmailContentExtractor:
                     break
 
             # Look for financial institution specific terms - 0.8 confidence
-            bank_terms = [
-                'account number', 'card number', 'atm', 'debit card', 'credit card',
-                'internet banking', 'mobile banking', 'net banking', 'upi', 'imps', 'neft',
-                'rtgs', 'swift', 'iban', 'routing number', 'sort code', 'bsb',
-                'bank statement', 'monthly statement', 'account statement',
-                'overdraft', 'credit limit', 'available credit', 'minimum payment',
-                'due date', 'payment due', 'late fee', 'interest charge',
-                'annual fee', 'service charge', 'maintenance fee',
-                'esewa', 'khalti', 'ime pay', 'fonepay', 'connectips',
-                'paypal', 'stripe', 'square', 'venmo', 'wise', 'remitly',
-                'western union', 'moneygram', 'skrill', 'neteller'
-            ]
             bank_term_found = None
-            for term in bank_terms:
+            for term in self.BANK_TERMS:
                 if term in body_lower:
                     confidence_score = max(confidence_score, 0.8)
                     bank_term_found = term
@@ -845,251 +1158,37 @@ class EmailContentExtractor:
         logger.debug(f"Starting transaction pattern extraction from {len(text_content)} characters of text")
 
         try:
-            # Enhanced amount patterns (various currencies and formats)
-            amount_patterns = [
-                # Currency symbol before amount (comprehensive)
-                r'(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|GBP|¥|JPY|CNY)\s*([0-9,]+\.?[0-9]*)',
-                # Currency symbol after amount (comprehensive)
-                r'([0-9,]+\.?[0-9]*)\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|GBP|¥|JPY|CNY|dollars?|rupees?|euros?|pounds?|yen|yuan)',
-
-                # Labeled amounts (enhanced)
-                r'(?:Amount|Total|Paid|Charge|Cost|Price|Fee|Bill|Sum|Value|Worth)[:=\s]*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-                r'(?:Grand\s+Total|Sub\s+Total|Net\s+Amount|Gross\s+Amount)[:=\s]*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-
-                # Transaction amounts in common formats (enhanced)
-                r'(?:Transaction|Payment|Transfer|Purchase|Order)\s+(?:of|amount|value)?\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-                r'(?:You\s+(?:paid|spent|charged|transferred))\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-                r'(?:Received|Sent|Transferred)\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-
-                # Debit/Credit amounts (enhanced)
-                r'(?:Debited|Credited|Debit|Credit|Withdrawn|Deposited)\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-                r'(?:Account\s+(?:debited|credited))\s+(?:with\s+)?(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-
-                # Amount in parentheses or brackets (enhanced)
-                r'[\(\[](?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)[\)\]]',
-
-                # E-wallet and digital payment specific patterns
-                r'(?:Balance|Wallet)\s+(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-                r'(?:Cashback|Reward|Bonus)\s+(?:of\s+)?(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-                r'(?:Top-?up|Recharge)\s+(?:of\s+)?(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-
-                # Bank statement patterns
-                r'(?:Available\s+Balance|Current\s+Balance|Account\s+Balance)[:=\s]*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-                r'(?:Outstanding|Due|Payable)[:=\s]*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)?\s*([0-9,]+\.?[0-9]*)',
-
-                # Generic amount patterns with better formatting
-                r'(?:^|\s)([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})?)\s*(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)',
-                r'(?:Rs\.?|NPR|₹|\$|USD|EUR|€|£|¥)\s*([0-9]{1,3}(?:,[0-9]{3})*(?:\.[0-9]{2})?)',
-
-                # Decimal amounts without currency symbols
-                r'(?:Amount|Total|Price|Cost|Fee|Bill|Charge)[:=\s]+([0-9,]+\.[0-9]{2})',
-                r'([0-9,]+\.[0-9]{2})\s+(?:charged|paid|debited|credited|transferred)',
-
-                # Standalone numbers that look like amounts (with commas or decimals)
-                r'\b([0-9]{1,3}(?:,[0-9]{3})+(?:\.[0-9]{2})?)\b',
-                r'\b([0-9]+\.[0-9]{2})\b'
-            ]
-
-            for pattern in amount_patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
+            # Patterns that can't match this text are skipped (None: try all)
+            candidates = self.EXTRACTION_PREFILTER.candidates(text_content)
+
+            # Amounts (see AMOUNT_PATTERNS)
+            for compiled in select_candidate_patterns(self.AMOUNT_RES, candidates):
+                matches = compiled.findall(text_content)
                 # Clean and validate amounts
                 for match in matches:
-                    cleaned_amount = re.sub(r'[^\d.]', '', match)
+                    cleaned_amount = self.NON_AMOUNT_CHARS_RE.sub('', match)
                     if cleaned_amount and float(cleaned_amount) > 0:
                         patterns["amounts"].append(match)
             
-            # Enhanced date patterns (comprehensive)
-            date_patterns = [
-                # Standard date formats
-                r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b',  # DD/MM/YYYY or MM/DD/YYYY
-                r'\b(\d{4}[/-]\d{1,2}[/-]\d{1,2})\b',    # YYYY-MM-DD
-                r'\b(\d{1,2}\.\d{1,2}\.\d{2,4})\b',      # DD.MM.YYYY
-                r'\b(\d{4}\.\d{1,2}\.\d{1,2})\b',        # YYYY.MM.DD
-
-                # Month name formats
-                r'\b(\w+ \d{1,2}, \d{4})\b',             # Month DD, YYYY
-                r'\b(\d{1,2} \w+ \d{4})\b',              # DD Month YYYY
-                r'\b(\w+ \d{1,2} \d{4})\b',              # Month DD YYYY
-                r'\b(\d{1,2}-\w+-\d{4})\b',              # DD-Month-YYYY
-                r'\b(\w+-\d{1,2}-\d{4})\b',              # Month-DD-YYYY
-
-                # Labeled date patterns
-                r'(?:Date|On|Transaction\s+date|Payment\s+date|Order\s+date)[:=\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-                r'(?:Date|On|Transaction\s+date|Payment\s+date|Order\s+date)[:=\s]*(\d{4}[/-]\d{1,2}[/-]\d{1,2})',
-                r'(?:Date|On|Transaction\s+date|Payment\s+date|Order\s+date)[:=\s]*(\w+ \d{1,2}, \d{4})',
-                r'(?:Date|On|Transaction\s+date|Payment\s+date|Order\s+date)[:=\s]*(\d{1,2} \w+ \d{4})',
-
-                # Time with date (enhanced)
-                r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?',
-                r'\b(\d{4}[/-]\d{1,2}[/-]\d{1,2})\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?',
-                r'\b(\w+ \d{1,2}, \d{4})\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?',
-
-                # ISO format dates (enhanced)
-                r'\b(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{3})?(?:Z|[+-]\d{2}:\d{2})?)\b',
-                r'\b(\d{4}-\d{2}-\d{2})\b',
-
-                # Relative dates (enhanced)
-                r'(?:Today|Yesterday|on)\s+(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-                r'(?:Today|Yesterday|on)\s+(\w+ \d{1,2}, \d{4})',
-                r'(?:Today|Yesterday|on)\s+(\d{1,2} \w+ \d{4})',
-
-                # Banking specific date patterns
-                r'(?:Statement\s+date|Billing\s+date|Due\s+date)[:=\s]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-                r'(?:Statement\s+date|Billing\s+date|Due\s+date)[:=\s]*(\w+ \d{1,2}, \d{4})',
-
-                # E-commerce date patterns
-                r'(?:Order\s+placed|Shipped|Delivered)\s+(?:on\s+)?(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-                r'(?:Order\s+placed|Shipped|Delivered)\s+(?:on\s+)?(\w+ \d{1,2}, \d{4})',
-
-                # Nepali date formats (BS - Bikram Sambat)
-                r'\b(\d{4}[/-]\d{1,2}[/-]\d{1,2})\s*(?:BS|B\.S\.)',
-                r'(?:BS|B\.S\.)\s*(\d{4}[/-]\d{1,2}[/-]\d{1,2})',
-
-                # Short date formats
-                r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2})\b',    # DD/MM/YY
-                r'\b(\d{2}[/-]\d{1,2}[/-]\d{1,2})\b',    # YY/MM/DD
-            ]
-
-            for pattern in date_patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
+            # Dates (see DATE_PATTERNS)
+            for compiled in select_candidate_patterns(self.DATE_RES, candidates):
+                matches = compiled.findall(text_content)
                 patterns["dates"].extend(matches)
             
-            # Enhanced transaction ID patterns (comprehensive)
-            transaction_patterns = [
-                # Standard transaction IDs (enhanced)
-                r'(?:Transaction|TXN|ID|Order|Ref|Reference)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Transaction|TXN)\s*(?:ID|Number|No)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Order|Purchase)\s*(?:ID|Number|No)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Reference|Ref)\s*(?:ID|Number|No)[\s#:]*([A-Z0-9]{6,20})',
-
-                # Payment processor IDs (enhanced)
-                r'(?:Payment|Pay)\s*(?:ID|Number|No)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Authorization|Auth)\s*(?:ID|Code|Number)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Approval|Appr)\s*(?:Code|Number)[\s#:]*([A-Z0-9]{6,20})',
-
-                # Bank transaction IDs (enhanced)
-                r'(?:UTR|UPI|IMPS|NEFT|RTGS|SWIFT)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Bank|Wire)\s*(?:Reference|Ref)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Trace|Tracking)\s*(?:Number|No|ID)[\s#:]*([A-Z0-9]{6,20})',
-
-                # E-wallet transaction IDs (enhanced)
-                r'(?:eSewa|Khalti|IME|FonePay|ConnectIPS|PrabhupPay)[\s#:]*(?:ID|TXN|Number)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Wallet|Digital)\s*(?:Transaction|TXN|ID)[\s#:]*([A-Z0-9]{6,20})',
-
-                # Receipt and confirmation patterns (enhanced)
-                r'Receipt[\s#:]*(?:No|Number|ID)?[\s#:]*([A-Z0-9]{6,20})',
-                r'Confirmation[\s#:]*(?:Code|Number|ID)?[\s#:]*([A-Z0-9]{6,20})',
-                r'Voucher[\s#:]*(?:No|Number|ID)?[\s#:]*([A-Z0-9]{6,20})',
-                r'Invoice[\s#:]*(?:No|Number|ID)?[\s#:]*([A-Z0-9]{6,20})',
-
-                # Credit card specific patterns
-                r'(?:Card|Credit)\s*(?:Transaction|TXN)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Merchant|POS)\s*(?:Reference|Ref)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Terminal|POS)\s*(?:ID|Number)[\s#:]*([A-Z0-9]{6,20})',
-
-                # E-commerce specific patterns
-                r'(?:Amazon|eBay|Shopify|Stripe|PayPal)\s*(?:Order|Transaction|ID)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:Tracking|Shipment)\s*(?:Number|ID)[\s#:]*([A-Z0-9]{6,20})',
-
-                # Generic patterns (enhanced)
-                r'\b([A-Z]{2,4}[0-9]{6,16})\b',          # Letters followed by numbers
-                r'\b([0-9]{6,16}[A-Z]{2,4})\b',          # Numbers followed by letters
-                r'\b([A-Z0-9]{8,20})\b(?=\s*(?:is|was|for|on|at))',  # Alphanumeric with context
-
-                # UUID-like patterns
-                r'\b([A-F0-9]{8}-[A-F0-9]{4}-[A-F0-9]{4}-[A-F0-9]{4}-[A-F0-9]{12})\b',
-
-                # Specific format patterns
-                r'\b([A-Z]{3}[0-9]{10,15})\b',           # 3 letters + 10-15 numbers
-                r'\b([0-9]{4}-[0-9]{4}-[0-9]{4}-[0-9]{4})\b',  # Hyphenated numbers
-                r'\b([A-Z0-9]{4}-[A-Z0-9]{4}-[A-Z0-9]{4})\b',  # Hyphenated alphanumeric
-
-                # Amazon-style order patterns
-                r'#([A-Z]{3}-[0-9]{5}-[0-9]{5})\b',      # Amazon order format: #AMZ-12345-67890
-                r'Order\s*#\s*([A-Z]{3}-[0-9]{5}-[0-9]{5})\b',  # Order #AMZ-12345-67890
-
-                # Nepali specific patterns
-                r'(?:NCHL|ConnectIPS|eSewa|Khalti)[\s#:]*([A-Z0-9]{6,20})',
-                r'(?:NRB|Nepal\s*Rastra\s*Bank)[\s#:]*([A-Z0-9]{6,20})',
-            ]
-
-            for pattern in transaction_patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
+            # Transaction IDs (see TRANSACTION_ID_PATTERNS)
+            for compiled in select_candidate_patterns(self.TRANSACTION_ID_RES, candidates):
+                matches = compiled.findall(text_content)
                 patterns["transaction_ids"].extend(matches)
             
-            # Enhanced merchant patterns (comprehensive)
-            merchant_patterns = [
-                # Preposition-based patterns (enhanced)
-                r'(?:at|from|to|with|via)\s+([A-Z][A-Za-z\s&\.\-\'\(\)]+?)(?:\s+on|\s+for|\s+at|\s+via|\s*$)',
-                r'(?:purchased\s+(?:at|from)|bought\s+(?:at|from))\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:charged\s+by|billed\s+by)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # Labeled merchant fields (enhanced)
-                r'(?:Merchant|Store|Shop|Vendor|Business|Company|Retailer)[:=\s]*([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Merchant\s+Name|Store\s+Name|Business\s+Name)[:=\s]*([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Payee|Recipient|Beneficiary)[:=\s]*([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # Payment patterns (enhanced)
-                r'(?:Payment|Paid|Transfer|Sent)\s+to\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Money\s+sent\s+to|Funds\s+transferred\s+to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Bill\s+payment\s+to|Payment\s+made\s+to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # Transaction patterns (enhanced)
-                r'(?:Transaction|Purchase|Order)\s+(?:at|with|from|via)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Debit\s+card\s+purchase|Credit\s+card\s+purchase)\s+(?:at|from)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Online\s+purchase|Web\s+purchase)\s+(?:at|from)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # E-commerce patterns (enhanced)
-                r'(?:Order|Purchase|Item)\s+from\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Shipped\s+by|Sold\s+by|Fulfilled\s+by)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Amazon|eBay|Etsy|Shopify)\s+(?:order|purchase)\s+from\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # Service provider patterns (enhanced)
-                r'(?:Service|Bill|Subscription|Membership)\s+(?:from|at|with)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Utility\s+bill|Phone\s+bill|Internet\s+bill)\s+(?:from|to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Insurance\s+premium|Policy\s+payment)\s+(?:to|for)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # Banking patterns (enhanced)
-                r'(?:Transfer|Payment|Wire)\s+to\s+([A-Z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Direct\s+deposit|Salary|Payroll)\s+from\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Loan\s+payment|EMI)\s+to\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # ATM and POS patterns
-                r'(?:ATM|POS)\s+(?:at|from)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Cash\s+withdrawal|ATM\s+withdrawal)\s+(?:at|from)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # Digital wallet patterns
-                r'(?:eSewa|Khalti|IME\s+Pay|FonePay)\s+(?:payment\s+to|transfer\s+to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Wallet\s+payment|Digital\s+payment)\s+(?:to|at)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # Subscription and recurring patterns
-                r'(?:Subscription|Recurring\s+payment|Auto-pay)\s+(?:to|for)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-                r'(?:Netflix|Spotify|Amazon\s+Prime|YouTube\s+Premium)\s+subscription',
-
-                # Generic patterns with better context
-                r'(?:^|\s)([A-Z][A-Za-z\s&\.\-\'\(\)]{2,30}?)(?:\s+(?:charged|billed|paid|received))',
-                r'(?:charged|billed|paid|received)\s+(?:by|from|to)\s+([A-Za-z][A-Za-z\s&\.\-\'\(\)]+)',
-
-                # Nepali specific patterns
-                r'(?:Daraz|Sastodeal|Foodmandu|Pathao|Tootle)\s+(?:order|payment|purchase)',
-                r'(?:NEA|NTC|Ncell|WorldLink|Vianet)\s+(?:bill|payment)',
-
-                # Generic merchant in transaction context
-                r'(?:charged|billed|paid)\s+(?:by|to)\s+([A-Za-z][A-Za-z\s&\.\-]+)',
-                # Merchant name in quotes or brackets
-                r'["\']([A-Za-z][A-Za-z\s&\.\-]+)["\']',
-                # Common Nepali merchants
-                r'\b((?:Daraz|Sastodeal|Gyapu|Hamrobazar|Foodmandu|Pathao|Tootle)[A-Za-z\s]*)\b'
-            ]
-
-            for pattern in merchant_patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
+            # Merchants (see MERCHANT_PATTERNS)
+            for compiled in select_candidate_patterns(self.MERCHANT_RES, candidates):
+                matches = compiled.findall(text_content)
                 for match in matches:
                     cleaned_merchant = match.strip()
                     # Filter out common false positives and ensure minimum length
                     if (len(cleaned_merchant) > 2 and
-                        not re.match(r'^\d+$', cleaned_merchant) and  # Not just numbers
-                        not cleaned_merchant.lower() in ['the', 'and', 'for', 'you', 'your', 'this', 'that']):
+                        not self.DIGITS_ONLY_RE.match(cleaned_merchant) and  # Not just numbers
+                        not cleaned_merchant.lower() in self.MERCHANT_STOPWORDS):
                         patterns["merchants"].append(cleaned_merchant)
             
         except Exception as e:
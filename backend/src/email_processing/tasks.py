@@ -124,7 +124,7 @@ def _build_financial_email_query(last_sync_at: Optional[datetime] = None) -> str
     return query
 
 
-@celery_app.task(bind=True, max_retries=3)
+@celery_app.task(bind=True, max_retries=3, reject_on_worker_lost=True)
 def sync_gmail_messages(self, email_account_id: int) -> Dict[str, Any]:
     """
     Sync new messages from Gmail for a specific email account.
@@ -598,7 +598,7 @@ def process_email_thread_for_transactions(self, thread_id: str) -> Dict[str, Any
         db.close()
 
 
-@celery_app.task(bind=True, max_retries=3)
+@celery_app.task(bind=True, max_retries=3, reject_on_worker_lost=True)
 def process_email(self, email_message_id: int) -> Dict[str, Any]:
     """
     Process an email message to extract transaction data.
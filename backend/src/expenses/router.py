@@ -1,17 +1,24 @@
 # backend/src/expenses/router.py
 import io
-from datetime import date
-from typing import List, Optional
+import base64
+import hashlib
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
 import logging # Import logging
+import uuid
 
 from fastapi import (
     APIRouter, Depends, HTTPException, Query, Path, status,
-    UploadFile, File
+    UploadFile, File, Response
 )
+from celery import states
+from celery.result import AsyncResult
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, exists, insert, update, tuple_
 
-from database import get_db
+from celery_app import celery_app
+from database import get_db, get_db_tx, relax_synchronous_commit
 from src.auth.dependencies import get_current_active_user
 from models import User, Expense, CategoryEnum
 # Assuming schemas are in the same directory or accessible via src.expenses
@@ -28,6 +35,9 @@ except ImportError:
         ExpenseOCRResponse, ExtractedData
     )
 
+from . import service
+from .tasks import process_receipt_ocr
+
 # Import OCR service from the new location
 try:
     from src.ocr import process_image_with_ocr, parse_ocr_text
@@ -48,14 +58,94 @@ router = APIRouter(
 
 # --- Configuration for Uploads ---
 MAX_FILE_SIZE_BYTES = 5 * 1024 * 1024 # 5 MB
+UPLOAD_CHUNK_SIZE = 64 * 1024 # Read uploads in 64 KB chunks
 ALLOWED_IMAGE_MIMETYPES = {"image/jpeg", "image/png", "image/webp"}
 
+# --- OCR Result Cache ---
+# Re-uploads of the same receipt (retries, double submits) reuse the previous
+# OCR text and parsed fields instead of running Tesseract again.
+OCR_CACHE_MAX_ENTRIES = 128
+_ocr_result_cache: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+
+
+def get_cached_ocr_result(key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Returns a copy of the cached (raw text, extracted data) for an image hash, if any."""
+    cached = _ocr_result_cache.get(key)
+    if cached is None:
+        return None
+    _ocr_result_cache.move_to_end(key)
+    ocr_raw_text, extracted_dict = cached
+    # Copy so callers can adjust the dict without corrupting the cache
+    return ocr_raw_text, dict(extracted_dict)
+
+
+def store_cached_ocr_result(key: str, ocr_raw_text: str, extracted_dict: Dict[str, Any]) -> None:
+    """Stores OCR output for an image hash, evicting the least recently used entry."""
+    _ocr_result_cache[key] = (ocr_raw_text, dict(extracted_dict))
+    _ocr_result_cache.move_to_end(key)
+    while len(_ocr_result_cache) > OCR_CACHE_MAX_ENTRIES:
+        _ocr_result_cache.popitem(last=False)
+
+
+async def read_upload_image(file: UploadFile) -> bytearray:
+    """Validates an uploaded receipt image and reads it, enforcing MAX_FILE_SIZE_BYTES."""
+    # 1. Validate File
+    if file.content_type not in ALLOWED_IMAGE_MIMETYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_IMAGE_MIMETYPES)}"
+        )
+
+    # Simple size check (more robust check can be done while reading)
+    if file.size and file.size > MAX_FILE_SIZE_BYTES:
+         raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Max size: {MAX_FILE_SIZE_BYTES // 1024 // 1024}MB"
+        )
+
+    # 2. Read File Content in chunks, aborting as soon as the limit is exceeded.
+    # Chunks are copied into one buffer pre-sized from the declared size, so the
+    # upload is not held twice (chunk list + joined bytes) while it is read.
+    try:
+        buffer = bytearray(file.size or 0)
+        view = memoryview(buffer)
+        total_size = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            end = total_size + len(chunk)
+            if end > MAX_FILE_SIZE_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"File too large after reading. Max size: {MAX_FILE_SIZE_BYTES // 1024 // 1024}MB"
+                )
+            if end <= len(buffer):
+                view[total_size:end] = chunk
+            else:
+                # Declared size was missing or wrong; grow the buffer instead
+                view.release()
+                del buffer[total_size:]
+                buffer += chunk
+                view = memoryview(buffer)
+            total_size = end
+        view.release()
+        del buffer[total_size:]
+        image_bytes = buffer
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error reading uploaded file: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not read uploaded file.")
+    finally:
+         await file.close()
+
+    return image_bytes
+
+
 # --- CRUD Endpoints ---
 
 @router.post("/manual", response_model=ExpenseInDB, status_code=status.HTTP_201_CREATED)
 async def create_expense_manual(
     expense_in: ExpenseCreate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db_tx),
     current_user: User = Depends(get_current_active_user),
 ):
     """Creates a new expense via manual input."""
@@ -66,12 +156,12 @@ async def create_expense_manual(
             is_ocr_entry=False # Explicitly set for manual entry
         )
         db.add(expense)
-        await db.commit()
+        # get_db_tx commits after the response is built; flush to get the ID now
+        await db.flush()
         await db.refresh(expense)
         return expense
     except Exception as e:
-        await db.rollback()
-        print(f"Error creating manual expense: {e}")
+        logging.exception("Error creating manual expense")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not create expense."
@@ -80,81 +170,50 @@ async def create_expense_manual(
 @router.post("/ocr", status_code=status.HTTP_201_CREATED)
 async def create_expense_ocr(
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db_tx),
     current_user: User = Depends(get_current_active_user),
 ):
     """Processes an uploaded receipt image using OCR and saves partial expense."""
-    # 1. Validate File
-    if file.content_type not in ALLOWED_IMAGE_MIMETYPES:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_IMAGE_MIMETYPES)}"
-        )
-
-    # Simple size check (more robust check can be done while reading)
-    if file.size and file.size > MAX_FILE_SIZE_BYTES:
-         raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Max size: {MAX_FILE_SIZE_BYTES // 1024 // 1024}MB"
-        )
+    # 1-2. Validate and read the uploaded file
+    image_bytes = await read_upload_image(file)
 
-    # 2. Read File Content
-    try:
-        image_bytes = await file.read()
-        if len(image_bytes) > MAX_FILE_SIZE_BYTES:
-             raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large after reading. Max size: {MAX_FILE_SIZE_BYTES // 1024 // 1024}MB"
-            )
-    except Exception as e:
-        logging.error(f"Error reading uploaded file: {e}", exc_info=True)
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not read uploaded file.")
-    finally:
-         await file.close()
-
-    # 3. Perform OCR and Parsing
+    # 3. Perform OCR and Parsing (or reuse the result for an identical image)
     ocr_raw_text = ""
     extracted_dict = {}
-    try:
-        # Process image with OCR using enhanced preprocessing
-        logging.info("Starting OCR processing with preprocessing...")
-        ocr_raw_text = process_image_with_ocr(image_bytes)
-
-        if not ocr_raw_text:
-            logging.warning("OCR processing returned no text.")
-            # We'll proceed but all fields will be missing in the response
-        else:
-            logging.info(f"OCR text extracted successfully ({len(ocr_raw_text)} characters)")
-
-        # Parse the OCR text to extract structured data
-        extracted_dict = parse_ocr_text(ocr_raw_text)
-        logging.info(f"Extracted data: {extracted_dict}")
-
-    except Exception as e:
-        logging.error(f"Error during OCR/Parsing service call: {e}", exc_info=True)
-        # We'll proceed but expect most fields to be missing
-        extracted_dict = {}
+    image_hash = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+    cached_result = get_cached_ocr_result(image_hash)
+    if cached_result is not None:
+        ocr_raw_text, extracted_dict = cached_result
+        logging.info("Reusing cached OCR result for image %s", image_hash)
+    else:
+        try:
+            # Process image with OCR using enhanced preprocessing
+            logging.info("Starting OCR processing with preprocessing...")
+            ocr_raw_text = process_image_with_ocr(image_bytes)
+
+            if not ocr_raw_text:
+                logging.warning("OCR processing returned no text.")
+                # We'll proceed but all fields will be missing in the response
+            else:
+                logging.info("OCR text extracted successfully (%d characters)", len(ocr_raw_text))
+
+            # Parse the OCR text to extract structured data
+            extracted_dict = parse_ocr_text(ocr_raw_text)
+            logging.info("Extracted data: %s", extracted_dict)
+            store_cached_ocr_result(image_hash, ocr_raw_text, extracted_dict)
+
+        except Exception as e:
+            logging.error(f"Error during OCR/Parsing service call: {e}", exc_info=True)
+            # We'll proceed but expect most fields to be missing
+            extracted_dict = {}
 
     # 4. Check if mandatory 'amount' was extracted
     if extracted_dict.get('amount') is None:
         logging.warning("OCR failed to extract the mandatory 'amount' field")
 
-        # Prepare response with extracted data but indicate failure
-        missing_fields = ['category']  # Category is always missing initially
-        extracted_data_response = ExtractedData(**extracted_dict)
-
-        # Check which fields are missing
-        if extracted_data_response.date is None: missing_fields.append('date')
-        if extracted_data_response.merchant_name is None: missing_fields.append('merchant_name')
-        missing_fields.append('amount')  # Amount is definitely missing
-
         # Return 400 Bad Request with the extracted data in the error detail
         # This allows the frontend to still use the partial data
-        error_response = {
-            "detail": "OCR failed to extract the mandatory 'amount' field. Please update manually.",
-            "extracted_data": extracted_dict,
-            "missing_fields": list(set(missing_fields))
-        }
+        error_response = service.build_ocr_failure_detail(extracted_dict)
 
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -162,100 +221,25 @@ async def create_expense_ocr(
         )
 
     # 5. Save Expense to DB (only if amount was found)
+    # get_db_tx commits once the endpoint returns and rolls back on any error
     try:
-        # Prepare expense data
-        # Validate the date - if it's unrealistic, use today's date
-        extracted_date = extracted_dict.get('date')
-        current_year = date.today().year
-
-        # Define valid year range (matching OCR service)
-        min_valid_year = current_year - 20  # Allow receipts from up to 20 years ago
-        max_valid_year = current_year + 1   # Allow receipts dated slightly in the future
-
-        # Check if date is realistic (using same range as OCR service)
-        if extracted_date and (extracted_date.year < min_valid_year or extracted_date.year > max_valid_year):
-            logging.warning(f"Unrealistic date detected from OCR: {extracted_date}. Using today's date instead.")
-            expense_date = date.today()
-            # Remove the invalid date from extracted_dict so it won't be used in the response
-            extracted_dict['date'] = None
-        elif extracted_date and extracted_date > date.today() and (extracted_date - date.today()).days > 7:
-            # If date is more than a week in the future, it's likely an error
-            logging.warning(f"Future date detected from OCR: {extracted_date}. Using today's date instead.")
-            expense_date = date.today()
-            # Remove the invalid date from extracted_dict so it won't be used in the response
-            extracted_dict['date'] = None
-        else:
-            # Use the extracted date if available, otherwise use today's date
-            expense_date = extracted_date or date.today()
-
-            # If the date confidence is very low, mark it as missing in the response
-            if extracted_dict.get('date_confidence', 0) < 0.2 and extracted_date is not None:
-                logging.info(f"Low confidence date detected: {extracted_date} (confidence: {extracted_dict.get('date_confidence')})")
-                # Keep the date for the database but mark it as missing in the response
-                extracted_dict['date'] = None
-
-        expense_data_for_db = {
-            "user_id": current_user.id,
-            "date": expense_date,
-            "merchant_name": extracted_dict.get('merchant_name'),
-            "amount": extracted_dict.get('amount'),  # We know this is not None at this point
-            "currency": extracted_dict.get('currency', 'NPR'),  # Default currency
-            "category": None,  # Category must be set later
-            "is_ocr_entry": True,
-            "ocr_raw_text": ocr_raw_text
-        }
-
-        # Create the expense but don't commit yet
-        expense = Expense(**expense_data_for_db)
-        db.add(expense)
+        # A lost OCR insert can simply be re-uploaded, so don't wait for the WAL flush
+        await relax_synchronous_commit(db)
+
+        # Prepare expense data (invalid dates fall back to today's date)
+        expense_data_for_db = service.build_ocr_expense_data(current_user.id, extracted_dict, ocr_raw_text)
 
-        # We'll commit after creating the response, so we can rollback if needed
-        # This allows for proper cancellation if the user decides not to proceed
-        await db.flush()  # This assigns an ID but doesn't commit
+        # Insert with a Core INSERT ... RETURNING to get the ID in one round trip
+        stmt = insert(Expense).values(**expense_data_for_db).returning(Expense.id)
+        expense_id = (await db.execute(stmt)).scalar_one()
 
-        logging.info(f"Expense created with ID: {expense.id} (not committed yet)")
+        logging.info("Expense created with ID: %s, date: %s, amount: %s",
+                     expense_id, expense_data_for_db["date"], expense_data_for_db["amount"])
 
         # 6. Construct Response
-        missing_fields = ['category']  # Category is always missing initially
-
-        # Check which fields might be missing before creating the response object
-        if extracted_dict.get('date') is None:
-            missing_fields.append('date')
-        if extracted_dict.get('merchant_name') is None:
-            missing_fields.append('merchant_name')
-
-        # Log the extracted data for debugging
-        logging.info(f"Extracted data: {extracted_dict}")
-        logging.info(f"Expense saved with ID: {expense.id}, date: {expense.date}, amount: {expense.amount}")
-
-        # Prepare the response with confidence scores
-        response_data = {
-            "expense_id": expense.id,
-            "extracted_data": {
-                "merchant_name": expense.merchant_name,
-                "merchant_confidence": extracted_dict.get('merchant_confidence', 0.5),  # Default confidence if not provided
-                "date": expense.date.isoformat() if expense.date else None,
-                "date_confidence": extracted_dict.get('date_confidence', 0.5),  # Default confidence if not provided
-                "amount": float(expense.amount) if expense.amount else None,
-                "amount_confidence": extracted_dict.get('amount_confidence', 0.5),  # Default confidence if not provided
-                "currency": expense.currency,
-            },
-            "missing_fields": list(set(missing_fields)),  # Ensure unique
-            "message": "OCR processing complete. Please verify details and select a category."
-        }
-
-        # Now that we have a valid response, commit the transaction
-        await db.commit()
-        logging.info(f"Expense committed to database with ID: {expense.id}")
-
-        return response_data
-
-    except HTTPException as e:
-        await db.rollback()  # Rollback if HTTP exception occurred during process
-        raise e  # Re-raise HTTP exceptions
+        return service.build_ocr_response(expense_id, expense_data_for_db, extracted_dict)
 
     except Exception as e:
-        await db.rollback()
         logging.error(f"Error saving OCR expense: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -263,30 +247,69 @@ async def create_expense_ocr(
         )
 
 
+@router.post("/ocr/async", status_code=status.HTTP_202_ACCEPTED)
+async def create_expense_ocr_async(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Queues an uploaded receipt image for OCR on the background worker.
+
+    Returns immediately with a job ID; poll GET /ocr/jobs/{job_id} for the result,
+    which has the same shape as the synchronous POST /ocr response.
+    """
+    image_bytes = await read_upload_image(file)
+
+    # Celery uses the JSON serializer, so the image travels base64-encoded
+    image_b64 = base64.b64encode(image_bytes).decode("ascii")
+
+    # Record the owner before queueing, so polls made before a worker picks
+    # the job up can be checked too (see get_expense_ocr_job)
+    job_id = str(uuid.uuid4())
+    celery_app.backend.store_result(job_id, {"user_id": current_user.id}, states.PENDING)
+    process_receipt_ocr.apply_async((image_b64, current_user.id), task_id=job_id)
+    logging.info("Queued OCR job %s for user %s", job_id, current_user.id)
+
+    return {"job_id": job_id, "status": "pending"}
+
+
+@router.get("/ocr/jobs/{job_id}")
+async def get_expense_ocr_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user),
+):
+    """Returns the status of a queued OCR job, and its result once finished."""
+    result = AsyncResult(job_id, app=celery_app)
+
+    if result.failed():
+        # Only when the worker was killed; task errors are returned as a
+        # "failed" result. The owner isn't recorded, so this is a 404 below.
+        logging.error("OCR job %s failed: %s", job_id, result.result)
+
+    # Every recorded state carries the owner: the placeholder stored when the
+    # job was queued, the task's STARTED meta and its return value
+    job_meta = result.info
+    if not isinstance(job_meta, dict) or job_meta.get("user_id") != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="OCR job not found")
+
+    if not result.ready():
+        return {"job_id": job_id, "status": "pending"}
+
+    return {"job_id": job_id, **job_meta}
+
+
 @router.put("/{expense_id}", response_model=ExpenseInDB)
 async def update_expense(
     expense_id: int,
     expense_in: ExpenseUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db_tx),
     current_user: User = Depends(get_current_active_user),
 ):
     """Updates an existing expense (e.g., add category after OCR)."""
 
-    # --- Added Logging ---
-    logging.info(f"--- update_expense (ID: {expense_id}) --- Received validated data:")
-    logging.info(expense_in.model_dump())
-    # --- End Added Logging ---
-
-    # Fetch the existing expense
-    stmt = select(Expense).where(Expense.id == expense_id, Expense.user_id == current_user.id)
-    result = await db.execute(stmt)
-    db_expense = result.scalar_one_or_none()
-
-    if db_expense is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
-
     # Get update data, excluding unset fields to prevent accidentally nullifying fields
     update_data = expense_in.model_dump(exclude_unset=True)
+    logging.info("--- update_expense (ID: %s) --- Received validated data: %s", expense_id, update_data)
 
     if not update_data:
             # Although Pydantic model allows all fields Optional,
@@ -296,18 +319,26 @@ async def update_expense(
                 detail="No update data provided."
             )
 
-    # Update fields
-    logging.info(f"Applying update data: {update_data}") # Log fields being applied
-    for key, value in update_data.items():
-        setattr(db_expense, key, value)
+    # Update and fetch the row in a single round trip
+    stmt = (
+        update(Expense)
+        .where(Expense.id == expense_id, Expense.user_id == current_user.id)
+        .values(**update_data)
+        .returning(Expense)
+    )
 
     try:
-        await db.commit()
-        await db.refresh(db_expense)
-        logging.info(f"Expense {expense_id} updated successfully.") # Log success
-        return db_expense
+        result = await db.execute(stmt)
+        db_expense = result.scalar_one_or_none()
+
+        if db_expense is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
+
+        logging.info("Expense %s updated successfully.", expense_id) # Log success
+        return ExpenseInDB.model_validate(db_expense)
+    except HTTPException:
+        raise
     except Exception as e:
-        await db.rollback()
         # --- Modified Logging ---
         logging.error(f"Error updating expense {expense_id}: {e}", exc_info=True) # Log full exception
         # --- End Modified Logging ---
@@ -316,29 +347,68 @@ async def update_expense(
             detail=f"Could not update expense: {e}" # Include error in detail
         )
 
-# Basic GET endpoint (add filtering/pagination later)
+
+def encode_expense_cursor(expense: Expense) -> str:
+    """Encodes the keyset position (date, created_at, id) of an expense as an opaque cursor."""
+    created_at = expense.created_at.isoformat() if expense.created_at else ""
+    raw = f"{expense.date.isoformat()}|{created_at}|{expense.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_expense_cursor(cursor: str) -> Tuple[date, datetime, int]:
+    """Decodes a cursor produced by encode_expense_cursor; raises 400 if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        last_date, last_created_at, last_id = raw.split("|")
+        return date.fromisoformat(last_date), datetime.fromisoformat(last_created_at), int(last_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+# Basic GET endpoint (add filtering later)
 @router.get("", response_model=List[ExpenseInDB])
 async def read_expenses(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
     # Add filters later: start_date, end_date, category
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    """Retrieves a list of expenses for the current user."""
+    """
+    Retrieves a list of expenses for the current user, newest first.
+
+    Pass the X-Next-Cursor header of a page back as `cursor` to fetch the next
+    page with a keyset seek instead of OFFSET. `skip` is kept for older clients
+    and only used when no cursor is given.
+    """
     stmt = select(Expense).where(Expense.user_id == current_user.id)\
-            .order_by(Expense.date.desc(), Expense.created_at.desc())\
-            .offset(skip).limit(limit)
+            .order_by(Expense.date.desc(), Expense.created_at.desc(), Expense.id.desc())\
+            .limit(limit)
+
+    if cursor:
+        last_date, last_created_at, last_id = decode_expense_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Expense.date, Expense.created_at, Expense.id)
+            < tuple_(last_date, last_created_at, last_id)
+        )
+    elif skip:
+        stmt = stmt.offset(skip)
 
     result = await db.execute(stmt)
     expenses = result.scalars().all()
+
+    # A full page means there may be more rows; expose where the next page starts
+    if len(expenses) == limit and expenses[-1].created_at is not None:
+        response.headers["X-Next-Cursor"] = encode_expense_cursor(expenses[-1])
     return list(expenses)
 
 # Basic DELETE endpoint
 @router.delete("/{expense_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_expense(
     expense_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_db_tx),
     current_user: User = Depends(get_current_active_user),
 ):
     """Deletes an expense for the current user."""
@@ -348,16 +418,7 @@ async def delete_expense(
     if result.rowcount == 0:
          raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Expense not found")
 
-    try:
-        await db.commit()
-    except Exception as e:
-        await db.rollback()
-        print(f"Error deleting expense {expense_id}: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Could not delete expense."
-        )
-
+    # get_db_tx commits the delete once the endpoint returns
     return # Return None for 204
 
 @router.get("/has_any", response_model=bool)
@@ -366,7 +427,6 @@ async def has_any_expenses(
     current_user: User = Depends(get_current_active_user),
 ):
     """Checks if the user has any expenses."""
-    stmt = select(Expense).where(Expense.user_id == current_user.id).limit(1)
+    stmt = select(exists().where(Expense.user_id == current_user.id))
     result = await db.execute(stmt)
-    has_expenses = result.scalar_one_or_none() is not None
-    return has_expenses
\ No newline at end of file
+    return bool(result.scalar())
\ No newline at end of file
@@ -0,0 +1,103 @@
+# backend/src/expenses/service.py
+import logging
+from datetime import date
+from typing import Any, Dict, List
+
+
+def resolve_ocr_expense_date(extracted_dict: Dict[str, Any]) -> date:
+    """
+    Picks the date to store for an OCR expense.
+
+    Unrealistic or far-future dates fall back to today's date. Dates that are
+    rejected or have very low confidence are cleared from extracted_dict (in
+    place) so they show up as missing in the response.
+    """
+    # Validate the date - if it's unrealistic, use today's date
+    extracted_date = extracted_dict.get('date')
+    today = date.today()
+    current_year = today.year
+
+    # Define valid year range (matching OCR service)
+    min_valid_year = current_year - 20  # Allow receipts from up to 20 years ago
+    max_valid_year = current_year + 1   # Allow receipts dated slightly in the future
+
+    # Check if date is realistic (using same range as OCR service)
+    if extracted_date and (extracted_date.year < min_valid_year or extracted_date.year > max_valid_year):
+        logging.warning("Unrealistic date detected from OCR: %s. Using today's date instead.", extracted_date)
+        # Remove the invalid date from extracted_dict so it won't be used in the response
+        extracted_dict['date'] = None
+        return today
+
+    if extracted_date and extracted_date > today and (extracted_date - today).days > 7:
+        # If date is more than a week in the future, it's likely an error
+        logging.warning("Future date detected from OCR: %s. Using today's date instead.", extracted_date)
+        # Remove the invalid date from extracted_dict so it won't be used in the response
+        extracted_dict['date'] = None
+        return today
+
+    # If the date confidence is very low, mark it as missing in the response
+    if extracted_dict.get('date_confidence', 0) < 0.2 and extracted_date is not None:
+        logging.info("Low confidence date detected: %s (confidence: %s)", extracted_date, extracted_dict.get('date_confidence'))
+        # Keep the date for the database but mark it as missing in the response
+        extracted_dict['date'] = None
+
+    # Use the extracted date if available, otherwise use today's date
+    return extracted_date or today
+
+
+def compute_missing_fields(extracted_dict: Dict[str, Any]) -> List[str]:
+    """Lists the fields the user still has to fill in; each field is added at most once."""
+    missing_fields = ['category']  # Category is always missing initially
+    if extracted_dict.get('date') is None:
+        missing_fields.append('date')
+    if extracted_dict.get('merchant_name') is None:
+        missing_fields.append('merchant_name')
+    if extracted_dict.get('amount') is None:
+        missing_fields.append('amount')
+    return missing_fields
+
+
+def build_ocr_failure_detail(extracted_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds the error detail returned when OCR could not extract the mandatory amount."""
+    # The extracted data is included so the frontend can still use the partial data
+    return {
+        "detail": "OCR failed to extract the mandatory 'amount' field. Please update manually.",
+        "extracted_data": extracted_dict,
+        "missing_fields": compute_missing_fields(extracted_dict)
+    }
+
+
+def build_ocr_expense_data(user_id: int, extracted_dict: Dict[str, Any], ocr_raw_text: str) -> Dict[str, Any]:
+    """Builds the column values for inserting an OCR expense (amount must be present)."""
+    return {
+        "user_id": user_id,
+        "date": resolve_ocr_expense_date(extracted_dict),
+        "merchant_name": extracted_dict.get('merchant_name'),
+        "amount": extracted_dict.get('amount'),
+        "currency": extracted_dict.get('currency', 'NPR'),  # Default currency
+        "category": None,  # Category must be set later
+        "is_ocr_entry": True,
+        "ocr_raw_text": ocr_raw_text
+    }
+
+
+def build_ocr_response(expense_id: int, expense_data: Dict[str, Any], extracted_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds the JSON-serializable response for a saved OCR expense."""
+    expense_date = expense_data["date"]
+    expense_amount = expense_data["amount"]
+
+    # Prepare the response with confidence scores
+    return {
+        "expense_id": expense_id,
+        "extracted_data": {
+            "merchant_name": expense_data["merchant_name"],
+            "merchant_confidence": extracted_dict.get('merchant_confidence', 0.5),  # Default confidence if not provided
+            "date": expense_date.isoformat() if expense_date else None,
+            "date_confidence": extracted_dict.get('date_confidence', 0.5),  # Default confidence if not provided
+            "amount": float(expense_amount) if expense_amount else None,
+            "amount_confidence": extracted_dict.get('amount_confidence', 0.5),  # Default confidence if not provided
+            "currency": expense_data["currency"],
+        },
+        "missing_fields": compute_missing_fields(extracted_dict),
+        "message": "OCR processing complete. Please verify details and select a category."
+    }
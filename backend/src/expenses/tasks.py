@@ -0,0 +1,81 @@
+"""
+Celery tasks for background OCR processing of uploaded receipts.
+"""
+import base64
+import logging
+from typing import Any, Dict
+
+from celery import current_app as celery_app, states
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+
+from database import SessionLocal
+from models import Expense
+from src.ocr import process_image_with_ocr, parse_ocr_text
+from . import service
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True)
+def process_receipt_ocr(self, image_b64: str, user_id: int) -> Dict[str, Any]:
+    """
+    Run OCR on an uploaded receipt and save the partial expense.
+
+    Args:
+        image_b64: Base64-encoded image bytes (Celery payloads are JSON)
+        user_id: ID of the user who uploaded the receipt
+
+    Returns:
+        Dict with the job status, owning user_id and the same fields as the
+        synchronous OCR endpoint's response (or its error detail)
+    """
+    # GET /ocr/jobs/{job_id} checks the owner in every state, so keep the
+    # user_id in the STARTED meta and in the result even when the job fails
+    self.update_state(state=states.STARTED, meta={"user_id": user_id})
+    try:
+        return run_receipt_ocr(image_b64, user_id)
+    except Exception:
+        logger.exception("Background OCR failed for user %s", user_id)
+        return {
+            "status": "failed",
+            "user_id": user_id,
+            "detail": "Failed to process OCR request and save expense.",
+        }
+
+
+def run_receipt_ocr(image_b64: str, user_id: int) -> Dict[str, Any]:
+    """OCR a receipt and save the partial expense; the body of process_receipt_ocr."""
+    image_bytes = base64.b64decode(image_b64)
+
+    logger.info("Starting background OCR for user %s", user_id)
+    ocr_raw_text = process_image_with_ocr(image_bytes)
+    extracted_dict = parse_ocr_text(ocr_raw_text)
+
+    if extracted_dict.get('amount') is None:
+        logger.warning("Background OCR failed to extract the mandatory 'amount' field for user %s", user_id)
+        return {
+            "status": "failed",
+            "user_id": user_id,
+            **jsonable_encoder(service.build_ocr_failure_detail(extracted_dict)),
+        }
+
+    expense_data = service.build_ocr_expense_data(user_id, extracted_dict, ocr_raw_text)
+
+    db = SessionLocal()
+    try:
+        stmt = insert(Expense).values(**expense_data).returning(Expense.id)
+        expense_id = db.execute(stmt).scalar_one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info("Background OCR saved expense %s for user %s", expense_id, user_id)
+    return {
+        "status": "completed",
+        "user_id": user_id,
+        **jsonable_encoder(service.build_ocr_response(expense_id, expense_data, extracted_dict)),
+    }
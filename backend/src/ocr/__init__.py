@@ -10,6 +10,9 @@ def _fallback_parse_ocr_text(text):
     logging.error("OCR dependencies not installed. Cannot parse text.")
     return {"date": None, "merchant_name": None, "amount": None, "currency": "NPR"}
 
+def _fallback_parse_ocr_text_batch(texts):
+    return [_fallback_parse_ocr_text(text) for text in texts]
+
 def _fallback_parse_date(text):
     logging.error("OCR dependencies not installed. Cannot parse date.")
     return None
@@ -27,6 +30,7 @@ try:
     from .service import (
         process_image_with_ocr,
         parse_ocr_text,
+        parse_ocr_text_batch,
         parse_date,
         parse_amount,
         parse_merchant
@@ -38,6 +42,7 @@ except ImportError as e:
     # Use fallback functions
     process_image_with_ocr = _fallback_process_image_with_ocr
     parse_ocr_text = _fallback_parse_ocr_text
+    parse_ocr_text_batch = _fallback_parse_ocr_text_batch
     parse_date = _fallback_parse_date
     parse_amount = _fallback_parse_amount
     parse_merchant = _fallback_parse_merchant
@@ -45,6 +50,7 @@ except ImportError as e:
 __all__ = [
     'process_image_with_ocr',
     'parse_ocr_text',
+    'parse_ocr_text_batch',
     'parse_date',
     'parse_amount',
     'parse_merchant'
@@ -1,15 +1,31 @@
 # backend/src/ocr/service.py
+import os
 import re
-import io
 import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache, wraps
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
-from typing import Dict, Optional, Any, Tuple, List
+from typing import Dict, NamedTuple, Optional, Any, Tuple, List
+
+# Tesseract's OpenMP threading is slower than running single-threaded, and
+# requests/Celery workers already OCR several receipts in parallel. Must be set
+# before Tesseract is loaded (tesserocr) or spawned (pytesseract inherits it).
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 
 import pytesseract
 import cv2
 import numpy as np
-from PIL import Image
+
+# tesserocr talks to the Tesseract C++ API directly and is the preferred
+# engine; pytesseract (subprocess + temp image file) is only a fallback for
+# environments where tesserocr could not be installed.
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+    logging.warning("tesserocr not installed, falling back to pytesseract (slower)")
 
 # Import preprocessing functions
 from . import preprocessing
@@ -19,36 +35,132 @@ from . import preprocessing
 # pytesseract.pytesseract.tesseract_cmd = r'/usr/local/bin/tesseract' # Example for macOS brew install
 # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe' # Example for Windows
 
+# --- Precompiled regexes ---
+# Compiled once at import instead of on every OCR request.
+
+# RE2 (google-re2) matches in linear time, so garbled OCR output can't make the
+# whole-text scans below backtrack catastrophically. Opt in with OCR_USE_RE2=1;
+# unlike re, its \d, \w and \b only match ASCII.
+USE_RE2 = os.getenv("OCR_USE_RE2", "").lower() in ("1", "true", "yes")
+re2 = None
+if USE_RE2:
+    try:
+        import re2
+    except ImportError:
+        logging.warning("OCR_USE_RE2 is set but google-re2 is not installed, using re")
+
+
+def compile_pattern(pattern: str, flags: int = 0):
+    """Compiles a text-scanning regex with RE2 when enabled, otherwise (or if RE2 rejects it) with re."""
+    if re2 is not None and not flags & ~re.IGNORECASE:
+        try:
+            return re2.compile(f'(?i){pattern}' if flags & re.IGNORECASE else pattern)
+        except Exception:  # e.g. lookarounds, which RE2 doesn't support
+            logging.debug("RE2 can't compile %r, using re", pattern)
+    return re.compile(pattern, flags)
+
+# Strips currency symbols etc. from a MONEY/CARDINAL entity before Decimal conversion
+NON_AMOUNT_CHARS_RE = re.compile(r'[^\d.,]')
+
+# Explicit total lines (STRATEGY 0 of enhanced_amount_extraction), most specific first.
+# Each allows an optional currency (Rs./NPR/$) before the amount and ignores a trailing comma.
+TOTAL_PATTERNS = [compile_pattern(p, re.IGNORECASE) for p in (
+    r'Total\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?',
+    r'Total\s*Amount\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?',
+    r'Grand\s*Total\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?',
+    r'Amount\s*Due\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?',
+    r'Net\s*Amount\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?',
+    # Additional patterns for different formats
+    r'Total\s*[^:]*?[: ]\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?',
+    r'(?:^|\n)Total\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?',
+    # Look for lines that just have "Total" and a number
+    r'(?:^|\n)\s*Total\s*[^:\n]*?\$?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?',
+)]
+
+# Regex patterns for common amount formats with their base confidence
+# Look for patterns like "Rs. 1,234.56", "Total: 1234.56", etc.
+# Each pattern has exactly one capture group (the amount). They are scanned one
+# at a time rather than as a single alternation: the patterns overlap, and an
+# alternation keeps only the leftmost match, so a low-scoring pattern could
+# consume the text a higher-scoring one needs.
+AMOUNT_PATTERNS = [(compile_pattern(p, re.IGNORECASE), base_confidence) for p, base_confidence in (
+    # Pattern with currency and context
+    (r'(?:total|amount|sum|balance|due|grand total).*?(?:Rs\.?|NPR)\s*[: ]?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)', 0.6),
+
+    # Pattern with just currency
+    (r'(?:Rs\.?|NPR)\s*[: ]?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)', 0.4),
+
+    # Pattern with total keyword
+    (r'(?:total|amount|sum|balance|due|grand total)\s*[: ]?\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)', 0.5),
+
+    # Fallback pattern for any decimal number
+    (r'(\d{1,3}(?:,\d{3})*\.\d{2})', 0.2),
+)]
+
+# Substring matches (no word boundaries) in the lowercased text around a number:
+# keywords near totals, and keywords indicating the number is likely NOT an amount
+TOTAL_KEYWORDS_RE = re.compile(r'total|amount|sum|balance|due|grand|payable')
+IGNORE_KEYWORDS_RE = re.compile(r'table|order|item|server|guest|gst|vat|reg|ac|check|chk|inv|rcpt|tax id|customer id')
+
+# Standalone numbers for STRATEGY 2 when spaCy NER (CARDINAL entities) is off,
+# scanned together with dates by NUMBER_OR_DATE_RE
+NUMBER_PATTERN = r'\b(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d{1,2})?\b'
+
+# Plausible range for a receipt amount, and the value above which a regex hit looks like a total
+MIN_AMOUNT = Decimal('1.0')
+MAX_AMOUNT = Decimal('1000000')
+LARGE_AMOUNT = Decimal('100')
+
+
+# Tesseract API handles are not thread-safe, so keep one per thread
+_tesserocr_local = threading.local()
+
+
+def _get_tesserocr_api():
+    """Returns this thread's tesserocr API handle, creating it on first use."""
+    api = getattr(_tesserocr_local, "api", None)
+    if api is None:
+        # PSM 6 (single uniform block of text), same as the pytesseract config
+        api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_BLOCK)
+        _tesserocr_local.api = api
+    return api
+
+
+def run_tesseract(image: np.ndarray) -> str:
+    """
+    Runs Tesseract on a preprocessed single-channel uint8 image.
+
+    With tesserocr installed the raw pixel buffer is handed straight to the C++
+    API via SetImageBytes, avoiding the image encode/decode round-trip that
+    pytesseract performs.
+    """
+    if tesserocr is None:
+        return pytesseract.image_to_string(image, config='--psm 6')
+
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    api = _get_tesserocr_api()
+    api.SetImageBytes(image.tobytes(), width, height, 1, width)
+    return api.GetUTF8Text()
+
 
 def process_image_with_ocr(image_bytes: bytes) -> str:
     """Performs OCR on the image bytes and returns the extracted text."""
     try:
-        # Convert image bytes to OpenCV format
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img_cv = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if img_cv is None:
+        # Decode and preprocess directly from memory.
+        # Deskewing is disabled - seems to negatively affect this bill
+        try:
+            processed_img = preprocessing.preprocess_bytes(image_bytes, apply_deskew=False)
+        except ValueError:
             logging.error("Error: Failed to decode image with OpenCV")
             return ""  # Or raise error
 
-        # Apply preprocessing steps
-        processed_img = preprocessing.grayscale(img_cv)
-        processed_img = preprocessing.resize_image(processed_img)
-        # Denoise before thresholding
-        processed_img = preprocessing.denoise(processed_img)
-        # Disable deskewing - seems to negatively affect this bill
-        # processed_img = preprocessing.deskew(processed_img)
-        # Apply thresholding after denoising
-        processed_img = preprocessing.threshold(processed_img)
-
-        # Optional: Add more preprocessing steps based on testing results
-        # processed_img = preprocessing.deskew(processed_img) # Moved up
-
         # Perform OCR on the preprocessed image
         # Revert back to PSM 6 as it was working before for this bill
-        text = pytesseract.image_to_string(processed_img, config='--psm 6')
+        text = run_tesseract(processed_img)
 
         # Log the extracted text for debugging
-        logging.debug(f"OCR extracted text: {text[:100]}...")
+        logging.debug("OCR extracted text: %s...", text[:100])
 
         return text
     except Exception as e:
@@ -61,340 +173,692 @@ def process_image_with_ocr(image_bytes: bytes) -> str:
 import spacy
 import dateparser
 
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-    logging.info("Successfully loaded spaCy model: en_core_web_sm")
-except Exception as e:
-    logging.error(f"Error loading spaCy model: {e}")
-    # Fallback to simple model if needed
-    nlp = spacy.blank("en")
+# spaCy NER is an opt-in fallback for dates and amounts: the regex strategies
+# already cover the formats it finds on receipts, at a fraction of the cost.
+# Set OCR_USE_SPACY_NER=1 to enable it (merchant extraction always uses it).
+USE_SPACY_NER = os.getenv("OCR_USE_SPACY_NER", "").lower() in ("1", "true", "yes")
 
-def parse_date(text: str) -> Optional[date]:
+# Only the NER component is used here; the rest of the pipeline is skipped
+SPACY_DISABLED_COMPONENTS = ["tagger", "parser", "lemmatizer", "attribute_ruler"]
+
+@lru_cache(maxsize=1)
+def get_nlp():
+    """Load the spaCy model on first use instead of at import time."""
+    try:
+        nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLED_COMPONENTS)
+        logging.info("Successfully loaded spaCy model: en_core_web_sm")
+    except Exception as e:
+        logging.error(f"Error loading spaCy model: {e}")
+        # Fallback to simple model if needed
+        nlp = spacy.blank("en")
+    return nlp
+
+
+@lru_cache(maxsize=8)
+def get_doc(text: str):
     """
-    Enhanced date extraction from receipt text using multiple strategies.
+    Run the spaCy pipeline on text, reusing the Doc for repeated calls.
 
-    Strategies (in order of priority):
-    1. Context-aware extraction (looking for date labels)
-    2. Position-based heuristics (dates near the top of receipt)
-    3. spaCy NER for DATE entities
-    4. Comprehensive regex pattern matching
-    5. Fallback to today's date if all else fails
+    parse_ocr_text runs the date, merchant and amount extractors on the same
+    OCR text, so they share a single NER pass. Callers must not modify the Doc.
+    """
+    return get_nlp()(text)
 
-    Args:
-        text: OCR extracted text from receipt
 
-    Returns:
-        Parsed date object or None if no valid date found
+# Number of texts spaCy tokenizes and tags together in the *_batch functions;
+# override with OCR_SPACY_BATCH_SIZE (larger batches use more memory)
+SPACY_BATCH_SIZE = int(os.getenv("OCR_SPACY_BATCH_SIZE", "32"))
+
+# Extraction results are kept for recently parsed texts, so parsing the same
+# receipt again (parse_* helpers, re-uploads served from the OCR text cache)
+# skips spaCy and the regex strategies
+EXTRACTION_CACHE_MAX_ENTRIES = 128
+
+
+def cache_extraction(func):
     """
-    # Define valid year range (to prevent unrealistic dates like year 2220)
-    current_year = datetime.now().year
-    min_valid_year = current_year - 20  # Allow receipts from up to 20 years ago
-    max_valid_year = current_year + 1   # Allow receipts dated slightly in the future (for flexibility)
+    Cache an enhanced_*_extraction function's result per text.
 
-    # Log the valid year range for debugging
-    logging.debug(f"Valid year range for date extraction: {min_valid_year} to {max_valid_year}")
-
-    def is_valid_date(d: date) -> bool:
-        """Check if the date has a realistic year"""
-        return d and min_valid_year <= d.year <= max_valid_year
-
-    def normalize_date_string(date_str: str) -> str:
-        """Clean and normalize date string for better parsing"""
-        # Remove extra spaces and non-alphanumeric chars except /, -, .
-        cleaned = re.sub(r'[^\w\s/\-\.]', '', date_str).strip()
-        # Replace multiple spaces with single space
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        return cleaned
-
-    def parse_with_dateparser(date_str: str) -> Optional[date]:
-        """Try to parse a date string with dateparser and validate it"""
+    The wrapped function must take (text, doc=None) and return an immutable
+    result. Results are also keyed on today's date because date validation
+    depends on it. A precomputed doc is only used on a cache miss.
+    """
+    cache: "OrderedDict[Tuple[str, date], Any]" = OrderedDict()
+    lock = threading.Lock()
+
+    @wraps(func)
+    def wrapper(text: str, doc=None):
+        key = (text, date.today())
+        with lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+
+        result = func(text, doc)
+        with lock:
+            cache[key] = result
+            while len(cache) > EXTRACTION_CACHE_MAX_ENTRIES:
+                cache.popitem(last=False)
+        return result
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+# --- Precompiled date regexes (used by parse_date) ---
+# normalize_date_string: drop punctuation other than / - . and collapse spaces
+DATE_JUNK_CHARS_RE = re.compile(r'[^\w\s/\-\.]')
+WHITESPACE_RUN_RE = re.compile(r'\s+')
+
+# Nepali date formats (BS), e.g. "15/01/2080 BS"
+BS_DATE_RE = re.compile(r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{4})\s*(?:BS|B\.S\.|बि\.स\.|बि\.सं\.|बिसं)', re.IGNORECASE)
+
+# First 4-digit number, used to reject far-future years before dateparser sees them
+YEAR_SCAN_RE = re.compile(r'(?:^|\D)(\d{4})(?:\D|$)')
+
+# Strings that look like phone numbers rather than dates, in one pass:
+# - 3-3-4 format, optionally with an international prefix (+977 ...)
+# - any numeric string of 9+ digits (10 digit/0-prefixed phone numbers, and long
+#   numbers like "9311111116" that dateparser would read as a far-future year)
+PHONE_OR_LONG_NUMBER_RE = re.compile(r'^(?:\+\d{1,3}[-\s]?)?\d{3}[-\s]?\d{3}[-\s]?\d{4}$|^\d{9,}$')
+
+# "DD-Mon-YY" format (e.g., "20-May-18")
+DAY_MONTH_NAME_YEAR_RE = re.compile(r'(\d{1,2})[\-\s]+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\s]+(\d{2}|\d{4})', re.IGNORECASE)
+MONTH_NUMBERS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# Partial dates (DD/MM with no year) and month/year only (MM/YYYY)
+PARTIAL_DATE_RE = re.compile(r'^(\d{1,2})[/\-\.](\d{1,2})$')
+MONTH_YEAR_RE = re.compile(r'^(\d{1,2})[/\-\.](\d{4})$')
+DATE_SEPARATORS = '-/.'
+
+# "Month DD YYYY" layouts (commas are already stripped by normalize_date_string).
+# "DD Month YYYY" is handled earlier by DAY_MONTH_NAME_YEAR_RE.
+MONTH_NAME_DATE_FORMATS = ('%b %d %Y', '%B %d %Y')
+
+# STRATEGY 1: date labels followed by a date
+DATE_KEYWORDS = [
+    'date', 'dt', 'dated', 'invoice date', 'receipt date', 'bill date',
+    'transaction date', 'order date', 'purchase date', 'sale date',
+    'service date', 'issue date', 'issued on', 'issued date'
+]
+DATE_LABEL = r'(?:' + '|'.join(map(re.escape, DATE_KEYWORDS)) + r')[:\t ]+'
+# (name, pattern) for the date formats expected after a date label. Labels and
+# dates are separated by spaces and tabs only, so a match never spans two lines.
+DATE_VALUE_PATTERNS = (
+    # Date: MM/DD/YYYY or Date: DD/MM/YYYY
+    ('numeric', r'\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}'),
+
+    # Date: DD-Mon-YY or DD-Mon-YYYY (e.g., 20-May-18)
+    ('day_month_name', r'\d{1,2}[\-\t ]+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\t ]+\d{2,4}'),
+
+    # Date: Month DD, YYYY
+    ('month_name_day', r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?[\t ]+\d{1,2}(?:st|nd|rd|th)?[,\t ]+\d{2,4}'),
+
+    # Date: YYYY-MM-DD
+    ('iso', r'\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}'),
+
+    # Date with time: DD-Mon-YY HH:MM or similar
+    ('day_month_name_time', r'\d{1,2}[\-\t ]+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\t ]+\d{2,4}[\t ]+\d{1,2}:\d{2}(?::\d{2})?'),
+)
+# One alternation over the whole text; the named group that matched says which format it was
+DATE_CONTEXT_RE = re.compile(
+    DATE_LABEL + r'(?:' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in DATE_VALUE_PATTERNS) + r')',
+    re.IGNORECASE,
+)
+# enhanced_date_extraction STRATEGY 1: find each label once per line, then try
+# every date format right after it. Lines are lowercased and DATE_KEYWORDS are
+# lowercase, so the label needs no IGNORECASE flag.
+DATE_LABEL_RE = re.compile(DATE_LABEL)
+DATE_VALUE_RES = tuple(re.compile(pattern, re.IGNORECASE) for _, pattern in DATE_VALUE_PATTERNS)
+
+# enhanced_amount_extraction STRATEGY 2 without spaCy: a date match consumes its
+# day, month and year (and time), so only numbers outside dates land in the
+# "number" group. Reversed to try the date-with-time format before its prefix.
+NUMBER_OR_DATE_RE = compile_pattern(
+    '|'.join(f'(?:{pattern})' for _, pattern in reversed(DATE_VALUE_PATTERNS))
+    + f'|(?P<number>{NUMBER_PATTERN})',
+    re.IGNORECASE,
+)
+
+# STRATEGY 2/4: common date formats in receipts
+COMPREHENSIVE_DATE_PATTERNS = tuple(compile_pattern(p, re.IGNORECASE) for p in (
+    # ISO format: YYYY-MM-DD
+    r'\b(\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2})\b',
+
+    # US/UK format: MM/DD/YYYY or DD/MM/YYYY
+    r'\b(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\b',
+
+    # Written format: Month DD, YYYY
+    r'\b((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?[,\s]+\d{2,4})\b',
+
+    # Written format: DD Month YYYY (e.g., 21st April 2000)
+    r'\b(\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?,?\s+\d{4})\b',
+
+    # Short format: DD-MMM-YY or DD-MMM-YYYY (e.g., 20-May-18)
+    r'\b(\d{1,2}[/\-\s](?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[/\-\s]\d{2,4})\b',
+
+    # Format with time: DD-Mon-YY HH:MM (e.g., 20-May-18 22:55)
+    r'\b(\d{1,2}[/\-\s](?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[/\-\s]\d{2,4}[\s]+\d{1,2}:\d{2}(?::\d{2})?)\b',
+
+    # Numeric only: DDMMYYYY or MMDDYYYY (common in some receipts)
+    r'\b(\d{2}(?:0[1-9]|1[0-2])(?:19|20)\d{2})\b',  # DDMMYYYY
+    r'\b((?:0[1-9]|1[0-2])\d{2}(?:19|20)\d{2})\b',  # MMDDYYYY
+
+    # Common receipt formats with just day and month (assume current year)
+    r'\b(\d{1,2}[/\-\.]\d{1,2})\b',  # DD/MM or MM/DD
+
+    # Formats with just month and year
+    r'\b((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?[/\-\s]+\d{2,4})\b',  # MMM/YYYY
+    r'\b(\d{1,2}[/\-\s]+\d{4})\b',  # MM/YYYY
+
+    # Nepali date formats (BS)
+    r'\b(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{4}\s*(?:BS|B\.S\.|बि\.स\.|बि\.सं\.|बिसं))\b',  # DD/MM/YYYY BS
+    r'\b((?:BS|B\.S\.|बि\.स\.|बि\.सं\.|बिसं)\s*\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{4})\b',  # BS DD/MM/YYYY
+
+    # Receipt number that might be mistaken for a date (often has format like YYYYMMDD)
+    r'\b(?:receipt|invoice|bill|order|transaction)(?:\s+|\s*[:#]\s*)(\d{8})\b',  # Receipt #20230501
+
+    # Formats with day and month names
+    r'\b(\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*)\b',  # 15th January
+))
+
+# enhanced_date_extraction STRATEGY 2/4: the most common receipt date formats.
+# Matched against lowercased text, so they need no IGNORECASE flag.
+ENHANCED_DATE_PATTERNS = tuple(compile_pattern(p) for p in (
+    r'\b(\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2})\b',  # YYYY-MM-DD
+    r'\b(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\b',  # MM/DD/YYYY or DD/MM/YYYY
+    r'\b((?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?[,\s]+\d{2,4})\b',  # Month DD, YYYY
+    r'\b(\d{1,2}[/\-\s](?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*[/\-\s]\d{2,4})\b',  # DD-MMM-YY
+    r'\b(\d{1,2}(?:st|nd|rd|th)\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?\s+\d{4})\b',  # 21st April 2000
+))
+
+# enhanced_date_extraction stops after STRATEGY 1 once a labeled date reaches
+# this confidence (later strategies never score above 0.6)
+DATE_SHORT_CIRCUIT_CONFIDENCE = 0.9
+
+# enhanced_date_extraction skips spaCy NER once a regex candidate reaches this
+# confidence (NER candidates never score above 0.4)
+NER_SKIP_DATE_CONFIDENCE = 0.6
+
+# Dates that can't be misread: ISO (YYYY-MM-DD) at the start, or a month name anywhere
+UNAMBIGUOUS_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec', re.IGNORECASE)
+
+# STRATEGY 5: standalone day/month/year labels (matched against lowercased text)
+DATE_PART_DAY_RE = re.compile(r'\b(?:day|date)[:\s]+(\d{1,2})\b')
+DATE_PART_MONTH_RE = re.compile(r'\b(?:month|mon)[:\s]+(\d{1,2}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*)\b')
+DATE_PART_YEAR_RE = re.compile(r'\b(?:year|yr)[:\s]+(\d{2,4})\b')
+
+# --- Known merchants (used by enhanced_merchant_extraction) ---
+# Expanded list of known merchants in Nepal
+KNOWN_MERCHANTS = [
+    # Supermarkets and Department Stores
+    "Bhatbhateni", "Big Mart", "Saleways", "Salesberry", "CG Mart", "Bluebird",
+    "Namaste Supermarket", "Thulo Supermarket", "Aagan", "Bigmart", "Bhat Bhateni",
+    "Bhatbhateni Supermarket", "Bhatbhateni Super Store", "Saleways Supermarket",
+    "Salesberry Supermarket", "Nimbus", "Uchit Bazar", "Uchit Bazaar", "Uchit Bajar",
+
+    # Food and Restaurants
+    "KFC", "Pizza Hut", "Himalayan Java", "Bakery Cafe", "Roadhouse", "Momo King",
+    "Bajeko Sekuwa", "Dalle Restaurant", "Tamarind", "Bota", "Trisara", "Gokarna House",
+    "Gokarna Resort", "Hyatt Regency", "Soaltee Hotel", "Soaltee Crowne Plaza", "Durbarmarg",
+    "Durbar Marg", "Thamel", "Bawarchi", "Bawarchi Restro", "Chicken Station", "Nanglo",
+    "Nanglo Bakery Cafe", "Nanglo West", "Cafe Soma", "Cafe De Patan", "Cafe De Kathmandu",
+    "Kathmandu Guest House", "Reef Restaurant", "Reef", "Reef Kathmandu", "Reef Thamel",
+    "Reef Durbar Marg", "Reef Durbarmarg", "Reef Jhamsikhel", "Reef Jhamel", "Reef Patan",
+    "Reef Lalitpur", "Reef Bhaktapur", "Reef Pokhara", "Reef Chitwan", "Reef Lumbini",
+
+    # Online Marketplaces
+    "Daraz", "Foodmandu", "Sastodeal", "Hamrobazar", "Ageno", "Pathao", "Pathao Food",
+    "Foodmandu", "Bhojdeals", "Bhoj Deals", "Bhoj", "Bhoj Food", "Bhoj Food Delivery",
+
+    # Malls and Shopping Centers
+    "Labim Mall", "Civil Mall", "Miniso", "City Centre", "City Center", "Kathmandu Mall",
+    "KL Tower", "KL Mall", "Kathmandu Fun Park", "Fun Park", "Chhaya Center", "Chhaya Centre",
+    "Rising Mall", "Eyeplex Mall", "Eyeplex", "Eyeplex Cinema", "QFX", "QFX Cinemas",
+    "QFX Civil Mall", "QFX Labim Mall", "QFX Chhaya Center", "QFX Bhaktapur", "QFX Patan",
+
+    # Electronics and Appliances
+    "CG Digital", "CG Electronics", "Nagmani", "Nagmani Electronics", "Pashupati Electronics",
+    "Pashupati Traders", "Nepa Electronics", "Nepa Hima Electronics", "Nepa Hima",
+    "Nepa Hima Trade Link", "Nepa Hima Trade", "Nepa Hima Trade Link Pvt Ltd",
+    "Samsung Plaza", "Samsung", "Samsung Store", "Samsung Showroom", "Samsung Service Center",
+    "LG Showroom", "LG", "LG Store", "LG Service Center", "Sony Center", "Sony", "Sony Store",
+
+    # Pharmacies and Healthcare
+    "Pharmacy", "Medical", "Hospital", "Clinic", "Diagnostic", "Diagnostics", "Lab",
+    "Laboratory", "Laboratories", "Health", "Healthcare", "Health Care", "Health Center",
+    "Health Centre", "Health Post", "Healthpost", "Dispensary", "Dispensaries", "Chemist",
+    "Chemists", "Druggist", "Druggists", "Drugstore", "Drug Store", "Drug Stores",
+
+    # Clothing and Fashion
+    "Saugat Garments", "Saugat", "Saugat Fashion", "Saugat Fashion House", "Saugat Fashion Store",
+    "Curves", "Curves Nepal", "Curves Clothing", "Curves Fashion", "Curves Fashion Store",
+    "Juju Wears", "Juju", "Juju Fashion", "Juju Fashion Store", "Juju Fashion House",
+    "Urban Girl", "Urban", "Urban Fashion", "Urban Fashion Store", "Urban Fashion House",
+
+    # Convenience Stores
+    "Bhatbhateni Express", "Bhatbhateni Mini", "Bhat Bhateni Express", "Bhat Bhateni Mini",
+    "Bhatbhateni Convenience", "Bhat Bhateni Convenience", "Bhatbhateni Minimart",
+    "Bhat Bhateni Minimart", "Bhatbhateni Mart", "Bhat Bhateni Mart", "Bhatbhateni Store",
+    "Bhat Bhateni Store", "Bhatbhateni Super", "Bhat Bhateni Super", "Bhatbhateni Super Store",
+    "Bhat Bhateni Super Store", "Bhatbhateni Superstore", "Bhat Bhateni Superstore",
+
+    # Fuel Stations
+    "Nepal Oil", "Nepal Oil Corporation", "NOC", "Petrol Pump", "Petrol", "Diesel", "Fuel",
+    "Fuel Station", "Fuel Stations", "Gas Station", "Gas Stations", "Filling Station",
+    "Filling Stations", "Petrol Station", "Petrol Stations", "Diesel Station", "Diesel Stations"
+]
+
+# (name, lowercased name) pairs, so receipts don't re-lowercase the list.
+# Names listed more than once in KNOWN_MERCHANTS are only scanned once.
+KNOWN_MERCHANTS_LOWER = tuple((merchant, merchant.lower()) for merchant in dict.fromkeys(KNOWN_MERCHANTS))
+
+# (lowercased name, words) pairs for the fuzzy pass (STRATEGY 2)
+KNOWN_MERCHANT_WORDS = tuple((merchant_lower, merchant_lower.split()) for _, merchant_lower in KNOWN_MERCHANTS_LOWER)
+
+# STRATEGY 1: letters, digits and whitespace that extend a known merchant name
+# found in a header line ("Bhatbhateni" -> "Bhatbhateni Supermarket"); the
+# same characters str.isalnum()/str.isspace() accept, so no underscore
+MERCHANT_NAME_TAIL_RE = re.compile(r'(?:[^\W_]|\s)*')
+
+# Substrings (matched against lowercased text) that make a line or entity more
+# or less likely to be the merchant name
+# STRATEGY 3: business suffixes in ORG entities
+ORG_BUSINESS_KEYWORDS = (
+    "ltd", "limited", "pvt", "private", "inc", "incorporated",
+    "llc", "corp", "corporation", "co", "company", "enterprises",
+    "industries", "group", "holdings", "store", "shop", "mart",
+    "market", "supermarket", "restaurant", "cafe", "hotel"
+)
+# STRATEGY 4: header lines with these are receipt fields, not the merchant
+FIRST_LINE_SKIP_KEYWORDS = (
+    'total', 'date', 'receipt', 'invoice', 'bill', 'tel', 'phone',
+    'address', 'customer', 'cashier', 'operator', 'terminal',
+    'transaction', 'reference', 'ref', 'no', 'number', 'time',
+    'payment', 'card', 'cash', 'credit', 'debit', 'tax', 'vat',
+    'gst', 'subtotal', 'discount', 'item', 'description', 'qty',
+    'quantity', 'price', 'amount', 'unit', 'rate', 'value'
+)
+FIRST_LINE_BUSINESS_KEYWORDS = (
+    "store", "shop", "mart", "market", "supermarket",
+    "restaurant", "cafe", "hotel", "pharmacy", "medical",
+    "hospital", "clinic", "center", "centre", "mall"
+)
+# STRATEGY 6: lines above contact details with these are not the merchant
+CONTACT_SKIP_KEYWORDS = ('total', 'date', 'receipt', 'invoice', 'bill')
+
+# Each keyword list as one alternation, so a line is searched once instead of
+# once per keyword. Plain substrings, as before: "subtotal" still contains "total".
+ORG_BUSINESS_KEYWORDS_RE = re.compile('|'.join(map(re.escape, ORG_BUSINESS_KEYWORDS)))
+FIRST_LINE_SKIP_KEYWORDS_RE = re.compile('|'.join(map(re.escape, FIRST_LINE_SKIP_KEYWORDS)))
+FIRST_LINE_BUSINESS_KEYWORDS_RE = re.compile('|'.join(map(re.escape, FIRST_LINE_BUSINESS_KEYWORDS)))
+CONTACT_SKIP_KEYWORDS_RE = re.compile('|'.join(map(re.escape, CONTACT_SKIP_KEYWORDS)))
+
+# Header lines decorated like "*** KFC ***" or "=== Bhatbhateni ==="
+HEADER_DECORATION_RE = re.compile(r'^[*#=_-]+.*[*#=_-]+$')
+LEADING_DIGIT_RE = re.compile(r'\d')
+NUMERIC_NAME_RE = re.compile(r'^\d+$')
+
+
+class MerchantLineFeatures(NamedTuple):
+    """Per-line properties shared by merchant STRATEGY 4-6, computed at most once per line."""
+    text: str  # line.strip()
+    text_lower: str  # line.lower().strip()
+    starts_with_digit: bool
+    is_upper: bool
+    capitalization_boost: float
+
+
+# Post-processing: leading phrases that aren't part of the merchant name
+MERCHANT_NAME_PREFIXES = ('welcome to ', 'thank you for shopping at ', 'receipt from ')
+
+# A known merchant at or above this confidence ends the search early
+KNOWN_MERCHANT_SHORT_CIRCUIT_CONFIDENCE = 0.95
+
+
+class MerchantNameCharTable(dict):
+    """
+    str.translate table for clean_merchant_name: keeps letters, digits,
+    underscores and whitespace and deletes everything else. Entries are filled
+    in the first time a character is seen.
+    """
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char == '_' or char.isspace() else None
+        self[codepoint] = value
+        return value
+
+
+MERCHANT_NAME_CHAR_TABLE = MerchantNameCharTable()
+
+# STRATEGY 6: lines with phone numbers or addresses; the merchant name is often just above
+MERCHANT_PHONE_PATTERNS = (
+    r'\b(?:tel|telephone|phone|mobile|contact|call)(?::|.)?(?:\s+|$)\+?\d[\d\s\-]+',
+    r'\b\+?977[\d\s\-]+',  # Nepal country code
+    r'\b01[\d\s\-]{6,}',   # Kathmandu landline
+    r'\b9\d[\d\s\-]{7,}'   # Nepal mobile
+)
+MERCHANT_ADDRESS_PATTERNS = (
+    r'\b(?:address|location|branch|store)(?::|.)?(?:\s+|$)',
+    r'\b(?:kathmandu|lalitpur|bhaktapur|pokhara|biratnagar|birgunj|dharan|butwal|nepalgunj|hetauda)',
+    r'(?:thamel|new road|durbar marg|kupondole|jhamsikhel|patan|lazimpat|maharajgunj|baluwatar)'
+)
+# All of the above in one alternation, so each line is scanned once
+CONTACT_LINE_RE = re.compile(
+    r'(?P<phone>' + '|'.join(MERCHANT_PHONE_PATTERNS) + r')|(?P<address>' + '|'.join(MERCHANT_ADDRESS_PATTERNS) + r')',
+    re.IGNORECASE,
+)
+
+def is_valid_date(d: date, today: date) -> bool:
+    """Check if the date has a realistic year"""
+    return d and today.year - 20 <= d.year <= today.year + 1
+
+
+def normalize_date_string(date_str: str) -> str:
+    """Clean and normalize date string for better parsing"""
+    # Remove extra spaces and non-alphanumeric chars except /, -, .
+    cleaned = DATE_JUNK_CHARS_RE.sub('', date_str).strip()
+    # Replace multiple spaces with single space
+    cleaned = WHITESPACE_RUN_RE.sub(' ', cleaned)
+    return cleaned
+
+
+def fast_parse_numeric_date(normalized: str) -> Optional[date]:
+    """
+    Parse YYYY-MM-DD and NN-NN-YYYY dates (with -, / or . separators) directly.
+
+    These layouts make up most receipt dates, and slicing out the fields is far
+    cheaper than dateparser. Ambiguous NN-NN-YYYY dates are read month first,
+    the same as dateparser does for English text. Returns None for anything
+    else so the caller can fall back to dateparser.
+    """
+    if len(normalized) != 10:
+        return None
+
+    if normalized[4] in DATE_SEPARATORS and normalized[7] == normalized[4]:
+        year, month, day = normalized[:4], normalized[5:7], normalized[8:]
+    elif normalized[2] in DATE_SEPARATORS and normalized[5] == normalized[2]:
+        month, day, year = normalized[:2], normalized[3:5], normalized[6:]
+    else:
+        return None
+
+    fields = year + month + day
+    if not (fields.isascii() and fields.isdigit()):
+        return None
+
+    year_num, month_num, day_num = int(year), int(month), int(day)
+    if month_num > 12:
+        month_num, day_num = day_num, month_num  # Only valid as DD-MM-YYYY
+    try:
+        return date(year_num, month_num, day_num)
+    except ValueError:
+        return None
+
+
+def fast_parse_month_name_date(normalized: str) -> Optional[date]:
+    """
+    Parse "Month DD YYYY" dates (e.g. "Jul 15 2023", "July 15 2023") with strptime.
+
+    Returns None for anything else so the caller can fall back to dateparser.
+    """
+    if not normalized[:1].isalpha():
+        return None
+    for date_format in MONTH_NAME_DATE_FORMATS:
         try:
-            # Extract date part if there's a time component (e.g., "20-May-18 22:55")
-            if ' ' in date_str and ':' in date_str.split(' ')[-1]:
-                parts = date_str.split(' ')
-                if len(parts) >= 2 and ':' in parts[-1]:
-                    date_str = ' '.join(parts[:-1])  # Remove the time part
-
-            normalized = normalize_date_string(date_str)
-
-            # Handle Nepali date formats (BS)
-            bs_pattern = r'(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{4})\s*(?:BS|B\.S\.|बि\.स\.|बि\.सं\.|बिसं)'
-            bs_match = re.search(bs_pattern, normalized, re.IGNORECASE)
-            if bs_match:
-                # Extract the date part without the BS suffix
-                bs_date_str = bs_match.group(1)
-                # Convert BS to AD (simplified - just subtract ~57 years for rough conversion)
-                # For a proper conversion, we would need a Nepali date library
-                try:
-                    parsed = dateparser.parse(bs_date_str)
-                    if parsed:
-                        # Rough conversion from BS to AD
-                        ad_date = parsed.date().replace(year=parsed.year - 57)
-                        if is_valid_date(ad_date):
-                            return ad_date
-                except Exception:
-                    pass  # Fall back to other methods
-
-            # Pre-check for extreme future years to avoid dateparser issues
-            # Look for 4-digit years that are clearly in the far future
-            year_pattern = r'(?:^|\D)(\d{4})(?:\D|$)'
-            year_match = re.search(year_pattern, normalized)
-            if year_match:
-                potential_year = int(year_match.group(1))
-                if potential_year > max_valid_year:
-                    logging.warning(f"Detected extreme future year {potential_year} in '{date_str}', skipping")
-                    return None
+            return datetime.strptime(normalized, date_format).date()
+        except ValueError:
+            continue
+    return None
 
-            # Check if the string looks like a phone number (to avoid parsing phone numbers as dates)
-            phone_patterns = [
-                r'^\d{10}$',  # 10 digit phone number
-                r'^\d{3}[-\s]?\d{3}[-\s]?\d{4}$',  # 3-3-4 format
-                r'^\+\d{1,3}[-\s]?\d{3}[-\s]?\d{3}[-\s]?\d{4}$',  # International format
-                r'^0\d{9,10}$',  # Starting with 0 followed by 9-10 digits
-                r'^\d{9,10}$'  # Any 9-10 digit number (common for phone numbers)
-            ]
-
-            for pattern in phone_patterns:
-                if re.match(pattern, normalized):
-                    logging.warning(f"Detected phone number pattern in '{date_str}', skipping")
-                    return None
 
-            # Additional check for numbers that could be parsed as future years
-            # This catches cases like "9311111116" which could be parsed as year 2265
-            if re.match(r'^\d+$', normalized) and len(normalized) >= 9:
-                logging.warning(f"Detected potential phone number (long numeric string) in '{date_str}', skipping")
-                return None
+def fast_parse_date(normalized: str) -> Optional[date]:
+    """Parse the fixed receipt date layouts without dateparser, or return None."""
+    return fast_parse_numeric_date(normalized) or fast_parse_month_name_date(normalized)
 
-            # Special handling for "DD-Mon-YY" format (e.g., "20-May-18")
-            mon_pattern = r'(\d{1,2})[\-\s]+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\s]+(\d{2}|\d{4})'
-            mon_match = re.match(mon_pattern, normalized, re.IGNORECASE)
-
-            if mon_match:
-                day = int(mon_match.group(1))
-                month = mon_match.group(2)
-                year = mon_match.group(3)
-
-                # Convert month name to number
-                month_map = {
-                    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-                    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-                }
-                month_num = month_map.get(month.lower()[:3])
-
-                # Handle 2-digit year (add century)
-                if len(year) == 2:
-                    # Assume 20xx for years less than 50, 19xx for years 50+
-                    century = '20' if int(year) < 50 else '19'
-                    year = century + year
-
-                try:
-                    year_int = int(year)
-                    # Extra validation before creating date object
-                    if year_int < min_valid_year or year_int > max_valid_year:
-                        logging.warning(f"Year {year_int} out of valid range in '{date_str}', skipping")
-                        return None
-
-                    parsed_date = date(year_int, month_num, day)
-                    if is_valid_date(parsed_date):
-                        return parsed_date
-                except (ValueError, TypeError) as e:
-                    logging.debug(f"Error parsing date with month pattern: {e}")
-                    pass  # Fall back to dateparser
-
-            # Handle partial dates (DD/MM with no year)
-            partial_date_pattern = r'^(\d{1,2})[/\-\.](\d{1,2})$'
-            partial_match = re.match(partial_date_pattern, normalized)
-            if partial_match:
-                try:
-                    # Assume first number is day, second is month (common in many countries)
-                    day = int(partial_match.group(1))
-                    month = int(partial_match.group(2))
-
-                    # Validate day/month values
-                    if 1 <= day <= 31 and 1 <= month <= 12:
-                        # Use current year
-                        current_year = datetime.now().year
-                        try:
-                            # Try to create a valid date
-                            parsed_date = date(current_year, month, day)
-
-                            # If the date is in the future, use previous year
-                            if parsed_date > date.today():
-                                parsed_date = date(current_year - 1, month, day)
-
-                            if is_valid_date(parsed_date):
-                                return parsed_date
-                        except ValueError:
-                            # Try swapping day/month (for US format MM/DD)
-                            if 1 <= month <= 12 and 1 <= day <= 31:
-                                try:
-                                    parsed_date = date(current_year, day, month)
-                                    # If the date is in the future, use previous year
-                                    if parsed_date > date.today():
-                                        parsed_date = date(current_year - 1, day, month)
-
-                                    if is_valid_date(parsed_date):
-                                        return parsed_date
-                                except ValueError:
-                                    pass  # Invalid date, continue to next method
-                except (ValueError, TypeError):
-                    pass  # Fall back to dateparser
-
-            # Handle month and year only (MM/YYYY)
-            month_year_pattern = r'^(\d{1,2})[/\-\.](\d{4})$'
-            month_year_match = re.match(month_year_pattern, normalized)
-            if month_year_match:
-                try:
-                    month = int(month_year_match.group(1))
-                    year = int(month_year_match.group(2))
-
-                    # Validate month and year
-                    if 1 <= month <= 12 and min_valid_year <= year <= max_valid_year:
-                        # Use the 1st day of the month
-                        parsed_date = date(year, month, 1)
-                        if is_valid_date(parsed_date):
-                            return parsed_date
-                except (ValueError, TypeError):
-                    pass  # Fall back to dateparser
 
-            # Standard dateparser approach
+@lru_cache(maxsize=4096)
+def dateparser_parse_date(normalized: str, today: date) -> Optional[date]:
+    """Run dateparser (the slowest step of date parsing) on a normalized string, cached per day."""
+    parsed = dateparser.parse(normalized)
+    return parsed.date() if parsed else None
+
+
+@lru_cache(maxsize=4096)
+def parse_with_dateparser(date_str: str, today: date) -> Optional[date]:
+    """
+    Try to parse a date string with dateparser and validate it.
+
+    The same candidate strings come up in several strategies (and across
+    receipts from the same merchant), so results are cached. `today` is part
+    of the cache key because the valid year range and partial dates depend on it.
+    """
+    min_valid_year = today.year - 20  # Allow receipts from up to 20 years ago
+    max_valid_year = today.year + 1   # Allow receipts dated slightly in the future
+
+    try:
+        # Extract date part if there's a time component (e.g., "20-May-18 22:55")
+        if ' ' in date_str and ':' in date_str.split(' ')[-1]:
+            parts = date_str.split(' ')
+            if len(parts) >= 2 and ':' in parts[-1]:
+                date_str = ' '.join(parts[:-1])  # Remove the time part
+
+        normalized = normalize_date_string(date_str)
+
+        # Handle Nepali date formats (BS)
+        bs_match = BS_DATE_RE.search(normalized)
+        if bs_match:
+            # Extract the date part without the BS suffix
+            bs_date_str = bs_match.group(1)
+            # Convert BS to AD (simplified - just subtract ~57 years for rough conversion)
+            # For a proper conversion, we would need a Nepali date library
             try:
-                parsed = dateparser.parse(normalized)
+                parsed = fast_parse_date(bs_date_str) or dateparser_parse_date(bs_date_str, today)
                 if parsed:
-                    parsed_date = parsed.date()
-                    # Double-check the year is in valid range
-                    if is_valid_date(parsed_date):
-                        return parsed_date
-                    else:
-                        logging.warning(f"Dateparser returned invalid year {parsed_date.year} for '{date_str}'")
-            except Exception as e:
-                logging.debug(f"Dateparser error for '{date_str}': {e}")
+                    # Rough conversion from BS to AD
+                    ad_date = parsed.replace(year=parsed.year - 57)
+                    if is_valid_date(ad_date, today):
+                        return ad_date
+            except Exception:
+                pass  # Fall back to other methods
+
+        # Pre-check for extreme future years to avoid dateparser issues
+        # Look for 4-digit years that are clearly in the far future
+        year_match = YEAR_SCAN_RE.search(normalized)
+        if year_match:
+            potential_year = int(year_match.group(1))
+            if potential_year > max_valid_year:
+                logging.warning(f"Detected extreme future year {potential_year} in '{date_str}', skipping")
+                return None
 
-        except Exception as e:
-            logging.debug(f"Failed to parse date string '{date_str}': {e}")
-        return None
+        # Check if the string looks like a phone number or long numeric string
+        # (to avoid parsing them as dates, e.g. "9311111116" as year 2265)
+        if PHONE_OR_LONG_NUMBER_RE.match(normalized):
+            logging.warning(f"Detected phone number pattern in '{date_str}', skipping")
+            return None
 
-    # Split text into lines for position-based analysis
-    lines = text.split('\n')
+        # Special handling for "DD-Mon-YY" format (e.g., "20-May-18")
+        mon_match = DAY_MONTH_NAME_YEAR_RE.match(normalized)
 
-    # STRATEGY 1: Context-aware extraction - Look for date labels
-    date_keywords = [
-        'date', 'dt', 'dated', 'invoice date', 'receipt date', 'bill date',
-        'transaction date', 'order date', 'purchase date', 'sale date',
-        'service date', 'issue date', 'issued on', 'issued date'
-    ]
-    date_patterns = [
-        # Date: MM/DD/YYYY or Date: DD/MM/YYYY
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})',
-
-        # Date: DD-Mon-YY or DD-Mon-YYYY (e.g., 20-May-18)
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+(\d{1,2}[\-\s]+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\s]+\d{2,4})',
-
-        # Date: Month DD, YYYY
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?[,\s]+\d{2,4})',
-
-        # Date: YYYY-MM-DD
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+(\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2})',
-
-        # Date with time: DD-Mon-YY HH:MM or similar
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+(\d{1,2}[\-\s]+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\s]+\d{2,4}[\s]+\d{1,2}:\d{2}(?::\d{2})?)',
-    ]
-
-    for line in lines:
-        line_lower = line.lower()
-        for pattern in date_patterns:
-            matches = re.findall(pattern, line_lower, re.IGNORECASE)
-            for match in matches:
-                parsed_date = parse_with_dateparser(match)
-                if parsed_date:
-                    logging.info(f"Found date with context: {match} -> {parsed_date}")
+        if mon_match:
+            day = int(mon_match.group(1))
+            month = mon_match.group(2)
+            year = mon_match.group(3)
+
+            # Convert month name to number
+            month_num = MONTH_NUMBERS.get(month.lower()[:3])
+
+            # Handle 2-digit year (add century)
+            if len(year) == 2:
+                # Assume 20xx for years less than 50, 19xx for years 50+
+                century = '20' if int(year) < 50 else '19'
+                year = century + year
+
+            try:
+                year_int = int(year)
+                # Extra validation before creating date object
+                if year_int < min_valid_year or year_int > max_valid_year:
+                    logging.warning(f"Year {year_int} out of valid range in '{date_str}', skipping")
+                    return None
+
+                parsed_date = date(year_int, month_num, day)
+                if is_valid_date(parsed_date, today):
                     return parsed_date
+            except (ValueError, TypeError) as e:
+                logging.debug("Error parsing date with month pattern: %s", e)
+                pass  # Fall back to dateparser
 
-    # STRATEGY 2: Position-based heuristics - Check top portion of receipt
-    # Most receipts have the date in the first few lines
-    top_lines = ' '.join(lines[:min(10, len(lines))])
+        # Handle partial dates (DD/MM with no year)
+        partial_match = PARTIAL_DATE_RE.match(normalized)
+        if partial_match:
+            try:
+                # Assume first number is day, second is month (common in many countries)
+                day = int(partial_match.group(1))
+                month = int(partial_match.group(2))
+
+                # Validate day/month values
+                if 1 <= day <= 31 and 1 <= month <= 12:
+                    # Use current year
+                    current_year = today.year
+                    try:
+                        # Try to create a valid date
+                        parsed_date = date(current_year, month, day)
+
+                        # If the date is in the future, use previous year
+                        if parsed_date > today:
+                            parsed_date = date(current_year - 1, month, day)
+
+                        if is_valid_date(parsed_date, today):
+                            return parsed_date
+                    except ValueError:
+                        # Try swapping day/month (for US format MM/DD)
+                        if 1 <= month <= 12 and 1 <= day <= 31:
+                            try:
+                                parsed_date = date(current_year, day, month)
+                                # If the date is in the future, use previous year
+                                if parsed_date > today:
+                                    parsed_date = date(current_year - 1, day, month)
+
+                                if is_valid_date(parsed_date, today):
+                                    return parsed_date
+                            except ValueError:
+                                pass  # Invalid date, continue to next method
+            except (ValueError, TypeError):
+                pass  # Fall back to dateparser
+
+        # Handle month and year only (MM/YYYY)
+        month_year_match = MONTH_YEAR_RE.match(normalized)
+        if month_year_match:
+            try:
+                month = int(month_year_match.group(1))
+                year = int(month_year_match.group(2))
+
+                # Validate month and year
+                if 1 <= month <= 12 and min_valid_year <= year <= max_valid_year:
+                    # Use the 1st day of the month
+                    parsed_date = date(year, month, 1)
+                    if is_valid_date(parsed_date, today):
+                        return parsed_date
+            except (ValueError, TypeError):
+                pass  # Fall back to dateparser
 
-    # Common date formats in receipts (expanded from original)
-    comprehensive_patterns = [
-        # ISO format: YYYY-MM-DD
-        r'\b(\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2})\b',
+        # Standard dateparser approach (fixed receipt layouts skip it, see fast_parse_date)
+        try:
+            parsed_date = fast_parse_date(normalized) or dateparser_parse_date(normalized, today)
+            if parsed_date:
+                # Double-check the year is in valid range
+                if is_valid_date(parsed_date, today):
+                    return parsed_date
+                else:
+                    logging.warning(f"Dateparser returned invalid year {parsed_date.year} for '{date_str}'")
+        except Exception as e:
+            logging.debug("Dateparser error for '%s': %s", date_str, e)
 
-        # US/UK format: MM/DD/YYYY or DD/MM/YYYY
-        r'\b(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\b',
+    except Exception as e:
+        logging.debug("Failed to parse date string '%s': %s", date_str, e)
+    return None
 
-        # Written format: Month DD, YYYY
-        r'\b((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?[,\s]+\d{2,4})\b',
 
-        # Short format: DD-MMM-YY or DD-MMM-YYYY (e.g., 20-May-18)
-        r'\b(\d{1,2}[/\-\s](?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[/\-\s]\d{2,4})\b',
+def parse_date(text: str) -> Optional[date]:
+    """
+    Enhanced date extraction from receipt text using multiple strategies.
 
-        # Format with time: DD-Mon-YY HH:MM (e.g., 20-May-18 22:55)
-        r'\b(\d{1,2}[/\-\s](?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[/\-\s]\d{2,4}[\s]+\d{1,2}:\d{2}(?::\d{2})?)\b',
+    Strategies (in order of priority):
+    1. Context-aware extraction (looking for date labels)
+    2. Position-based heuristics (dates near the top of receipt)
+    3. spaCy NER for DATE entities
+    4. Comprehensive regex pattern matching
+    5. Fallback to today's date if all else fails
 
-        # Numeric only: DDMMYYYY or MMDDYYYY (common in some receipts)
-        r'\b(\d{2}(?:0[1-9]|1[0-2])(?:19|20)\d{2})\b',  # DDMMYYYY
-        r'\b((?:0[1-9]|1[0-2])\d{2}(?:19|20)\d{2})\b',  # MMDDYYYY
+    Args:
+        text: OCR extracted text from receipt
 
-        # Common receipt formats with just day and month (assume current year)
-        r'\b(\d{1,2}[/\-\.]\d{1,2})\b',  # DD/MM or MM/DD
+    Returns:
+        Parsed date object or None if no valid date found
+    """
+    # Define valid year range (to prevent unrealistic dates like year 2220)
+    today = date.today()
+    min_valid_year = today.year - 20  # Allow receipts from up to 20 years ago
+    max_valid_year = today.year + 1   # Allow receipts dated slightly in the future (for flexibility)
 
-        # Formats with just month and year
-        r'\b((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?[/\-\s]+\d{2,4})\b',  # MMM/YYYY
-        r'\b(\d{1,2}[/\-\s]+\d{4})\b',  # MM/YYYY
+    # Log the valid year range for debugging
+    logging.debug("Valid year range for date extraction: %s to %s", min_valid_year, max_valid_year)
 
-        # Nepali date formats (BS)
-        r'\b(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{4}\s*(?:BS|B\.S\.|बि\.स\.|बि\.सं\.|बिसं))\b',  # DD/MM/YYYY BS
-        r'\b((?:BS|B\.S\.|बि\.स\.|बि\.सं\.|बिसं)\s*\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{4})\b',  # BS DD/MM/YYYY
+    # Split text into lines for position-based analysis
+    lines = text.split('\n')
 
-        # Receipt number that might be mistaken for a date (often has format like YYYYMMDD)
-        r'\b(?:receipt|invoice|bill|order|transaction)(?:\s+|\s*[:#]\s*)(\d{8})\b',  # Receipt #20230501
+    # STRATEGY 1: Context-aware extraction - Look for date labels (see DATE_CONTEXT_RE)
+    for context_match in DATE_CONTEXT_RE.finditer(text):
+        match = context_match.group(context_match.lastgroup)
+        parsed_date = parse_with_dateparser(match, today)
+        if parsed_date:
+            logging.info(f"Found date with context: {match} -> {parsed_date}")
+            return parsed_date
 
-        # Formats with day and month names
-        r'\b(\d{1,2}(?:st|nd|rd|th)?\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*)\b',  # 15th January
-    ]
+    # STRATEGY 2: Position-based heuristics - Check top portion of receipt
+    # Most receipts have the date in the first few lines
+    top_lines = ' '.join(lines[:min(10, len(lines))])
 
-    for pattern in comprehensive_patterns:
-        matches = re.findall(pattern, top_lines, re.IGNORECASE)
-        for match in matches:
-            parsed_date = parse_with_dateparser(match)
+    # Common date formats in receipts (see COMPREHENSIVE_DATE_PATTERNS)
+    for pattern in COMPREHENSIVE_DATE_PATTERNS:
+        for m in pattern.finditer(top_lines):
+            match = m.group(1)
+            parsed_date = parse_with_dateparser(match, today)
             if parsed_date:
                 logging.info(f"Found date in top portion: {match} -> {parsed_date}")
                 return parsed_date
 
-    # STRATEGY 3: spaCy NER to find DATE entities
-    doc = nlp(text)
-    date_entities = [ent.text for ent in doc.ents if ent.label_ == "DATE"]
+    # STRATEGY 3: spaCy NER to find DATE entities (opt-in, see USE_SPACY_NER)
+    date_entities = [ent.text for ent in get_doc(text).ents if ent.label_ == "DATE"] if USE_SPACY_NER else []
 
     # Try to parse each date entity with dateparser
     for date_text in date_entities:
-        parsed_date = parse_with_dateparser(date_text)
+        parsed_date = parse_with_dateparser(date_text, today)
         if parsed_date:
             logging.info(f"Found date with spaCy NER: {date_text} -> {parsed_date}")
             return parsed_date
 
     # STRATEGY 4: Full document regex search (if we haven't found anything yet)
-    for pattern in comprehensive_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
-            parsed_date = parse_with_dateparser(match)
+    for pattern in COMPREHENSIVE_DATE_PATTERNS:
+        for m in pattern.finditer(text):
+            match = m.group(1)
+            parsed_date = parse_with_dateparser(match, today)
             if parsed_date:
                 logging.info(f"Found date with full text regex: {match} -> {parsed_date}")
                 return parsed_date
 
     # STRATEGY 5: Look for standalone day, month, year and try to combine them
     # This is a last resort for badly formatted or OCR-mangled dates
-    day_pattern = r'\b(?:day|date)[:\s]+(\d{1,2})\b'
-    month_pattern = r'\b(?:month|mon)[:\s]+(\d{1,2}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*)\b'
-    year_pattern = r'\b(?:year|yr)[:\s]+(\d{2,4})\b'
-
-    day_match = re.search(day_pattern, text.lower())
-    month_match = re.search(month_pattern, text.lower())
-    year_match = re.search(year_pattern, text.lower())
+    text_lower = text.lower()
+    day_match = DATE_PART_DAY_RE.search(text_lower)
+    month_match = DATE_PART_MONTH_RE.search(text_lower)
+    year_match = DATE_PART_YEAR_RE.search(text_lower)
 
     if day_match and month_match and year_match:
         date_str = f"{day_match.group(1)} {month_match.group(1)} {year_match.group(1)}"
-        parsed_date = parse_with_dateparser(date_str)
+        parsed_date = parse_with_dateparser(date_str, today)
         if parsed_date:
             logging.info(f"Constructed date from parts: {date_str} -> {parsed_date}")
             return parsed_date
@@ -403,54 +867,55 @@ def parse_date(text: str) -> Optional[date]:
     logging.warning("No valid date found in receipt text")
     return None
 
-def enhanced_amount_extraction(text: str) -> Tuple[Optional[Decimal], float]:
+def lower_preserving_offsets(text: str) -> str:
+    """
+    text.lower(), but always the same length as text so offsets found in one
+    can index the other. Characters whose lowercase form is longer (e.g. 'İ')
+    are left as they are.
+    """
+    text_lower = text.lower()
+    if len(text_lower) == len(text):
+        return text_lower
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+@cache_extraction
+def enhanced_amount_extraction(text: str, doc=None) -> Tuple[Optional[Decimal], float]:
     """
     Enhanced amount extraction with confidence scoring.
 
     Args:
         text: OCR extracted text from receipt
+        doc: spaCy Doc for text, if already computed (defaults to get_doc(text))
 
     Returns:
         Tuple of (extracted amount or None, confidence score)
     """
+    # Checked once so the f-string debug messages below (including the raw text
+    # dump and candidate lists) are only built when DEBUG logging is enabled
+    debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+
     # --- Start Added Debug Logging ---
-    logging.debug("--- enhanced_amount_extraction --- ")
-    logging.debug(f"Raw OCR Text Input:\n{text}")
+    if debug_enabled:
+        logging.debug("--- enhanced_amount_extraction --- ")
+        logging.debug(f"Raw OCR Text Input:\n{text}")
     # --- End Added Debug Logging ---
 
-    # Process with spaCy
-    doc = nlp(text)
-
     # Will store (amount, confidence, method, original_text) tuples
     amount_candidates = []
 
-    # STRATEGY 0: Look specifically for "Total:" or "Total :" patterns first
+    # STRATEGY 0: Look specifically for "Total:" or "Total :" patterns first (see TOTAL_PATTERNS)
     # This is a more targeted approach for the final total amount
-    total_patterns = [
-        # More specific patterns first (with word boundaries and case insensitive)
-        # Added optional currency symbol like $ (with optional spaces) before the amount, ignore trailing comma
-        r'(?i)Total\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?'
-        r'(?i)Total\s*Amount\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?'
-        r'(?i)Grand\s*Total\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?'
-        r'(?i)Amount\s*Due\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?'
-        r'(?i)Net\s*Amount\s*:\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?'
-        # Additional patterns for different formats
-        r'(?i)Total\s*[^:]*?[: ]\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?'
-        r'(?i)(?:^|\n)Total\s*(?:Rs\.?|NPR)?\s*\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?'
-        # Look for lines that just have "Total" and a number
-        r'(?i)(?:^|\n)\s*Total\s*[^:\n]*?\$?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?),?'
-    ]
-
-    for pattern in total_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for amount_str in matches:
+    for pattern in TOTAL_PATTERNS:
+        for m in pattern.finditer(text):
+            amount_str = m.group(1)
             try:
                 # Remove commas before converting
                 clean_amount = amount_str.replace(',', '')
                 amount = Decimal(clean_amount)
 
                 # Skip unrealistically small or large amounts
-                if amount < Decimal('1.0') or amount > Decimal('1000000'):
+                if amount < MIN_AMOUNT or amount > MAX_AMOUNT:
                     continue
 
                 # High confidence for explicit total matches
@@ -458,32 +923,51 @@ def enhanced_amount_extraction(text: str) -> Tuple[Optional[Decimal], float]:
                 confidence = 1.5
 
                 amount_candidates.append((amount, confidence, "explicit_total", amount_str))
-                logging.debug(f"Explicit TOTAL match: {amount} from '{amount_str}' (confidence: {confidence:.2f})")
+                if debug_enabled:
+                    logging.debug(f"Explicit TOTAL match: {amount} from '{amount_str}' (confidence: {confidence:.2f})")
 
             except (InvalidOperation, ValueError):
                 continue
 
-    # STRATEGY 1: Look for MONEY entities with spaCy NER
-    for ent in doc.ents:
+    # An explicit total always beats the other strategies' candidates, so return
+    # the largest one right away instead of running them (including spaCy NER)
+    if amount_candidates:
+        best_candidate = max(amount_candidates, key=lambda c: c[0])
+        logging.info(f"Selected best explicit total candidate: {best_candidate[0]} from '{best_candidate[3]}' "
+                    f"(confidence: {best_candidate[1]:.2f}, method: {best_candidate[2]})")
+        logging.debug("--- end enhanced_amount_extraction ---")
+        # Explicit totals score above 1.0 internally; cap the reported confidence at 1.0
+        return best_candidate[0], min(best_candidate[1], 1.0)
+
+    if USE_SPACY_NER:
+        entities = (doc if doc is not None else get_doc(text)).ents
+    else:
+        entities = ()
+
+    # Lowercase once; entity context windows below are sliced from this using
+    # offsets into text, so it must keep text's length
+    text_lower = lower_preserving_offsets(text)
+
+    # STRATEGY 1: Look for MONEY entities with spaCy NER (opt-in, see USE_SPACY_NER)
+    for ent in entities:
         if ent.label_ == "MONEY":
             # Clean the text (remove currency symbols, etc.)
-            clean_text = re.sub(r'[^\d.,]', '', ent.text)
+            clean_text = NON_AMOUNT_CHARS_RE.sub('', ent.text)
             try:
                 # Remove commas before converting
                 amount = Decimal(clean_text.replace(',', ''))
 
                 # Skip unrealistically small or large amounts
-                if amount < Decimal('1.0') or amount > Decimal('1000000'):
+                if amount < MIN_AMOUNT or amount > MAX_AMOUNT:
                     continue
 
                 # Calculate confidence score
                 confidence = 0.5  # Base confidence for MONEY entities
 
                 # Context boost - check if near keywords like "total"
-                context = text[max(0, ent.start_char - 30):min(len(text), ent.end_char + 30)].lower()
-                total_keywords = ["total", "amount", "sum", "balance", "due", "grand", "payable"]
+                context = text_lower[max(0, ent.start_char - 30):ent.end_char + 30]
 
-                if any(keyword in context for keyword in total_keywords):
+                if TOTAL_KEYWORDS_RE.search(context):
                     confidence += 0.3
 
                     # Extra boost for "grand total" or "total amount"
@@ -501,85 +985,77 @@ def enhanced_amount_extraction(text: str) -> Tuple[Optional[Decimal], float]:
                     confidence += 0.1
 
                 amount_candidates.append((amount, confidence, "spacy_money", ent.text))
-                logging.debug(f"MONEY entity amount candidate: {amount} from '{ent.text}' (confidence: {confidence:.2f})")
+                if debug_enabled:
+                    logging.debug(f"MONEY entity amount candidate: {amount} from '{ent.text}' (confidence: {confidence:.2f})")
 
             except (InvalidOperation, ValueError):
                 continue
 
-    # STRATEGY 2: Look for CARDINAL entities near total keywords
-    total_keywords = ["total", "amount", "sum", "balance", "due", "grand", "payable"]
-    # Keywords indicating the number is likely NOT an amount
-    ignore_keywords = ["table", "order", "item", "server", "guest", "gst", "vat", "reg", "ac", "check", "chk", "inv", "rcpt", "tax id", "customer id"]
-    for ent in doc.ents:
-        if ent.label_ == "CARDINAL":
-            # Check context BEFORE the entity
-            pre_context = text[max(0, ent.start_char - 15):ent.start_char].lower()
-            if any(keyword in pre_context for keyword in ignore_keywords):
-                logging.debug(f"Skipping CARDINAL '{ent.text}' due to preceding ignore keyword in context: '{pre_context}'")
-                continue
-
-            # Check if entity is near a total keyword (context AFTER potentially included)
-            context = text[max(0, ent.start_char - 30):min(len(text), ent.end_char + 30)].lower()
-            if any(keyword in context for keyword in total_keywords):
-                clean_text = re.sub(r'[^\d.,]', '', ent.text)
-                try:
-                    amount = Decimal(clean_text.replace(',', ''))
-
-                    # Skip unrealistically small or large amounts
-                    if amount < Decimal('1.0') or amount > Decimal('1000000'):
-                        continue
-
-                    # Calculate confidence score
-                    confidence = 0.4  # Base confidence for CARDINAL entities
-
-                    # Context boost based on specific keywords
-                    if "grand total" in context:
-                        confidence += 0.3
-                    elif "total amount" in context:
-                        confidence += 0.25
-                    elif "total" in context:
-                        confidence += 0.2
+    # STRATEGY 2: Look for numbers near total keywords - CARDINAL entities with
+    # spaCy NER, otherwise every number outside a date (see NUMBER_OR_DATE_RE)
+    if USE_SPACY_NER:
+        number_spans = [(ent.start_char, ent.end_char, ent.text) for ent in entities if ent.label_ == "CARDINAL"]
+    else:
+        number_spans = [
+            (m.start('number'), m.end('number'), m.group('number'))
+            for m in NUMBER_OR_DATE_RE.finditer(text)
+            if m.group('number') is not None
+        ]
+    for start_char, end_char, number_text in number_spans:
+        # Check context BEFORE the number
+        pre_context = text_lower[max(0, start_char - 15):start_char]
+        if IGNORE_KEYWORDS_RE.search(pre_context):
+            if debug_enabled:
+                logging.debug(f"Skipping number '{number_text}' due to preceding ignore keyword in context: '{pre_context}'")
+            continue
 
-                    # Position boost
-                    position_ratio = ent.start_char / len(text)
-                    if position_ratio > 0.7:  # In last 30% of text
-                        confidence += 0.1
+        # Check if number is near a total keyword (context AFTER potentially included)
+        context = text_lower[max(0, start_char - 30):end_char + 30]
+        if TOTAL_KEYWORDS_RE.search(context):
+            clean_text = NON_AMOUNT_CHARS_RE.sub('', number_text)
+            try:
+                amount = Decimal(clean_text.replace(',', ''))
 
-                    # Format boost
-                    if '.' in clean_text:
-                        confidence += 0.1
+                # Skip unrealistically small or large amounts
+                if amount < MIN_AMOUNT or amount > MAX_AMOUNT:
+                    continue
 
-                    amount_candidates.append((amount, confidence, "spacy_cardinal", ent.text))
-                    logging.debug(f"CARDINAL entity amount candidate: {amount} from '{ent.text}' (confidence: {confidence:.2f})")
+                # Calculate confidence score
+                confidence = 0.4  # Base confidence for numbers near total keywords
 
-                except (InvalidOperation, ValueError):
-                    continue
+                # Context boost based on specific keywords
+                if "grand total" in context:
+                    confidence += 0.3
+                elif "total amount" in context:
+                    confidence += 0.25
+                elif "total" in context:
+                    confidence += 0.2
 
-    # STRATEGY 3: Regex patterns for common amount formats
-    # Look for patterns like "Rs. 1,234.56", "Total: 1234.56", etc.
-    patterns = [
-        # Pattern with currency and context
-        (r'(?:total|amount|sum|balance|due|grand total).*?(?:Rs\.?|NPR)\s*[: ]?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)', 0.6),
+                # Position boost
+                position_ratio = start_char / len(text)
+                if position_ratio > 0.7:  # In last 30% of text
+                    confidence += 0.1
 
-        # Pattern with just currency
-        (r'(?:Rs\.?|NPR)\s*[: ]?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)', 0.4),
+                # Format boost
+                if '.' in clean_text:
+                    confidence += 0.1
 
-        # Pattern with total keyword
-        (r'(?:total|amount|sum|balance|due|grand total)\s*[: ]?\s*(\d{1,3}(?:,\d{3})*(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)', 0.5),
+                amount_candidates.append((amount, confidence, "number_context", number_text))
+                if debug_enabled:
+                    logging.debug(f"Number near total keyword amount candidate: {amount} from '{number_text}' (confidence: {confidence:.2f})")
 
-        # Fallback pattern for any decimal number
-        (r'(\d{1,3}(?:,\d{3})*\.\d{2})', 0.2)
-    ]
+            except (InvalidOperation, ValueError):
+                continue
 
-    for pattern, base_confidence in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for amount_str in matches:
+    # STRATEGY 3: Regex patterns for common amount formats (see AMOUNT_PATTERNS)
+    for pattern, base_confidence in AMOUNT_PATTERNS:
+        for amount_str in pattern.findall(text):
             try:
                 # Remove commas before converting
                 amount_decimal = Decimal(amount_str.replace(',', ''))
 
                 # Skip unrealistically small or large amounts
-                if amount_decimal < Decimal('1.0') or amount_decimal > Decimal('1000000'):
+                if amount_decimal < MIN_AMOUNT or amount_decimal > MAX_AMOUNT:
                     continue
 
                 # Calculate confidence
@@ -590,47 +1066,34 @@ def enhanced_amount_extraction(text: str) -> Tuple[Optional[Decimal], float]:
                     confidence += 0.1
 
                 # Value boost - higher amounts more likely to be totals
-                if amount_decimal > Decimal('100'):
+                if amount_decimal > LARGE_AMOUNT:
                     confidence += 0.05
 
                 amount_candidates.append((amount_decimal, confidence, "regex", amount_str))
-                logging.debug(f"Regex amount candidate: {amount_decimal} from '{amount_str}' (confidence: {confidence:.2f})")
+                if debug_enabled:
+                    logging.debug(f"Regex amount candidate: {amount_decimal} from '{amount_str}' (confidence: {confidence:.2f})")
 
             except InvalidOperation:
                 continue
 
     # Return the amount with highest confidence, if any
     if amount_candidates:
-        logging.debug(f"Found {len(amount_candidates)} amount candidates before selection:")
-        for cand in amount_candidates:
-            logging.debug(f"  - Amount: {cand[0]}, Confidence: {cand[1]:.2f}, Method: {cand[2]}, Original: '{cand[3]}'")
-
-        # --- Revised Selection Logic --- 
-        # 1. Prioritize candidates found by the 'explicit_total' method
-        explicit_total_candidates = [c for c in amount_candidates if c[2] == "explicit_total"]
-
-        if explicit_total_candidates:
-            # If explicit totals found, choose the largest one among them
-            explicit_total_candidates.sort(key=lambda x: x[0], reverse=True) # Sort by amount descending
-            best_candidate = explicit_total_candidates[0]
-            logging.info(f"Selected best explicit total candidate: {best_candidate[0]} from '{best_candidate[3]}' "
-                        f"(confidence: {best_candidate[1]:.2f}, method: {best_candidate[2]})")
-        else:
-            # 2. If no explicit totals, sort all candidates by confidence, then amount, and pick the best
-            logging.info("No explicit total candidates found, sorting all candidates by confidence/amount.")
-            amount_candidates.sort(key=lambda x: (x[1], x[0]), reverse=True) # Sort by confidence, then amount
-            best_candidate = amount_candidates[0]
-            logging.info(f"Selected best overall candidate (no explicit total): {best_candidate[0]} from '{best_candidate[3]}' "
-                        f"(confidence: {best_candidate[1]:.2f}, method: {best_candidate[2]})")
-
+        if debug_enabled:
+            logging.debug(f"Found {len(amount_candidates)} amount candidates before selection:")
+            for cand in amount_candidates:
+                logging.debug(f"  - Amount: {cand[0]}, Confidence: {cand[1]:.2f}, Method: {cand[2]}, Original: '{cand[3]}'")
+
+        # --- Revised Selection Logic ---
+        # Explicit totals returned early above, so pick the candidate with the
+        # highest confidence, then amount, in a single pass
+        logging.info("No explicit total candidates found, selecting by confidence/amount.")
+        best_candidate = max(amount_candidates, key=lambda c: (c[1], c[0]))
+        logging.info(f"Selected best overall candidate (no explicit total): {best_candidate[0]} from '{best_candidate[3]}' "
+                    f"(confidence: {best_candidate[1]:.2f}, method: {best_candidate[2]})")
         # --- End Revised Selection Logic ---
 
-        # Log all candidates for debugging after sorting (optional, can be removed if logs are too verbose)
-        if len(amount_candidates) > 1:
-            logging.debug(f"All amount candidates (sorted by final criteria): {[(str(a[0]), a[1], a[2]) for a in amount_candidates]}")
-
         logging.debug("--- end enhanced_amount_extraction ---")
-        return best_candidate[0], best_candidate[1]
+        return best_candidate[0], min(best_candidate[1], 1.0)
 
     logging.warning("No valid amount candidates found")
     logging.debug("--- end enhanced_amount_extraction ---") # Add debug end here too
@@ -655,112 +1118,140 @@ def parse_amount(text: str) -> Optional[Decimal]:
 
     return None
 
-def enhanced_merchant_extraction(text: str) -> Tuple[Optional[str], float]:
+
+def clean_merchant_name(name: str) -> str:
+    """Collapse whitespace runs to single spaces and drop punctuation, keeping word characters."""
+    # str.split() splits on the same whitespace as \s+, and strips the ends
+    return ' '.join(name.split()).translate(MERCHANT_NAME_CHAR_TABLE)
+
+
+def normalize_merchant_name(name: str) -> Optional[str]:
+    """
+    Clean a merchant candidate into the name that is returned to callers.
+
+    Returns None for names that are too short or numeric-only after cleaning.
+    """
+    # Clean the merchant name
+    cleaned_name = clean_merchant_name(name)
+
+    # Skip if cleaning resulted in an empty string or very short name
+    if not cleaned_name or len(cleaned_name) < 3:
+        return None
+
+    # Normalize capitalization
+    # If all caps, convert to title case for better readability
+    if cleaned_name.isupper():
+        normalized_name = ' '.join(word.capitalize() for word in cleaned_name.split())
+    else:
+        normalized_name = cleaned_name
+
+    # Remove common prefixes/suffixes that aren't part of the merchant name
+    for prefix in MERCHANT_NAME_PREFIXES:
+        if normalized_name.lower().startswith(prefix):
+            normalized_name = normalized_name[len(prefix):]
+
+    # Filter out unlikely merchant names (numeric-only, etc.)
+    if NUMERIC_NAME_RE.match(normalized_name):
+        return None
+
+    return normalized_name
+
+
+def capitalization_boost(name: str) -> float:
+    """Confidence boost for merchant candidates in ALL CAPS (0.1) or Title Case (0.05)."""
+    if name.isupper():
+        return 0.1
+    if name.istitle():
+        return 0.05
+    return 0.0
+
+
+def merchant_line_features(line: str, line_lower: str) -> MerchantLineFeatures:
+    """Classify a receipt line for the merchant heuristics (line_lower is line.lower().strip())."""
+    clean_line = line.strip()
+    return MerchantLineFeatures(
+        text=clean_line,
+        text_lower=line_lower,
+        starts_with_digit=bool(LEADING_DIGIT_RE.match(clean_line)),
+        is_upper=clean_line.isupper(),
+        capitalization_boost=capitalization_boost(clean_line),
+    )
+
+
+def select_merchant_candidate(merchant_candidates: List[Tuple[str, float, str]]) -> Tuple[Optional[str], float]:
+    """Normalize (merchant_name, confidence, method) candidates and return the best (name, confidence)."""
+    # Post-processing: Clean and normalize merchant names, keeping only the best
+    # candidate per name. The index of the candidate that set each maximum is
+    # kept so ties still go to the earliest candidate.
+    best_by_name: Dict[str, Tuple[float, int, str]] = {}
+    for index, (merchant_name, confidence, method) in enumerate(merchant_candidates):
+        normalized_name = normalize_merchant_name(merchant_name)
+        if normalized_name is None:
+            continue
+
+        # Keep the highest-confidence candidate for each name
+        best = best_by_name.get(normalized_name)
+        if best is None or confidence > best[0]:
+            best_by_name[normalized_name] = (confidence, index, method)
+
+    # Return the merchant with highest confidence, if any
+    if best_by_name:
+        best_name, (best_confidence, _, best_method) = max(
+            best_by_name.items(), key=lambda item: (item[1][0], -item[1][1])
+        )
+        logging.info(f"Selected best merchant candidate: {best_name} "
+                    f"(confidence: {best_confidence:.2f}, method: {best_method})")
+
+        # Log all candidates for debugging
+        if len(best_by_name) > 1 and logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"All merchant candidates: {[(m, c[0], c[2]) for m, c in best_by_name.items()]}")
+
+        return best_name, best_confidence
+
+    logging.warning("No valid merchant candidates found")
+    return None, 0.0
+
+
+@cache_extraction
+def enhanced_merchant_extraction(text: str, doc=None) -> Tuple[Optional[str], float]:
     """
     Enhanced merchant name extraction with confidence scoring.
 
     Args:
         text: OCR extracted text from receipt
+        doc: spaCy Doc for text, if already computed (defaults to get_doc(text))
 
     Returns:
         Tuple of (extracted merchant name or None, confidence score)
     """
-    # Process with spaCy
-    doc = nlp(text)
-
     # Will store (merchant_name, confidence, method) tuples
     merchant_candidates = []
 
-    # Clean and normalize text for better matching
-    def clean_merchant_name(name: str) -> str:
-        """Clean and normalize merchant name"""
-        # Remove extra whitespace
-        cleaned = re.sub(r'\s+', ' ', name.strip())
-        # Remove special characters but keep spaces and alphanumerics
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        return cleaned
-
-    # STRATEGY 1: Known merchants list with fuzzy matching
-    # Expanded list of known merchants in Nepal
-    known_merchants = [
-        # Supermarkets and Department Stores
-        "Bhatbhateni", "Big Mart", "Saleways", "Salesberry", "CG Mart", "Bluebird",
-        "Namaste Supermarket", "Thulo Supermarket", "Aagan", "Bigmart", "Bhat Bhateni",
-        "Bhatbhateni Supermarket", "Bhatbhateni Super Store", "Saleways Supermarket",
-        "Salesberry Supermarket", "Nimbus", "Uchit Bazar", "Uchit Bazaar", "Uchit Bajar",
-
-        # Food and Restaurants
-        "KFC", "Pizza Hut", "Himalayan Java", "Bakery Cafe", "Roadhouse", "Momo King",
-        "Bajeko Sekuwa", "Dalle Restaurant", "Tamarind", "Bota", "Trisara", "Gokarna House",
-        "Gokarna Resort", "Hyatt Regency", "Soaltee Hotel", "Soaltee Crowne Plaza", "Durbarmarg",
-        "Durbar Marg", "Thamel", "Bawarchi", "Bawarchi Restro", "Chicken Station", "Nanglo",
-        "Nanglo Bakery Cafe", "Nanglo West", "Cafe Soma", "Cafe De Patan", "Cafe De Kathmandu",
-        "Kathmandu Guest House", "Reef Restaurant", "Reef", "Reef Kathmandu", "Reef Thamel",
-        "Reef Durbar Marg", "Reef Durbarmarg", "Reef Jhamsikhel", "Reef Jhamel", "Reef Patan",
-        "Reef Lalitpur", "Reef Bhaktapur", "Reef Pokhara", "Reef Chitwan", "Reef Lumbini",
-
-        # Online Marketplaces
-        "Daraz", "Foodmandu", "Sastodeal", "Hamrobazar", "Ageno", "Pathao", "Pathao Food",
-        "Foodmandu", "Bhojdeals", "Bhoj Deals", "Bhoj", "Bhoj Food", "Bhoj Food Delivery",
-
-        # Malls and Shopping Centers
-        "Labim Mall", "Civil Mall", "Miniso", "City Centre", "City Center", "Kathmandu Mall",
-        "KL Tower", "KL Mall", "Kathmandu Fun Park", "Fun Park", "Chhaya Center", "Chhaya Centre",
-        "Rising Mall", "Eyeplex Mall", "Eyeplex", "Eyeplex Cinema", "QFX", "QFX Cinemas",
-        "QFX Civil Mall", "QFX Labim Mall", "QFX Chhaya Center", "QFX Bhaktapur", "QFX Patan",
-
-        # Electronics and Appliances
-        "CG Digital", "CG Electronics", "Nagmani", "Nagmani Electronics", "Pashupati Electronics",
-        "Pashupati Traders", "Nepa Electronics", "Nepa Hima Electronics", "Nepa Hima",
-        "Nepa Hima Trade Link", "Nepa Hima Trade", "Nepa Hima Trade Link Pvt Ltd",
-        "Samsung Plaza", "Samsung", "Samsung Store", "Samsung Showroom", "Samsung Service Center",
-        "LG Showroom", "LG", "LG Store", "LG Service Center", "Sony Center", "Sony", "Sony Store",
-
-        # Pharmacies and Healthcare
-        "Pharmacy", "Medical", "Hospital", "Clinic", "Diagnostic", "Diagnostics", "Lab",
-        "Laboratory", "Laboratories", "Health", "Healthcare", "Health Care", "Health Center",
-        "Health Centre", "Health Post", "Healthpost", "Dispensary", "Dispensaries", "Chemist",
-        "Chemists", "Druggist", "Druggists", "Drugstore", "Drug Store", "Drug Stores",
-
-        # Clothing and Fashion
-        "Saugat Garments", "Saugat", "Saugat Fashion", "Saugat Fashion House", "Saugat Fashion Store",
-        "Curves", "Curves Nepal", "Curves Clothing", "Curves Fashion", "Curves Fashion Store",
-        "Juju Wears", "Juju", "Juju Fashion", "Juju Fashion Store", "Juju Fashion House",
-        "Urban Girl", "Urban", "Urban Fashion", "Urban Fashion Store", "Urban Fashion House",
-
-        # Convenience Stores
-        "Bhatbhateni Express", "Bhatbhateni Mini", "Bhat Bhateni Express", "Bhat Bhateni Mini",
-        "Bhatbhateni Convenience", "Bhat Bhateni Convenience", "Bhatbhateni Minimart",
-        "Bhat Bhateni Minimart", "Bhatbhateni Mart", "Bhat Bhateni Mart", "Bhatbhateni Store",
-        "Bhat Bhateni Store", "Bhatbhateni Super", "Bhat Bhateni Super", "Bhatbhateni Super Store",
-        "Bhat Bhateni Super Store", "Bhatbhateni Superstore", "Bhat Bhateni Superstore",
-
-        # Fuel Stations
-        "Nepal Oil", "Nepal Oil Corporation", "NOC", "Petrol Pump", "Petrol", "Diesel", "Fuel",
-        "Fuel Station", "Fuel Stations", "Gas Station", "Gas Stations", "Filling Station",
-        "Filling Stations", "Petrol Station", "Petrol Stations", "Diesel Station", "Diesel Stations"
-    ]
-
+    # STRATEGY 1: Known merchants list (see KNOWN_MERCHANTS)
     # Check for known merchants in the text (case-insensitive)
     lines = text.split('\n')
-    text_lower = text.lower()
+    text_lower = lower_preserving_offsets(text)
 
-    for merchant in known_merchants:
-        merchant_lower = merchant.lower()
+    # Lowercased views of the receipt, built once from text_lower and shared by
+    # all strategies below (lines_lower[i] is lines[i] lowercased, the same
+    # length, so offsets found in one slice the other)
+    lines_lower = text_lower.split('\n')
+    header_lower = ' '.join(lines_lower[:5])
+    stripped_lines_lower = [line_lower.strip() for line_lower in lines_lower]
+    header_lines_lower = lines_lower[:5]
 
+    for merchant, merchant_lower in KNOWN_MERCHANTS_LOWER:
         if merchant_lower in text_lower:
             # Calculate confidence based on position and exact match
             confidence = 0.7  # Base confidence for known merchants
 
             # Check if it appears in the first few lines (higher confidence)
-            first_few_lines = ' '.join(lines[:5]).lower()
-            if merchant_lower in first_few_lines:
+            if merchant_lower in header_lower:
                 confidence += 0.2
 
             # Check for exact match vs partial match
             # For example, "Bhatbhateni Supermarket" contains "Bhatbhateni" but isn't an exact match
-            for line in lines:
-                line_lower = line.strip().lower()
+            for line_lower in stripped_lines_lower:
                 if line_lower == merchant_lower:
                     confidence += 0.1  # Exact line match
                     break
@@ -774,16 +1265,14 @@ def enhanced_merchant_extraction(text: str) -> Tuple[Optional[str], float]:
             merchant_name = merchant  # Default to the known merchant name
 
             # Look for the merchant name in the first few lines with original capitalization
-            for line in lines[:5]:
-                if merchant_lower in line.lower():
+            for line, line_lower in zip(lines, header_lines_lower):
+                if merchant_lower in line_lower:
                     # Extract the part of the line that contains the merchant name
-                    start_idx = line.lower().find(merchant_lower)
+                    start_idx = line_lower.find(merchant_lower)
                     if start_idx != -1:
                         # Try to extract the full merchant name (may include "Supermarket", "Restaurant", etc.)
                         # Look for the end of the word or the end of the line
-                        end_idx = start_idx + len(merchant_lower)
-                        while end_idx < len(line) and (line[end_idx].isalnum() or line[end_idx].isspace()):
-                            end_idx += 1
+                        end_idx = MERCHANT_NAME_TAIL_RE.match(line, start_idx + len(merchant_lower)).end()
 
                         # Extract the merchant name with proper capitalization
                         extracted_name = line[start_idx:end_idx].strip()
@@ -792,45 +1281,65 @@ def enhanced_merchant_extraction(text: str) -> Tuple[Optional[str], float]:
                             break
 
             merchant_candidates.append((merchant_name, confidence, "known_merchant"))
-            logging.debug(f"Known merchant candidate: {merchant_name} (confidence: {confidence:.2f})")
+            logging.debug("Known merchant candidate: %s (confidence: %.2f)", merchant_name, confidence)
 
     # STRATEGY 2: Fuzzy matching for known merchants
     # This helps catch OCR errors like "Bhatbhateni" -> "Bhatbhatemi" or "Bhat Bhateni"
     if not merchant_candidates:
-        # Simple fuzzy matching - check if known merchant is a substring with some tolerance
-        for merchant in known_merchants:
-            merchant_lower = merchant.lower()
+        # Check only first few lines, skipping very short ones; each line is
+        # stripped, split into words and reduced to its character set once
+        # rather than once per merchant
+        fuzzy_lines = [
+            (line.strip(), line_lower, line_lower.split(), frozenset(line_lower))
+            for line, line_lower in zip(lines, header_lines_lower)
+            if len(line_lower) >= 3
+        ]
 
+        # Simple fuzzy matching - check if known merchant is a substring with some tolerance
+        for merchant_lower, merchant_words in KNOWN_MERCHANT_WORDS:
             # Check for partial matches with at least 70% of characters matching
-            for line in lines[:5]:  # Check only first few lines
-                line_lower = line.lower()
-
-                # Skip very short lines
-                if len(line_lower) < 3:
-                    continue
-
+            for clean_line, line_lower, line_words, line_chars in fuzzy_lines:
                 # Check if merchant name is a significant part of the line
                 # or if line is a significant part of the merchant name
                 if (merchant_lower in line_lower or
-                    any(word in line_lower for word in merchant_lower.split()) or
-                    any(word in merchant_lower for word in line_lower.split())):
+                    any(word in line_lower for word in merchant_words) or
+                    any(word in merchant_lower for word in line_words)):
 
-                    # Calculate similarity score (simple character overlap)
-                    common_chars = sum(1 for c in merchant_lower if c in line_lower)
+                    # Calculate similarity score (simple character overlap); set
+                    # lookups keep this linear in the merchant name's length
+                    common_chars = sum(1 for c in merchant_lower if c in line_chars)
                     similarity = common_chars / max(len(merchant_lower), len(line_lower))
 
                     if similarity >= 0.7:  # At least 70% similar
                         confidence = 0.5 + (similarity - 0.7) * 2  # Scale from 0.5 to 0.9
 
-                        merchant_candidates.append((line.strip(), confidence, "fuzzy_match"))
-                        logging.debug(f"Fuzzy match merchant candidate: {line.strip()} (confidence: {confidence:.2f})")
+                        merchant_candidates.append((clean_line, confidence, "fuzzy_match"))
+                        logging.debug("Fuzzy match merchant candidate: %s (confidence: %.2f)", clean_line, confidence)
+
+    # Known merchants score up to 1.0 and STRATEGY 3-6 at most 0.9, so a known
+    # merchant at KNOWN_MERCHANT_SHORT_CIRCUIT_CONFIDENCE or above that survives
+    # post-processing always wins; skip the remaining strategies in that case
+    known_merchant_found = any(
+        confidence >= KNOWN_MERCHANT_SHORT_CIRCUIT_CONFIDENCE and normalize_merchant_name(merchant_name) is not None
+        for merchant_name, confidence, method in merchant_candidates
+        if method == "known_merchant"
+    )
+    if known_merchant_found:
+        logging.debug("Known merchant found with high confidence, skipping remaining strategies")
+        return select_merchant_candidate(merchant_candidates)
+
+    # Process with spaCy, only now that the strategies that need it will run
+    if doc is None:
+        doc = get_doc(text)
 
     # STRATEGY 3: Organization entities from NER
-    # Look for ORG entities in the first few sentences (likely to be the merchant)
+    # Look for ORG entities in the first few lines (likely to be the merchant).
+    # They come from the shared doc rather than a second spaCy pass over the
+    # header: the first five lines span the same character offsets in both.
     first_few_lines = ' '.join(lines[:5])
-    doc_first_lines = nlp(first_few_lines)
+    header_end = len(first_few_lines)
 
-    org_entities = [(ent.text, ent) for ent in doc_first_lines.ents if ent.label_ == "ORG"]
+    org_entities = [(ent.text, ent) for ent in doc.ents if ent.label_ == "ORG" and ent.end_char <= header_end]
     for org_text, entity in org_entities:
         # Skip very short organization names (likely false positives)
         if len(org_text.strip()) < 3:
@@ -851,37 +1360,35 @@ def enhanced_merchant_extraction(text: str) -> Tuple[Optional[str], float]:
             confidence -= 0.1
 
         # Capitalization boost (merchant names often ALL CAPS or Title Case)
-        if org_text.isupper():
-            confidence += 0.1
-        elif org_text.istitle():
-            confidence += 0.05
+        confidence += capitalization_boost(org_text)
 
         # Check if the entity contains common business keywords
-        business_keywords = ["ltd", "limited", "pvt", "private", "inc", "incorporated",
-                            "llc", "corp", "corporation", "co", "company", "enterprises",
-                            "industries", "group", "holdings", "store", "shop", "mart",
-                            "market", "supermarket", "restaurant", "cafe", "hotel"]
-
-        if any(keyword in org_text.lower() for keyword in business_keywords):
+        if ORG_BUSINESS_KEYWORDS_RE.search(org_text.lower()):
             confidence += 0.1
 
         merchant_candidates.append((org_text, confidence, "spacy_ner"))
-        logging.debug(f"NER merchant candidate: {org_text} (confidence: {confidence:.2f})")
+        logging.debug("NER merchant candidate: %s (confidence: %.2f)", org_text, confidence)
+
+    # Strategies 4-6 read each line's stripped text, leading digit and
+    # capitalization from one record per line (see MerchantLineFeatures),
+    # built on first use since they only look at a few lines
+    line_features: Dict[int, MerchantLineFeatures] = {}
+
+    def features_at(i: int) -> MerchantLineFeatures:
+        features = line_features.get(i)
+        if features is None:
+            features = line_features[i] = merchant_line_features(lines[i], stripped_lines_lower[i])
+        return features
 
     # STRATEGY 4: First non-empty line heuristic with improved filtering
     # Look for the first non-empty line that's not a date or amount
-    for i, line in enumerate(lines[:5]):  # Check only first few lines
-        clean_line = line.strip()
+    for i in range(min(len(lines), 5)):  # Check only first few lines
+        features = features_at(i)
+        clean_line = features.text
         if clean_line and len(clean_line) > 2:  # Avoid short/empty lines
             # Skip lines that start with numbers or contain total/date keywords
-            skip_keywords = ['total', 'date', 'receipt', 'invoice', 'bill', 'tel', 'phone',
-                            'address', 'customer', 'cashier', 'operator', 'terminal',
-                            'transaction', 'reference', 'ref', 'no', 'number', 'time',
-                            'payment', 'card', 'cash', 'credit', 'debit', 'tax', 'vat',
-                            'gst', 'subtotal', 'discount', 'item', 'description', 'qty',
-                            'quantity', 'price', 'amount', 'unit', 'rate', 'value']
-
-            if not re.match(r'^\d', clean_line) and not any(keyword in clean_line.lower() for keyword in skip_keywords):
+            clean_line_lower = features.text_lower
+            if not features.starts_with_digit and not FIRST_LINE_SKIP_KEYWORDS_RE.search(clean_line_lower):
                 # Calculate confidence based on position and characteristics
                 confidence = 0.3  # Base confidence for heuristic
 
@@ -894,33 +1401,27 @@ def enhanced_merchant_extraction(text: str) -> Tuple[Optional[str], float]:
                     confidence += 0.1
 
                 # Capitalization boost (merchant names often ALL CAPS or Title Case)
-                if clean_line.isupper():
-                    confidence += 0.1
-                elif clean_line.istitle():
-                    confidence += 0.05
+                confidence += features.capitalization_boost
 
                 # Length boost (merchant names are typically not too short or too long)
                 if 10 <= len(clean_line) <= 30:
                     confidence += 0.05
 
                 # Check for business keywords
-                business_keywords = ["store", "shop", "mart", "market", "supermarket",
-                                    "restaurant", "cafe", "hotel", "pharmacy", "medical",
-                                    "hospital", "clinic", "center", "centre", "mall"]
-
-                if any(keyword in clean_line.lower() for keyword in business_keywords):
+                if FIRST_LINE_BUSINESS_KEYWORDS_RE.search(clean_line_lower):
                     confidence += 0.1
 
                 merchant_candidates.append((clean_line, confidence, "first_line"))
-                logging.debug(f"First line merchant candidate: {clean_line} (confidence: {confidence:.2f})")
+                logging.debug("First line merchant candidate: %s (confidence: %.2f)", clean_line, confidence)
 
     # STRATEGY 5: Logo/header pattern recognition
     # Look for lines that are centered, all caps, or have special formatting
     for i, line in enumerate(lines[:3]):  # Check only first few lines
-        clean_line = line.strip()
+        features = features_at(i)
+        clean_line = features.text
         if clean_line and len(clean_line) > 2:  # Avoid short/empty lines
             # Skip lines that are likely not merchant names
-            if re.match(r'^\d', clean_line) or re.match(r'^tel', clean_line.lower()):
+            if features.starts_with_digit or features.text_lower.startswith('tel'):
                 continue
 
             # Check for centered text (common for headers)
@@ -930,10 +1431,10 @@ def enhanced_merchant_extraction(text: str) -> Tuple[Optional[str], float]:
                 is_centered = True
 
             # Check for all caps (common for headers)
-            is_all_caps = clean_line.isupper()
+            is_all_caps = features.is_upper
 
             # Check for special formatting (e.g., surrounded by asterisks, etc.)
-            has_special_format = bool(re.match(r'^[*#=_-]+.*[*#=_-]+$', line))
+            has_special_format = bool(HEADER_DECORATION_RE.match(line))
 
             if is_centered or is_all_caps or has_special_format:
                 confidence = 0.4  # Base confidence for header pattern
@@ -953,103 +1454,46 @@ def enhanced_merchant_extraction(text: str) -> Tuple[Optional[str], float]:
                     confidence += 0.05
 
                 merchant_candidates.append((clean_line, confidence, "header_pattern"))
-                logging.debug(f"Header pattern merchant candidate: {clean_line} (confidence: {confidence:.2f})")
+                logging.debug("Header pattern merchant candidate: %s (confidence: %.2f)", clean_line, confidence)
 
     # STRATEGY 6: Phone number and address correlation
-    # Look for phone numbers and addresses, then check the line above them
-    phone_patterns = [
-        r'\b(?:tel|telephone|phone|mobile|contact|call)(?::|.)?(?:\s+|$)(\+?\d[\d\s\-]+)',
-        r'\b(\+?977[\d\s\-]+)',  # Nepal country code
-        r'\b(01[\d\s\-]{6,})',   # Kathmandu landline
-        r'\b(9\d[\d\s\-]{7,})'   # Nepal mobile
-    ]
-
-    address_patterns = [
-        r'\b(?:address|location|branch|store)(?::|.)?(?:\s+|$)(.*?)(?:\n|$)',
-        r'\b(?:kathmandu|lalitpur|bhaktapur|pokhara|biratnagar|birgunj|dharan|butwal|nepalgunj|hetauda)',
-        r'(?i)(?:thamel|new road|durbar marg|kupondole|jhamsikhel|patan|lazimpat|maharajgunj|baluwatar)'
-    ]
-
+    # Look for phone numbers and addresses (see CONTACT_LINE_RE), then check the line above them
     # Find phone numbers and addresses
     contact_lines = []
 
     for i, line in enumerate(lines):
-        # Check for phone patterns
-        for pattern in phone_patterns:
-            if re.search(pattern, line, re.IGNORECASE):
-                contact_lines.append(i)
-                break
-
-        # Check for address patterns
-        for pattern in address_patterns:
-            if re.search(pattern, line, re.IGNORECASE):
-                contact_lines.append(i)
-                break
+        # Check for phone and address patterns in a single pass
+        if CONTACT_LINE_RE.search(line):
+            contact_lines.append(i)
 
     # Check lines above contact information for merchant names
     for i in contact_lines:
         if i > 0:  # Make sure there's a line above
-            candidate_line = lines[i-1].strip()
+            features = features_at(i-1)
+            candidate_line = features.text
             if candidate_line and len(candidate_line) > 2:
                 # Skip lines that are likely not merchant names
-                skip_keywords = ['total', 'date', 'receipt', 'invoice', 'bill']
-                if not re.match(r'^\d', candidate_line) and not any(keyword in candidate_line.lower() for keyword in skip_keywords):
+                if not features.starts_with_digit and not CONTACT_SKIP_KEYWORDS_RE.search(features.text_lower):
                     confidence = 0.35  # Base confidence for contact correlation
 
                     # Capitalization boost
-                    if candidate_line.isupper():
-                        confidence += 0.1
-                    elif candidate_line.istitle():
-                        confidence += 0.05
+                    confidence += features.capitalization_boost
 
                     merchant_candidates.append((candidate_line, confidence, "contact_correlation"))
-                    logging.debug(f"Contact correlation merchant candidate: {candidate_line} (confidence: {confidence:.2f})")
-
-    # Post-processing: Clean and normalize merchant names
-    processed_candidates = []
-    for merchant_name, confidence, method in merchant_candidates:
-        # Clean the merchant name
-        cleaned_name = clean_merchant_name(merchant_name)
+                    logging.debug("Contact correlation merchant candidate: %s (confidence: %.2f)", candidate_line, confidence)
 
-        # Skip if cleaning resulted in an empty string or very short name
-        if not cleaned_name or len(cleaned_name) < 3:
-            continue
-
-        # Normalize capitalization
-        # If all caps, convert to title case for better readability
-        if cleaned_name.isupper():
-            normalized_name = ' '.join(word.capitalize() for word in cleaned_name.split())
-        else:
-            normalized_name = cleaned_name
-
-        # Remove common prefixes/suffixes that aren't part of the merchant name
-        prefixes_to_remove = ['welcome to ', 'thank you for shopping at ', 'receipt from ']
-        for prefix in prefixes_to_remove:
-            if normalized_name.lower().startswith(prefix):
-                normalized_name = normalized_name[len(prefix):]
-
-        # Filter out unlikely merchant names (numeric-only, etc.)
-        if re.match(r'^\d+$', normalized_name):
-            continue  # Skip numeric-only names
-
-        # Add to processed candidates
-        processed_candidates.append((normalized_name, confidence, method))
+    return select_merchant_candidate(merchant_candidates)
 
-    # Return the merchant with highest confidence, if any
-    if processed_candidates:
-        processed_candidates.sort(key=lambda x: x[1], reverse=True)
-        best_candidate = processed_candidates[0]
-        logging.info(f"Selected best merchant candidate: {best_candidate[0]} "
-                    f"(confidence: {best_candidate[1]:.2f}, method: {best_candidate[2]})")
-
-        # Log all candidates for debugging
-        if len(processed_candidates) > 1:
-            logging.debug(f"All merchant candidates: {[(m[0], m[1], m[2]) for m in processed_candidates]}")
 
-        return best_candidate[0], best_candidate[1]
+def enhanced_merchant_extraction_batch(texts: List[str]) -> List[Tuple[Optional[str], float]]:
+    """
+    Runs enhanced_merchant_extraction over several texts, with one nlp.pipe
+    pass for all of them instead of one spaCy call per text.
 
-    logging.warning("No valid merchant candidates found")
-    return None, 0.0
+    Returns one (merchant_name, confidence) tuple per text, in the same order.
+    """
+    docs = get_nlp().pipe(texts, batch_size=SPACY_BATCH_SIZE)
+    return [enhanced_merchant_extraction(text, doc) for text, doc in zip(texts, docs)]
 
 
 def parse_merchant(text: str) -> Optional[str]:
@@ -1071,308 +1515,152 @@ def parse_merchant(text: str) -> Optional[str]:
     return None
 
 
-def enhanced_date_extraction(text: str) -> Tuple[Optional[date], float]:
+def score_date_candidate(match: str, parsed_date: date, today: date,
+                         confidence: float, method_boost: float = 0.0) -> float:
+    """
+    Add the format clarity, recency and method boosts shared by all date strategies.
+
+    Args:
+        match: Matched date text
+        parsed_date: The date parsed from match
+        today: Reference date for the recency adjustments
+        confidence: Strategy-specific confidence so far (context/position boosts)
+        method_boost: Boost for the extraction method
+
+    Returns:
+        Confidence score for the candidate
+    """
+    # Format clarity boost
+    if UNAMBIGUOUS_DATE_RE.search(match):
+        confidence += 0.2  # Unambiguous format
+    else:
+        confidence += 0.1  # Potentially ambiguous format
+
+    # Validation adjustments
+    days_old = (today - parsed_date).days
+    if 0 <= days_old <= 365:
+        confidence += 0.1  # Recent date
+    elif days_old > 5*365:
+        confidence -= 0.1  # Older date
+    elif days_old < 0 and days_old > -10:  # Allow slightly future dates (few days)
+        confidence -= 0.1  # Near future date
+    elif days_old < -10:
+        confidence -= 0.3  # Far future date
+
+    # Method boost
+    if method_boost:
+        confidence += method_boost
+    return confidence
+
+
+@cache_extraction
+def enhanced_date_extraction(text: str, doc=None) -> Tuple[Optional[date], float]:
     """
     Enhanced date extraction with confidence scoring.
 
     Args:
         text: OCR extracted text from receipt
+        doc: spaCy Doc for text, if already computed (defaults to get_doc(text))
 
     Returns:
         Tuple of (extracted date or None, confidence score)
     """
-    # Define valid year range - expanded to handle older receipts
-    current_year = datetime.now().year
-    min_valid_year = current_year - 20  # Allow receipts from up to 20 years ago
-    max_valid_year = current_year + 1   # Allow receipts dated slightly in the future
-
-    # Log the valid year range for debugging
-    logging.debug(f"Enhanced date extraction valid year range: {min_valid_year} to {max_valid_year}")
-
-    # Helper functions
-    def is_valid_date(d: date) -> bool:
-        return d and min_valid_year <= d.year <= max_valid_year
-
-    def normalize_date_string(date_str: str) -> str:
-        cleaned = re.sub(r'[^\w\s/\-\.]', '', date_str).strip()
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        return cleaned
-
-    def parse_with_dateparser(date_str: str) -> Optional[date]:
-        try:
-            # Extract date part if there's a time component (e.g., "20-May-18 22:55")
-            if ' ' in date_str and ':' in date_str.split(' ')[-1]:
-                parts = date_str.split(' ')
-                if len(parts) >= 2 and ':' in parts[-1]:
-                    date_str = ' '.join(parts[:-1])  # Remove the time part
-
-            normalized = normalize_date_string(date_str)
-
-            # Pre-check for extreme future years to avoid dateparser issues
-            # Look for 4-digit years that are clearly in the far future
-            year_pattern = r'(?:^|\D)(\d{4})(?:\D|$)'
-            year_match = re.search(year_pattern, normalized)
-            if year_match:
-                potential_year = int(year_match.group(1))
-                if potential_year > max_valid_year:
-                    logging.warning(f"Enhanced extraction detected extreme future year {potential_year} in '{date_str}', skipping")
-                    return None
+    # Date helpers (is_valid_date, normalize_date_string, parse_with_dateparser)
+    # are shared with parse_date at module level; `today` fixes the valid year range
+    today = date.today()
+    logging.debug("Enhanced date extraction valid year range: %s to %s", today.year - 20, today.year + 1)
 
-            # Check if the string looks like a phone number (to avoid parsing phone numbers as dates)
-            phone_patterns = [
-                r'^\d{10}$',  # 10 digit phone number
-                r'^\d{3}[-\s]?\d{3}[-\s]?\d{4}$',  # 3-3-4 format
-                r'^\+\d{1,3}[-\s]?\d{3}[-\s]?\d{3}[-\s]?\d{4}$',  # International format
-                r'^0\d{9,10}$',  # Starting with 0 followed by 9-10 digits
-                r'^\d{9,10}$'  # Any 9-10 digit number (common for phone numbers)
-            ]
-
-            for pattern in phone_patterns:
-                if re.match(pattern, normalized):
-                    logging.warning(f"Enhanced extraction detected phone number pattern in '{date_str}', skipping")
-                    return None
-
-            # Additional check for numbers that could be parsed as future years
-            # This catches cases like "9311111116" which could be parsed as year 2265
-            if re.match(r'^\d+$', normalized) and len(normalized) >= 9:
-                logging.warning(f"Enhanced extraction detected potential phone number (long numeric string) in '{date_str}', skipping")
-                return None
-
-            # Special handling for "DD-Mon-YY" format (e.g., "20-May-18")
-            mon_pattern = r'(\d{1,2})[\-\s]+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\s]+(\d{2}|\d{4})'
-            mon_match = re.match(mon_pattern, normalized, re.IGNORECASE)
-
-            if mon_match:
-                day = int(mon_match.group(1))
-                month = mon_match.group(2)
-                year = mon_match.group(3)
-
-                # Convert month name to number
-                month_map = {
-                    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-                    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-                }
-                month_num = month_map.get(month.lower()[:3])
-
-                # Handle 2-digit year (add century)
-                if len(year) == 2:
-                    # Assume 20xx for years less than 50, 19xx for years 50+
-                    century = '20' if int(year) < 50 else '19'
-                    year = century + year
-
-                try:
-                    year_int = int(year)
-                    # Extra validation before creating date object
-                    if year_int < min_valid_year or year_int > max_valid_year:
-                        logging.warning(f"Enhanced extraction: Year {year_int} out of valid range in '{date_str}', skipping")
-                        return None
-
-                    parsed_date = date(year_int, month_num, day)
-                    if is_valid_date(parsed_date):
-                        return parsed_date
-                except (ValueError, TypeError) as e:
-                    logging.debug(f"Enhanced extraction: Error parsing date with month pattern: {e}")
-                    pass  # Fall back to dateparser
-
-            # Standard dateparser approach
-            try:
-                parsed = dateparser.parse(normalized)
-                if parsed:
-                    parsed_date = parsed.date()
-                    # Double-check the year is in valid range
-                    if is_valid_date(parsed_date):
-                        return parsed_date
-                    else:
-                        logging.warning(f"Enhanced extraction: Dateparser returned invalid year {parsed_date.year} for '{date_str}'")
-            except Exception as e:
-                logging.debug(f"Enhanced extraction: Dateparser error for '{date_str}': {e}")
-
-        except Exception as e:
-            logging.debug(f"Enhanced extraction: Failed to parse date string '{date_str}': {e}")
-        return None
-
-    # Prepare data structures
-    lines = text.split('\n')
+    # Prepare data structures. The regex strategies all run on one lowercased
+    # copy of the text; spaCy (STRATEGY 3) still sees the original casing.
+    text_lower = text.lower()
+    lines_lower = text_lower.split('\n')
     date_candidates = []  # Will store (date, confidence, method, match) tuples
 
-    # STRATEGY 1: Context-aware extraction
-    date_keywords = [
-        'date', 'dt', 'dated', 'invoice date', 'receipt date', 'bill date',
-        'transaction date', 'order date', 'purchase date', 'sale date',
-        'service date', 'issue date', 'issued on', 'issued date'
-    ]
-    date_patterns = [
-        # Standard numeric formats with various separators
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})',
-
-        # Format: DD-Mon-YY or DD-Mon-YYYY (e.g., 20-May-18)
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+(\d{1,2}[\-\s]+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\s]+\d{2,4})',
-
-        # Format: Month DD, YYYY
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?[,\s]+\d{2,4})',
-
-        # Format: YYYY-MM-DD
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+(\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2})',
-
-        # Format with time: DD-Mon-YY HH:MM or similar
-        r'(?:' + '|'.join(date_keywords) + r')[:\s]+(\d{1,2}[\-\s]+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[\-\s]+\d{2,4}[\s]+\d{1,2}:\d{2}(?::\d{2})?)',
-    ]
-
-    for i, line in enumerate(lines):
-        line_lower = line.lower()
-        for pattern in date_patterns:
-            matches = re.findall(pattern, line_lower, re.IGNORECASE)
-            for match in matches:
-                parsed_date = parse_with_dateparser(match)
+    # STRATEGY 1: Context-aware extraction (see DATE_LABEL_RE and DATE_VALUE_RES)
+    for i, line_lower in enumerate(lines_lower):
+        for label in DATE_LABEL_RE.finditer(line_lower):
+            for value_re in DATE_VALUE_RES:
+                m = value_re.match(line_lower, label.end())
+                if not m:
+                    continue
+                match = m.group()
+                parsed_date = parse_with_dateparser(match, today)
                 if parsed_date:
-                    # Calculate confidence score
-                    confidence = 0.0
-                    confidence += 0.4  # Context boost - preceded by date label
-
-                    # Position boost
+                    # Context boost (preceded by date label), position boost, then
+                    # the shared format/recency scoring plus the context-aware method boost
+                    confidence = 0.4
                     if i < 3:
                         confidence += 0.3
                     elif i < 10:
                         confidence += 0.2
-
-                    # Format clarity boost
-                    if re.match(r'\d{4}-\d{2}-\d{2}', match) or re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', match, re.IGNORECASE):
-                        confidence += 0.2  # Unambiguous format
-                    else:
-                        confidence += 0.1  # Potentially ambiguous format
-
-                    # Validation adjustments
-                    days_old = (datetime.now().date() - parsed_date).days
-                    if 0 <= days_old <= 365:
-                        confidence += 0.1  # Recent date
-                    elif days_old > 5*365:
-                        confidence -= 0.1  # Older date
-                    elif days_old < 0 and days_old > -10:  # Allow slightly future dates (few days)
-                        confidence -= 0.1  # Near future date
-                    elif days_old < -10:
-                        confidence -= 0.3  # Far future date
-
-                    # Method boost
-                    confidence += 0.2  # Context-aware method
+                    confidence = score_date_candidate(match, parsed_date, today, confidence, method_boost=0.2)
 
                     date_candidates.append((parsed_date, confidence, "context", match))
-                    logging.debug(f"Context-aware date candidate: {match} -> {parsed_date} (confidence: {confidence:.2f})")
+                    logging.debug("Context-aware date candidate: %s -> %s (confidence: %.2f)", match, parsed_date, confidence)
 
     # STRATEGY 2: Position-based heuristics
-    top_lines = ' '.join(lines[:min(10, len(lines))])
-    comprehensive_patterns = [
-        r'\b(\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2})\b',  # YYYY-MM-DD
-        r'\b(\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4})\b',  # MM/DD/YYYY or DD/MM/YYYY
-        r'\b((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?[,\s]+\d{2,4})\b',  # Month DD, YYYY
-        r'\b(\d{1,2}[/\-\s](?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*[/\-\s]\d{2,4})\b',  # DD-MMM-YY
-    ]
-
-    for pattern in comprehensive_patterns:
-        matches = re.findall(pattern, top_lines, re.IGNORECASE)
-        for match in matches:
-            parsed_date = parse_with_dateparser(match)
-            if parsed_date:
-                # Calculate confidence score
-                confidence = 0.0
-
-                # Position boost (already in top portion)
-                confidence += 0.2
-
-                # Format clarity boost
-                if re.match(r'\d{4}-\d{2}-\d{2}', match) or re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', match, re.IGNORECASE):
-                    confidence += 0.2  # Unambiguous format
-                else:
-                    confidence += 0.1  # Potentially ambiguous format
-
-                # Validation adjustments
-                days_old = (datetime.now().date() - parsed_date).days
-                if 0 <= days_old <= 365:
-                    confidence += 0.1  # Recent date
-                elif days_old > 5*365:
-                    confidence -= 0.1  # Older date
-                elif days_old < 0 and days_old > -10:
-                    confidence -= 0.1  # Near future date
-                elif days_old < -10:
-                    confidence -= 0.3  # Far future date
-
-                # Method boost
-                confidence += 0.1  # Position-based method
-
-                date_candidates.append((parsed_date, confidence, "position", match))
-                logging.debug(f"Position-based date candidate: {match} -> {parsed_date} (confidence: {confidence:.2f})")
-
-    # STRATEGY 3: NLP-based extraction
-    doc = nlp(text)
-    date_entities = [ent.text for ent in doc.ents if ent.label_ == "DATE"]
+    # Position-based candidates score at most 0.6 (NLP ones at most 0.4), so
+    # once a labeled date reaches DATE_SHORT_CIRCUIT_CONFIDENCE it always wins
+    # and the remaining strategies are skipped
+    if not any(c[1] >= DATE_SHORT_CIRCUIT_CONFIDENCE for c in date_candidates):
+        top_lines = ' '.join(lines_lower[:min(10, len(lines_lower))])
+
+        # Common date formats (see ENHANCED_DATE_PATTERNS)
+        for pattern in ENHANCED_DATE_PATTERNS:
+            for m in pattern.finditer(top_lines):
+                match = m.group(1)
+                parsed_date = parse_with_dateparser(match, today)
+                if parsed_date:
+                    # Position boost (already in top portion) and position-based method boost
+                    confidence = score_date_candidate(match, parsed_date, today, 0.2, method_boost=0.1)
+
+                    date_candidates.append((parsed_date, confidence, "position", match))
+                    logging.debug("Position-based date candidate: %s -> %s (confidence: %.2f)", match, parsed_date, confidence)
+
+    # STRATEGY 3: NLP-based extraction (opt-in, see USE_SPACY_NER)
+    # NLP candidates score at most 0.4, so skip the spaCy pass when a regex
+    # candidate at NER_SKIP_DATE_CONFIDENCE or above would win anyway
+    if USE_SPACY_NER and not any(c[1] >= NER_SKIP_DATE_CONFIDENCE for c in date_candidates):
+        if doc is None:
+            doc = get_doc(text)
+        date_entities = [ent.text for ent in doc.ents if ent.label_ == "DATE"]
+    else:
+        date_entities = []
 
     for date_text in date_entities:
-        parsed_date = parse_with_dateparser(date_text)
+        parsed_date = parse_with_dateparser(date_text, today)
         if parsed_date:
-            # Calculate confidence score
-            confidence = 0.0
-
-            # Format clarity boost
-            if re.match(r'\d{4}-\d{2}-\d{2}', date_text) or re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', date_text, re.IGNORECASE):
-                confidence += 0.2  # Unambiguous format
-            else:
-                confidence += 0.1  # Potentially ambiguous format
-
-            # Validation adjustments
-            days_old = (datetime.now().date() - parsed_date).days
-            if 0 <= days_old <= 365:
-                confidence += 0.1  # Recent date
-            elif days_old > 5*365:
-                confidence -= 0.1  # Older date
-            elif days_old < 0 and days_old > -10:
-                confidence -= 0.1  # Near future date
-            elif days_old < -10:
-                confidence -= 0.3  # Far future date
-
-            # Method boost
-            confidence += 0.1  # NLP-based method
+            # NLP-based method boost
+            confidence = score_date_candidate(date_text, parsed_date, today, 0.0, method_boost=0.1)
 
             date_candidates.append((parsed_date, confidence, "nlp", date_text))
-            logging.debug(f"NLP-based date candidate: {date_text} -> {parsed_date} (confidence: {confidence:.2f})")
+            logging.debug("NLP-based date candidate: %s -> %s (confidence: %.2f)", date_text, parsed_date, confidence)
 
     # STRATEGY 4: Fallback regex on full text
-    if not date_candidates:
-        for pattern in comprehensive_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                parsed_date = parse_with_dateparser(match)
+    # Receipts of 10 lines or fewer were already scanned in full by STRATEGY 2
+    # (newlines and spaces match the same way and normalize to the same string),
+    # so a second scan could only find the same unparseable matches again
+    if not date_candidates and len(lines_lower) > 10:
+        for pattern in ENHANCED_DATE_PATTERNS:
+            for m in pattern.finditer(text_lower):
+                match = m.group(1)
+                parsed_date = parse_with_dateparser(match, today)
                 if parsed_date:
-                    # Calculate confidence score (lower for fallback)
-                    confidence = 0.0
-
-                    # Format clarity boost
-                    if re.match(r'\d{4}-\d{2}-\d{2}', match) or re.search(r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)', match, re.IGNORECASE):
-                        confidence += 0.2  # Unambiguous format
-                    else:
-                        confidence += 0.1  # Potentially ambiguous format
-
-                    # Validation adjustments
-                    days_old = (datetime.now().date() - parsed_date).days
-                    if 0 <= days_old <= 365:
-                        confidence += 0.1  # Recent date
-                    elif days_old > 5*365:
-                        confidence -= 0.1  # Older date
-                    elif days_old < 0 and days_old > -10:
-                        confidence -= 0.1  # Near future date
-                    elif days_old < -10:
-                        confidence -= 0.3  # Far future date
+                    # Lower confidence for fallback: no position or method boost
+                    confidence = score_date_candidate(match, parsed_date, today, 0.0)
 
                     date_candidates.append((parsed_date, confidence, "fallback", match))
-                    logging.debug(f"Fallback date candidate: {match} -> {parsed_date} (confidence: {confidence:.2f})")
+                    logging.debug("Fallback date candidate: %s -> %s (confidence: %.2f)", match, parsed_date, confidence)
 
     # Return the date with highest confidence, if any
     if date_candidates:
-        date_candidates.sort(key=lambda x: x[1], reverse=True)
-        best_candidate = date_candidates[0]
+        # max() keeps the first of equally confident candidates, like the stable sort did
+        best_candidate = max(date_candidates, key=lambda x: x[1])
         logging.info(f"Selected best date candidate: {best_candidate[3]} -> {best_candidate[0]} "
                     f"(confidence: {best_candidate[1]:.2f}, method: {best_candidate[2]})")
 
         # Log all candidates for debugging
-        if len(date_candidates) > 1:
+        if len(date_candidates) > 1 and logging.getLogger().isEnabledFor(logging.DEBUG):
             logging.debug(f"All date candidates: {[(str(d[0]), d[1], d[2]) for d in date_candidates]}")
 
         return best_candidate[0], best_candidate[1]
@@ -1380,12 +1668,17 @@ def enhanced_date_extraction(text: str) -> Tuple[Optional[date], float]:
     logging.warning("No valid date candidates found")
     return None, 0.0
 
-def parse_ocr_text(text: str) -> Dict[str, Any]:
-    """Parses the raw OCR text to extract structured data with confidence scores."""
+def parse_ocr_text(text: str, doc=None) -> Dict[str, Any]:
+    """
+    Parses the raw OCR text to extract structured data with confidence scores.
+
+    doc is the spaCy Doc for text when the caller already has one (see
+    parse_ocr_text_batch); otherwise the extractors share get_doc(text).
+    """
     # Use enhanced extraction for all fields
-    date_result, date_confidence = enhanced_date_extraction(text)
-    merchant_result, merchant_confidence = enhanced_merchant_extraction(text)
-    amount_result, amount_confidence = enhanced_amount_extraction(text)
+    date_result, date_confidence = enhanced_date_extraction(text, doc)
+    merchant_result, merchant_confidence = enhanced_merchant_extraction(text, doc)
+    amount_result, amount_confidence = enhanced_amount_extraction(text, doc)
 
     # Apply confidence thresholds
     final_merchant = merchant_result if merchant_confidence >= 0.3 else None
@@ -1413,6 +1706,17 @@ def parse_ocr_text(text: str) -> Dict[str, Any]:
                 f"Amount: {final_amount} (confidence: {amount_confidence:.2f})")
 
     # Log the capped confidence scores being returned
-    logging.debug(f"Returning capped confidence scores: Date={capped_date_confidence:.2f}, Merchant={capped_merchant_confidence:.2f}, Amount={capped_amount_confidence:.2f}")
+    logging.debug("Returning capped confidence scores: Date=%.2f, Merchant=%.2f, Amount=%.2f", capped_date_confidence, capped_merchant_confidence, capped_amount_confidence)
+
+    return extracted_data
 
-    return extracted_data
\ No newline at end of file
+
+def parse_ocr_text_batch(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Parses several OCR texts, running spaCy over them in batches with nlp.pipe.
+
+    Returns one parse_ocr_text result per text, in the same order. Use this
+    instead of calling parse_ocr_text in a loop when processing multiple receipts.
+    """
+    docs = get_nlp().pipe(texts, batch_size=SPACY_BATCH_SIZE)
+    return [parse_ocr_text(text, doc) for text, doc in zip(texts, docs)]
@@ -1,19 +1,25 @@
 import io
+import logging
+import re
 from datetime import date, datetime
 from typing import List, Optional
 
 from fastapi import (
     APIRouter, Depends, HTTPException, Query, Path, status
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
-from database import get_db
+from database import get_db, get_session_factory
 from src.auth.dependencies import get_current_active_user
 from models import User, CategoryEnum
 from .schemas import ExpenseReportItem # Assuming this schema exists
 from . import service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/api/reports",
     tags=["Reports"],
@@ -21,29 +27,37 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Serializes report items to JSON bytes in one pass in pydantic-core, the same
+# output FastAPI produces for response_model=List[ExpenseReportItem]
+REPORT_ITEMS_ADAPTER = TypeAdapter(List[ExpenseReportItem])
+
+# Splits the category query on commas, dropping the whitespace around each one
+CATEGORY_SEPARATOR_RE = re.compile(r'\s*,\s*')
+
+# Case-insensitive lookup of category query values, built once
+CATEGORY_BY_LOWER = {cat.value.lower(): cat for cat in CategoryEnum}
+VALID_CATEGORY_VALUES = [cat.value for cat in CategoryEnum]
+
+
 def parse_categories(category_str: Optional[str]) -> Optional[List[CategoryEnum]]:
     """Parses comma-separated category string into list of CategoryEnum."""
     if not category_str:
         return None
 
     categories = []
-    raw_categories = [c.strip() for c in category_str.split(',') if c.strip()]
-    valid_category_values = {cat.value for cat in CategoryEnum}
+    raw_categories = [c for c in CATEGORY_SEPARATOR_RE.split(category_str.strip()) if c]
 
     for cat_str in raw_categories:
         # Simple case-insensitive match against enum values
-        matched = False
-        for enum_member in CategoryEnum:
-            if enum_member.value.lower() == cat_str.lower():
-                categories.append(enum_member)
-                matched = True
-                break
-        if not matched:
+        enum_member = CATEGORY_BY_LOWER.get(cat_str.lower())
+        if enum_member is not None:
+            categories.append(enum_member)
+        else:
             # Handle invalid category string - raise error or ignore?
             # Raising error is safer to indicate bad input.
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid category provided: '{cat_str}'. Allowed values: {list(valid_category_values)}"
+                detail=f"Invalid category provided: '{cat_str}'. Allowed values: {VALID_CATEGORY_VALUES}"
             )
 
     return categories if categories else None
@@ -78,10 +92,10 @@ async def get_report_data(
             end_date=end_date,
             categories=parsed_cats
         )
-        # No need to validate here anymore
-        return report_items
+        # Already validated; serialize straight to JSON bytes
+        return Response(content=REPORT_ITEMS_ADAPTER.dump_json(report_items), media_type="application/json")
     except Exception as e:
-        print(f"Error fetching report data: {e}")
+        logger.exception("Error fetching report data")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch report data."
@@ -95,6 +109,7 @@ async def download_report(
     end_date: date = Query(...),
     category: Optional[str] = Query(None, description="Comma-separated categories (e.g., Food,Travel)"),
     db: AsyncSession = Depends(get_db),
+    session_factory: sessionmaker = Depends(get_session_factory),
     current_user: User = Depends(get_current_active_user),
 ):
     """Generates and downloads an expense report in the specified format (CSV or PDF)."""
@@ -126,15 +141,6 @@ async def download_report(
         raise e
 
     try:
-        # Fetch the data as Pydantic models
-        expenses_report_items = await service.fetch_report_data(
-            db=db,
-            user_id=current_user.id,
-            start_date=start_date,
-            end_date=end_date,
-            categories=parsed_cats
-        )
-
         # Generate filename
         start_str = start_date.strftime('%Y%m%d')
         end_str = end_date.strftime('%Y%m%d')
@@ -142,35 +148,61 @@ async def download_report(
 
         if format.lower() == 'csv':
             try:
-                csv_buffer = service.create_csv_report(expenses_report_items)
+                if not await service.has_report_rows(
+                    db=db,
+                    user_id=current_user.id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    categories=parsed_cats
+                ):
+                     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No expenses found for the selected criteria.")
+
+                # Rows are streamed from the database and serialized chunk by
+                # chunk as the response is sent
+                csv_chunks = service.stream_csv_report(
+                    session_factory=session_factory,
+                    user_id=current_user.id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    categories=parsed_cats
+                )
+
                 filename = f"{filename_base}.csv"
                 headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
 
-                if not csv_buffer.getvalue():
-                     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No expenses found for the selected criteria.")
-
-                return StreamingResponse(csv_buffer, media_type="text/csv", headers=headers)
+                return StreamingResponse(csv_chunks, media_type="text/csv", headers=headers)
             except HTTPException as e:
                  raise e
             except Exception as e:
-                print(f"Error creating CSV report: {e}")
+                logger.exception("Error creating CSV report")
                 raise HTTPException(status_code=500, detail="Failed to generate CSV report.")
 
         elif format.lower() == 'pdf':
+            # Fetch the rows as-is; the PDF writer reads the same attributes
+            # as ExpenseReportItem, so Pydantic validation is skipped
+            expenses_report_items = [
+                row async for row in service.iter_report_rows(
+                    db=db,
+                    user_id=current_user.id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    categories=parsed_cats
+                )
+            ]
+
             try:
-                # Pass the Pydantic model list
                 pdf_buffer = service.create_pdf_report(expenses_report_items, start_date, end_date, category_names_for_title)
                 filename = f"{filename_base}.pdf"
                 headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
                 # PDF generation handles the 'no data' case internally by design
                 return StreamingResponse(pdf_buffer, media_type="application/pdf", headers=headers)
             except Exception as e:
-                print(f"Error creating PDF report: {e}")
+                logger.exception("Error creating PDF report")
                 raise HTTPException(status_code=500, detail="Failed to generate PDF report.")
 
     # This exception should now be less likely for DB session issues
     except Exception as e:
-        print(f"Error preparing report download: {e}")
+        logger.exception("Error preparing report download")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to prepare report for download."
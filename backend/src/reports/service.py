@@ -1,10 +1,14 @@
 # backend/src/reports/service.py
+import csv
 import io
-import pandas as pd
 from datetime import date, datetime
-from typing import List, Optional, Dict, Any # Import Dict, Any
+from decimal import Decimal
+from typing import AsyncIterable, AsyncIterator, List, Optional, Sequence, Dict, Any # Import Dict, Any
+
+import anyio
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Row, Select, select, and_
 from models import Expense, CategoryEnum, User # Import User if needed for user_id filtering
 from .schemas import ExpenseReportItem # Import the schema
 
@@ -16,14 +20,39 @@ from reportlab.lib import colors
 from reportlab.lib.units import inch
 
 
-async def fetch_report_data(
-    db: AsyncSession,
+# PDF report styles, built once and shared by every report (never modified)
+PDF_STYLES = getSampleStyleSheet()
+# Adjusted widths for landscape
+PDF_COL_WIDTHS = [1.5*inch, 3.5*inch, 2.0*inch, 1.5*inch, 1.0*inch]
+PDF_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
+    ('RIGHTPADDING', (3, 1), (3, -1), 6),
+])
+
+# Rows fetched from the database cursor at a time when streaming a report
+REPORT_STREAM_PARTITION_ROWS = 1000
+
+# Rows serialized per chunk when streaming a CSV report
+CSV_STREAM_CHUNK_ROWS = 500
+
+CSV_REPORT_HEADER = ("Date", "Merchant Name", "Category", "Amount", "Currency")
+
+
+def build_report_query(
     user_id: int,
     start_date: date,
     end_date: date,
     categories: Optional[List[CategoryEnum]] = None
-) -> List[ExpenseReportItem]:
-    """Fetches filtered expense data and returns it as Pydantic models."""
+) -> Select:
+    """Builds the filtered, date-ordered expense query behind every report."""
     stmt = select(
         # Select specific columns needed
         Expense.date,
@@ -40,6 +69,19 @@ async def fetch_report_data(
     if categories:
         stmt = stmt.where(Expense.category.in_(categories))
 
+    return stmt
+
+
+async def fetch_report_data(
+    db: AsyncSession,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    categories: Optional[List[CategoryEnum]] = None
+) -> List[ExpenseReportItem]:
+    """Fetches filtered expense data and returns it as Pydantic models."""
+    stmt = build_report_query(user_id, start_date, end_date, categories)
+
     result = await db.execute(stmt)
     # Fetch results as mappings (like dicts)
     # Use .mappings().all() instead of .scalars().all()
@@ -51,62 +93,112 @@ async def fetch_report_data(
     return report_items # Return list of Pydantic models
 
 
-def create_csv_report(data: List[ExpenseReportItem]) -> io.StringIO:
-    """Generates a CSV report from ExpenseReportItem data using Pandas."""
-    if not data:
-        return io.StringIO()
+async def iter_report_rows(
+    db: AsyncSession,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    categories: Optional[List[CategoryEnum]] = None
+) -> AsyncIterator[Row]:
+    """
+    Streams filtered expense rows through a server-side cursor.
+
+    Rows are read REPORT_STREAM_PARTITION_ROWS at a time and yielded as-is,
+    without Pydantic validation; they have the same attributes as
+    ExpenseReportItem, so the report writers accept either.
+    """
+    # yield_per fetches REPORT_STREAM_PARTITION_ROWS rows per round trip and
+    # makes partitions() hand them over in batches of the same size
+    stmt = build_report_query(user_id, start_date, end_date, categories).execution_options(
+        yield_per=REPORT_STREAM_PARTITION_ROWS
+    )
+
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        for row in partition:
+            yield row
+
+
+def csv_report_row(item: ExpenseReportItem) -> tuple:
+    """Formats one expense as a CSV report row (see CSV_REPORT_HEADER)."""
+    return (
+        item.date.isoformat(),
+        item.merchant_name or 'N/A',
+        item.category.value if item.category else 'N/A',
+        f"{item.amount:.2f}",
+        item.currency or 'N/A' # Handle currency potentially being None too
+    )
+
+
+async def aiter_csv_report(data: AsyncIterable[ExpenseReportItem]) -> AsyncIterator[str]:
+    """
+    Yields a CSV report from ExpenseReportItem data in chunks of CSV_STREAM_CHUNK_ROWS rows.
+
+    Suitable for passing straight to a StreamingResponse, so the whole report
+    never has to be held in memory as text. Yields nothing if there is no data.
+    """
+    # Same layout pandas produced: header row, minimal quoting, '\n' line endings
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    rows = 0
+    async for item in data:
+        if rows == 0:
+            writer.writerow(CSV_REPORT_HEADER)
+        writer.writerow(csv_report_row(item))
+        rows += 1
+        if rows % CSV_STREAM_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def has_report_rows(
+    db: AsyncSession,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    categories: Optional[List[CategoryEnum]] = None
+) -> bool:
+    """Checks whether any expense matches the report filters (LIMIT 1)."""
+    stmt = build_report_query(user_id, start_date, end_date, categories).limit(1)
+    return bool(await db.scalar(select(stmt.exists())))
 
-    # Convert list of Pydantic models to list of dicts for DataFrame
-    # Be more explicit with potential None values
-    data_dicts = []
-    for item in data:
-        try:
-            category_value = item.category.value if item.category else 'N/A'
-            amount_float = float(item.amount) # Convert Decimal to float
-            merchant_name = item.merchant_name or 'N/A'
-            
-            data_dicts.append({
-                "Date": item.date.isoformat(),
-                "Merchant Name": merchant_name,
-                "Category": category_value, 
-                "Amount": amount_float, 
-                "Currency": item.currency or 'N/A' # Handle currency potentially being None too
-            })
-        except Exception as e:
-            # Log the item causing issues and the error
-            print(f"Error processing item for CSV: {item}. Error: {e}")
-            # Depending on requirements, you might skip the item or raise the error
-            # For now, let's raise to signal a problem during conversion
-            raise ValueError(f"Failed to process report item: {item}") from e
-
-    if not data_dicts:
-        # This case might happen if all items failed processing
-        return io.StringIO()
 
+async def stream_csv_report(
+    session_factory: sessionmaker,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    categories: Optional[List[CategoryEnum]] = None
+) -> AsyncIterator[str]:
+    """
+    Streams a CSV report straight from the database, for a StreamingResponse.
+
+    The rows are read with a session opened by this generator rather than the
+    request's get_db session, which FastAPI closes before a streaming response
+    body is sent. The session only exists while the body is being iterated, so
+    nothing is held if the client goes away before the first chunk.
+    """
+    session = session_factory()
+    rows = iter_report_rows(session, user_id, start_date, end_date, categories)
     try:
-        df = pd.DataFrame(data_dicts)
-        # Reorder columns - ensure these names match the keys created above
-        df = df[["Date", "Merchant Name", "Category", "Amount", "Currency"]]
-    except Exception as e:
-        print(f"Error creating/reordering DataFrame for CSV: {e}")
-        raise ValueError("Failed to create DataFrame from report data.") from e
-
-    output = io.StringIO()
-    try:
-        df.to_csv(output, index=False, encoding='utf-8')
-    except Exception as e:
-        print(f"Error writing DataFrame to CSV buffer: {e}")
-        raise ValueError("Failed to write report data to CSV format.") from e
-        
-    output.seek(0)
-    return output
+        async for chunk in aiter_csv_report(rows):
+            yield chunk
+    finally:
+        # Shielded so a client disconnect (cancellation) can't skip the cleanup
+        with anyio.CancelScope(shield=True):
+            await rows.aclose()
+            await session.close()
 
 
-def create_pdf_report(data: List[ExpenseReportItem], start_date: date, end_date: date, categories: Optional[List[str]]) -> io.BytesIO:
+def create_pdf_report(data: Sequence[ExpenseReportItem], start_date: date, end_date: date, categories: Optional[List[str]]) -> io.BytesIO:
     """Generates a PDF report from ExpenseReportItem data using ReportLab."""
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
+    styles = PDF_STYLES
     story = []
 
     # Title
@@ -125,36 +217,22 @@ def create_pdf_report(data: List[ExpenseReportItem], start_date: date, end_date:
 
     # Prepare table data from list of ExpenseReportItem models
     table_data = [["Date", "Merchant Name", "Category", "Amount", "Currency"]]
-    total_amount = 0.0
+    # Sum the Decimal amounts exactly; floats could drift in the total
+    total_amount = Decimal("0")
     # Iterate through the list of ExpenseReportItem models
     for item in data:
-        amount_float = float(item.amount) 
-        total_amount += amount_float
+        total_amount += item.amount
         table_data.append([
             item.date.isoformat(),
             item.merchant_name or 'N/A',
             item.category.value if item.category else 'N/A',
-            f"{amount_float:.2f}", 
+            f"{item.amount:.2f}", 
             item.currency
         ])
 
-    # Create Table Style
-    # Adjusted widths for landscape
-    col_widths = [1.5*inch, 3.5*inch, 2.0*inch, 1.5*inch, 1.0*inch]
-    table = Table(table_data, colWidths=col_widths)
-    style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-        ('RIGHTPADDING', (3, 1), (3, -1), 6),
-    ])
-    table.setStyle(style)
+    # Table style and column widths are shared (see PDF_TABLE_STYLE)
+    table = Table(table_data, colWidths=PDF_COL_WIDTHS)
+    table.setStyle(PDF_TABLE_STYLE)
     story.append(table)
 
     story.append(Spacer(1, 0.2*inch))
@@ -1,14 +1,18 @@
 # backend/src/user_settings/router.py
+import io
 import os
-import shutil
 import uuid
 from pathlib import Path
+from typing import Optional
 from fastapi import (
     APIRouter, Depends, HTTPException, UploadFile,
-    File, status, Form
+    File, status, Form, Request, Response
 )
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import exists, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from starlette.concurrency import run_in_threadpool
 
 from database import get_db
 from models import User
@@ -32,10 +36,12 @@ router = APIRouter(
 UPLOAD_DIR_BASE = Path("uploads")
 PROFILE_IMAGE_DIR = UPLOAD_DIR_BASE / "profile_images"
 MAX_FILE_SIZE_BYTES = 2 * 1024 * 1024 # 2 MB
+UPLOAD_CHUNK_SIZE = 256 * 1024 # Stream uploads to disk in 256 KB chunks
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+IMAGE_SNIFF_BYTES = 12 # Enough for every signature in sniff_image_extensions
 
-# Ensure upload directory exists (FastAPI runs from where you launch uvicorn, usually backend/)
-PROFILE_IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+# The upload directory is created by main.py before it mounts StaticFiles
+# (FastAPI runs from where you launch uvicorn, usually backend/)
 
 
 # --- Helper Function for Filename ---
@@ -57,14 +63,150 @@ def get_unique_filename(user_id: int, original_filename: str) -> Path:
     return Path(f"user_{user_id}_{unique_id}{ext}")
 
 
+def sniff_image_extensions(head: bytes) -> frozenset:
+    """Returns the allowed extensions matching an upload's first bytes (empty if none do)."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return frozenset({".jpg", ".jpeg"})
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return frozenset({".png"})
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return frozenset({".webp"})
+    return frozenset()
+
+
+def remove_file(path: Path) -> bool:
+    """Deletes path if it is a regular file and reports whether it did. Blocking; run it in the threadpool."""
+    if not path.is_file():
+        return False
+    path.unlink(missing_ok=True)
+    return True
+
+
+def raise_file_too_large() -> None:
+    raise HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Max size is {MAX_FILE_SIZE_BYTES // 1024 // 1024}MB."
+    )
+
+
+def copy_file_descriptor(src_fd: int, file_path: Path) -> int:
+    """
+    Copies a whole file descriptor to file_path inside the kernel and returns its size.
+
+    Uses os.copy_file_range (which can clone on CoW filesystems), falling back
+    to os.sendfile and then to a plain buffered copy. Blocking; run it in the
+    threadpool.
+    """
+    size = os.fstat(src_fd).st_size
+    if size > MAX_FILE_SIZE_BYTES:
+        raise_file_too_large()
+
+    dst_fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        copied = 0
+        try:
+            if hasattr(os, "copy_file_range"):
+                while copied < size:
+                    n = os.copy_file_range(src_fd, dst_fd, size - copied, copied, copied)
+                    if n == 0:
+                        break
+                    copied += n
+            else:
+                while copied < size:
+                    n = os.sendfile(dst_fd, src_fd, copied, size - copied)
+                    if n == 0:
+                        break
+                    copied += n
+        except OSError:
+            # Not supported between these filesystems; copy through user space
+            os.lseek(src_fd, copied, os.SEEK_SET)
+            os.lseek(dst_fd, copied, os.SEEK_SET)
+            while chunk := os.read(src_fd, UPLOAD_CHUNK_SIZE):
+                os.write(dst_fd, chunk)
+                copied += len(chunk)
+    finally:
+        os.close(dst_fd)
+    return copied
+
+
+async def save_upload_file(file: UploadFile, file_path: Path) -> int:
+    """
+    Writes an upload to file_path and returns its size.
+
+    Uploads backed by a real file descriptor are copied fd-to-fd in the kernel
+    (see copy_file_descriptor). File objects without one are written
+    UPLOAD_CHUNK_SIZE bytes at a time. Either way 413 is
+    raised once more than MAX_FILE_SIZE_BYTES is seen, and blocking file I/O
+    runs in the threadpool to keep the event loop free.
+    """
+    try:
+        # Runs in the threadpool: on a SpooledTemporaryFile still held in
+        # memory, fileno() first rolls it over to disk
+        src_fd = await run_in_threadpool(file.file.fileno)
+    except (io.UnsupportedOperation, AttributeError):
+        pass
+    else:
+        return await run_in_threadpool(copy_file_descriptor, src_fd, file_path)
+
+    out = await run_in_threadpool(open, file_path, "wb")
+    try:
+        written = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > MAX_FILE_SIZE_BYTES:
+                raise_file_too_large()
+            await run_in_threadpool(out.write, chunk)
+    finally:
+        await run_in_threadpool(out.close)
+    return written
+
+
 # --- Endpoint Implementations ---
 
+def profile_etag(user: User) -> Optional[str]:
+    """Weak ETag for a user's profile; every profile change bumps updated_at."""
+    version = user.updated_at or user.created_at
+    if version is None:
+        return None
+    return f'W/"{user.id}-{int(version.timestamp() * 1_000_000)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag."""
+    if not if_none_match:
+        return False
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+    return False
+
+
 @router.get("/profile", response_model=UserProfile)
 async def read_user_profile(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
 ):
-    """Fetches the current authenticated user's profile details."""
+    """
+    Fetches the current authenticated user's profile details.
+
+    Sends an ETag; a repeat GET with a matching If-None-Match gets 304 Not
+    Modified without a body.
+    """
     # User object from dependency is already up-to-date if token is valid
+    etag = profile_etag(current_user)
+    if etag is None:
+        return current_user
+
+    # no-cache: the browser may keep the profile but must revalidate it, so
+    # an update is visible on the next GET
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
     return current_user
 
 @router.put("/profile", response_model=UserProfile)
@@ -78,22 +220,16 @@ async def update_user_profile(
     Profile image is updated via the POST /profile/image endpoint.
     """
     update_data = profile_data.model_dump(exclude_unset=True) # Get only fields that were provided
-    changes_made = False
+    # Columns that actually change, written with a single UPDATE below
+    changed_values = {}
 
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No update data provided.")
 
-    # Check email uniqueness if email is being updated
+    # Email uniqueness is checked by the UPDATE itself (see below)
     new_email = update_data.get("email")
     if new_email and new_email != current_user.email:
-        existing_user = await auth_service.get_user_by_email(db, email=new_email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered by another user."
-            )
-        current_user.email = new_email
-        changes_made = True
+        changed_values["email"] = new_email
 
     # Update name if provided and different
     new_name = update_data.get("name")
@@ -103,17 +239,39 @@ async def update_user_profile(
              # Allow setting name to null if DB/model allows it.
              # If you don't want null names, add validation here or in schema.
              if current_user.name is not None:
-                 current_user.name = None
-                 changes_made = True
+                 changed_values["name"] = None
         elif new_name != current_user.name:
-             current_user.name = new_name
-             changes_made = True
-
-
-    if changes_made:
+             changed_values["name"] = new_name
+
+
+    if changed_values:
+        # The ORM applies the new values to current_user as well, and the
+        # session doesn't expire on commit, so no refresh SELECT is needed
+        stmt = update(User).where(User.id == current_user.id).values(**changed_values)
+        if "email" in changed_values:
+            # Only update if no other user has the email, in the same round trip
+            other_user = aliased(User)
+            stmt = stmt.where(
+                ~exists().where(other_user.email == new_email, other_user.id != current_user.id)
+            ).returning(User.id)
         try:
+            result = await db.execute(stmt)
+            if "email" in changed_values and result.first() is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered by another user."
+                )
             await db.commit()
-            await db.refresh(current_user)
+        except HTTPException:
+            await db.rollback()
+            raise
+        except IntegrityError:
+            # Another user took the email between the check and the commit
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered by another user."
+            )
         except Exception as e:
             await db.rollback()
             print(f"Error updating profile for user {current_user.id}: {e}") # Basic logging
@@ -135,30 +293,33 @@ async def upload_profile_image(
     if not file or not file.filename:
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No file uploaded or filename missing.")
 
-    # Check file size before reading the whole thing into memory if possible
-    # Use file.seek(0, 2) to get size, then file.seek(0)
-    file.file.seek(0, 2) # Move to end of file
-    file_size = file.file.tell() # Get position (size)
-    await file.seek(0) # Move back to start for reading
-    if file_size > MAX_FILE_SIZE_BYTES:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Max size is {MAX_FILE_SIZE_BYTES // 1024 // 1024}MB."
-        )
+    # Cheap early rejection when the client declared the size; the real limit
+    # is enforced while the file is streamed to disk below
+    if file.size and file.size > MAX_FILE_SIZE_BYTES:
+        raise_file_too_large()
 
     try:
         # Generate unique filename (Path object) and validate extension
         unique_filename = get_unique_filename(current_user.id, file.filename)
+
+        # Check the content is the image type the extension claims before
+        # anything is written to disk
+        head = await file.read(IMAGE_SNIFF_BYTES)
+        await file.seek(0)
+        if unique_filename.suffix not in sniff_image_extensions(head):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"File content is not a valid image. Allowed: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}"
+            )
+
         file_path = PROFILE_IMAGE_DIR / unique_filename
         # Construct the URL path relative to the static mount point
         # IMPORTANT: This assumes UPLOAD_DIR_BASE ('uploads') is mounted at '/uploads'
         relative_url_path = f"/uploads/profile_images/{unique_filename.name}"
 
-        # Save the file asynchronously if possible, otherwise use shutil
-        # Using shutil.copyfileobj is generally safe and efficient for files
+        # Stream the upload to disk in chunks, aborting as soon as it exceeds the limit
         try:
-            with open(file_path, "wb") as buffer:
-                 shutil.copyfileobj(file.file, buffer)
+            await save_upload_file(file, file_path)
         except IOError as e:
              print(f"Error saving file {file_path}: {e}")
              raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not save uploaded file.")
@@ -170,31 +331,29 @@ async def upload_profile_image(
              # Convert URL path back to file system path (relative to backend root)
              # Example: "/uploads/profile_images/user_1_uuid.jpg" -> "uploads/profile_images/user_1_uuid.jpg"
              old_image_fs_path = Path(old_image_path_str.lstrip('/'))
-             if old_image_fs_path.exists() and old_image_fs_path.is_file():
-                 try:
-                     old_image_fs_path.unlink()
+             try:
+                 if await run_in_threadpool(remove_file, old_image_fs_path):
                      print(f"Deleted old profile image: {old_image_fs_path}")
-                 except OSError as e:
-                     print(f"Error deleting old profile image {old_image_fs_path}: {e}") # Log error but continue
+             except OSError as e:
+                 print(f"Error deleting old profile image {old_image_fs_path}: {e}") # Log error but continue
 
         # Update user profile in DB with the new relative URL path
         current_user.profile_image_url = relative_url_path
         await db.commit()
-        await db.refresh(current_user)
 
         return ProfileImageUpdateResponse(profile_image_url=relative_url_path)
 
     except HTTPException as e:
         # If validation failed (filename/type/size), delete temp file if created
-        if 'file_path' in locals() and file_path.exists():
-             file_path.unlink(missing_ok=True)
+        if 'file_path' in locals():
+             await run_in_threadpool(remove_file, file_path)
         raise e # Re-raise validation or file save errors
     except Exception as e:
         await db.rollback()
         print(f"Error uploading profile image for user {current_user.id}: {e}")
         # Attempt to delete partially saved file if error occurred after saving but before DB commit
-        if 'file_path' in locals() and file_path.exists():
-             file_path.unlink(missing_ok=True) # Use missing_ok=True
+        if 'file_path' in locals():
+             await run_in_threadpool(remove_file, file_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not process profile image upload."
@@ -210,19 +369,25 @@ async def update_user_password(
     current_user: User = Depends(get_current_active_user),
 ):
     """Updates the current authenticated user's password."""
+    # Hashing is CPU-bound (tens of ms); run it in the threadpool so this
+    # worker's event loop keeps serving other requests meanwhile
     # 1. Verify current password
-    if not auth_service.verify_password(password_data.current_password, current_user.hashed_password):
+    if not await run_in_threadpool(
+        auth_service.verify_password, password_data.current_password, current_user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password."
         )
 
     # 2. Hash new password (schema validation already checked match and length)
-    hashed_new_password = auth_service.get_password_hash(password_data.new_password)
+    hashed_new_password = await run_in_threadpool(auth_service.get_password_hash, password_data.new_password)
 
     # 3. Update password in DB
-    current_user.hashed_password = hashed_new_password
     try:
+        await db.execute(
+            update(User).where(User.id == current_user.id).values(hashed_password=hashed_new_password)
+        )
         await db.commit()
     except Exception as e:
         await db.rollback()
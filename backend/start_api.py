@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Script to start the Kharcha Nepal API with multiple Uvicorn worker processes.
+
+Password hashing and OCR parsing are CPU-bound, so one process can only use one
+core; extra workers let the OS spread requests across cores. The worker count
+comes from WEB_CONCURRENCY (default: 2 * CPU cores + 1, capped so every
+worker's full connection pool fits in DB_MAX_CONNECTIONS). Use
+`uvicorn main:app --reload` for development instead.
+"""
+import os
+import sys
+
+import uvicorn
+
+# Add the backend directory to Python path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from config import settings
+
+
+def default_worker_count() -> int:
+    # Each worker process has its own pool of up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+    connections_per_worker = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    max_workers = max(1, settings.DB_MAX_CONNECTIONS // connections_per_worker)
+    return min(2 * (os.cpu_count() or 1) + 1, max_workers)
+
+
+if __name__ == "__main__":
+    # Run from the backend directory so relative paths (uploads/) resolve as with `uvicorn main:app`
+    os.chdir(BACKEND_DIR)
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("WEB_CONCURRENCY", default_worker_count())),
+    )
@@ -1,6 +1,14 @@
 #!/usr/bin/env python3
 """
 Script to start Celery worker for Kharcha Nepal email processing.
+
+Usage: python start_worker.py [all|ocr|email]
+
+"all" (the default) runs one worker for every queue. For heavier loads, run an
+"ocr" worker (CPU-bound OCR and parsing, one process per core) and an "email"
+worker (Gmail sync and email processing, mostly waiting on the network, so
+more processes than cores) side by side. WORKER_CONCURRENCY overrides the
+process count.
 """
 import os
 import sys
@@ -10,11 +18,38 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from celery_app import celery_app
 
+CPU_COUNT = os.cpu_count() or 1
+
+# profile -> (queues, default concurrency)
+WORKER_PROFILES = {
+    "all": ("email_processing,email_sync,ocr_processing", 2),
+    "ocr": ("ocr_processing", CPU_COUNT),
+    "email": ("email_processing,email_sync", 2 * CPU_COUNT),
+}
+
 if __name__ == "__main__":
-    # Start the Celery worker
-    celery_app.worker_main([
+    profile = sys.argv[1] if len(sys.argv) > 1 else "all"
+    if profile not in WORKER_PROFILES:
+        sys.exit(f"Unknown worker profile {profile!r}, expected one of: {', '.join(WORKER_PROFILES)}")
+    queues, default_concurrency = WORKER_PROFILES[profile]
+    concurrency = int(os.getenv("WORKER_CONCURRENCY", default_concurrency))
+
+    args = [
         "worker",
         "--loglevel=info",
-        "--concurrency=2",
-        "--queues=email_processing,email_sync,ocr_processing",
-    ])
+        f"--concurrency={concurrency}",
+        f"--queues={queues}",
+        # Unique node name so several profiles can run on one host
+        f"--hostname={profile}@%h",
+        # Hand reserved tasks only to idle child processes
+        "-Ofair",
+        # Skip worker-to-worker sync chatter; these workers don't rely on it
+        "--without-gossip",
+        "--without-mingle",
+    ]
+    if "ocr_processing" in queues:
+        # OCR tasks run for seconds; don't let one process hoard several
+        args.append("--prefetch-multiplier=1")
+
+    # Start the Celery worker
+    celery_app.worker_main(args)
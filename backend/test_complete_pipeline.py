@@ -17,16 +17,23 @@ async def test_database_connectivity():
     print("-" * 50)
     
     try:
-        from database import SessionLocal
+        from sqlalchemy import select
+        from database import AsyncSessionLocal
         from models import User, EmailAccount, EmailMessage, TransactionApproval
         
-        db = SessionLocal()
+        # An AsyncSession can't run queries concurrently, so each query gets
+        # its own session (and pooled connection), as concurrent requests do
+        async def fetch(model, limit):
+            async with AsyncSessionLocal() as db:
+                return (await db.scalars(select(model).limit(limit))).all()
         
         # Test basic queries
-        users = db.query(User).limit(5).all()
-        email_accounts = db.query(EmailAccount).limit(5).all()
-        email_messages = db.query(EmailMessage).limit(10).all()
-        transaction_approvals = db.query(TransactionApproval).limit(10).all()
+        users, email_accounts, email_messages, transaction_approvals = await asyncio.gather(
+            fetch(User, 5),
+            fetch(EmailAccount, 5),
+            fetch(EmailMessage, 10),
+            fetch(TransactionApproval, 10),
+        )
         
         print(f"✅ Database connection successful")
         print(f"📊 Found {len(users)} users")
@@ -34,7 +41,6 @@ async def test_database_connectivity():
         print(f"📨 Found {len(email_messages)} email messages")
         print(f"⏳ Found {len(transaction_approvals)} transaction approvals")
         
-        db.close()
         return True
         
     except Exception as e:
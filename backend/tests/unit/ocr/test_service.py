@@ -19,9 +19,15 @@ try:
         parse_amount,
         parse_merchant,
         parse_ocr_text,
+        parse_ocr_text_batch,
         enhanced_date_extraction,
         enhanced_merchant_extraction,
-        enhanced_amount_extraction
+        enhanced_merchant_extraction_batch,
+        enhanced_amount_extraction,
+        fast_parse_numeric_date,
+        fast_parse_month_name_date,
+        parse_with_dateparser,
+        clean_merchant_name
     )
     SKIP_TESTS = False
 except ImportError as e:
@@ -133,6 +139,36 @@ class TestOCRService:
         result = parse_date(SAMPLE_OCR_TEXT_NO_DATE)
         assert result is None
 
+    def test_parse_date_label_stays_on_its_line(self):
+        """Test that a date label at the end of a line doesn't pair with a date on the next line."""
+        result = parse_date("Due date\n01/08/2023\nDate: 15/07/2023\n")
+        assert result == date(2023, 7, 15)
+
+    def test_fast_parse_numeric_date(self):
+        """Test the dateparser fast path for fixed-width numeric dates."""
+        assert fast_parse_numeric_date("2023-07-15") == date(2023, 7, 15)
+        assert fast_parse_numeric_date("15/07/2023") == date(2023, 7, 15)
+        # Ambiguous dates are read month first, like dateparser
+        assert fast_parse_numeric_date("05.06.2023") == date(2023, 5, 6)
+        # Anything else is left to dateparser
+        assert fast_parse_numeric_date("15-Jul-23") is None
+        assert fast_parse_numeric_date("2023-02-30") is None
+
+    def test_fast_parse_month_name_date(self):
+        """Test the dateparser fast path for "Month DD YYYY" dates."""
+        assert fast_parse_month_name_date("Jul 15 2023") == date(2023, 7, 15)
+        assert fast_parse_month_name_date("july 15 2023") == date(2023, 7, 15)
+        assert fast_parse_month_name_date("15/07/2023") is None
+        assert fast_parse_month_name_date("Jul 15th 2023") is None
+
+    def test_parse_with_dateparser_skips_phone_numbers(self):
+        """Test that phone numbers and long numeric strings are not parsed as dates."""
+        today = date.today()
+        assert parse_with_dateparser("9841234567", today) is None
+        assert parse_with_dateparser("984-123-4567", today) is None
+        assert parse_with_dateparser("014721307", today) is None
+        assert parse_with_dateparser("9311111116123", today) is None
+
     def test_parse_amount_valid(self):
         """Test parsing a valid amount from OCR text."""
         result = parse_amount(SAMPLE_OCR_TEXT)
@@ -186,6 +222,12 @@ class TestOCRService:
         assert "amount" in result
         assert result["amount"] is not None
 
+    def test_parse_ocr_text_batch(self):
+        """Test that batch parsing matches parsing each text on its own."""
+        texts = [SAMPLE_OCR_TEXT, SAMPLE_OCR_TEXT_NO_DATE]
+        results = parse_ocr_text_batch(texts)
+        assert results == [parse_ocr_text(text) for text in texts]
+
     def test_enhanced_date_extraction(self):
         """Test enhanced date extraction with confidence scoring."""
         date_result, confidence = enhanced_date_extraction(SAMPLE_OCR_TEXT)
@@ -194,6 +236,12 @@ class TestOCRService:
         assert date_result == date(2023, 7, 15)
         assert 0 <= confidence <= 1.0  # Confidence should be between 0 and 1
 
+    def test_enhanced_date_extraction_ordinal_date(self):
+        """Test that ordinal dates like "21st April 2023" are found without spaCy."""
+        date_result, confidence = enhanced_date_extraction("ABC STORE\n21st April 2023\nTotal 100")
+        assert date_result == date(2023, 4, 21)
+        assert confidence > 0
+
     def test_enhanced_merchant_extraction(self):
         """Test enhanced merchant extraction with confidence scoring."""
         merchant_result, confidence = enhanced_merchant_extraction(SAMPLE_OCR_TEXT)
@@ -202,6 +250,31 @@ class TestOCRService:
         assert "BHATBHATENI" in merchant_result.upper()
         assert 0 <= confidence <= 1.0  # Confidence should be between 0 and 1
 
+    def test_enhanced_merchant_extraction_known_merchant_short_circuit(self):
+        """Test that a high-confidence known merchant beats a decorated header line."""
+        merchant_result, confidence = enhanced_merchant_extraction(
+            "*** TODAYS SPECIAL ***\nBHATBHATENI SUPERMARKET\nMaharajgunj, Kathmandu\nTel: 01-4721307\n"
+        )
+        assert merchant_result == "Bhatbhateni Supermarket"
+        assert confidence >= 0.95
+
+    def test_enhanced_merchant_extraction_length_changing_lowercase(self):
+        """Test that characters whose lowercase form is longer don't shift the extracted name."""
+        merchant_result, _ = enhanced_merchant_extraction("İİ Bhatbhateni Supermarket\nMaharajgunj\n")
+        assert merchant_result == "Bhatbhateni Supermarket"
+
+    def test_clean_merchant_name(self):
+        """Test that merchant names lose punctuation and extra whitespace."""
+        assert clean_merchant_name("  KFC!!  ") == "KFC"
+        assert clean_merchant_name("Big\tMart,\n Pvt. Ltd.") == "Big Mart Pvt Ltd"
+        assert clean_merchant_name("Café_Soma!") == "Café_Soma"
+
+    def test_enhanced_merchant_extraction_batch(self):
+        """Test that batch merchant extraction matches the single-text function."""
+        texts = [SAMPLE_OCR_TEXT, "Thank you for shopping"]
+        results = enhanced_merchant_extraction_batch(texts)
+        assert results == [enhanced_merchant_extraction(text) for text in texts]
+
     def test_enhanced_amount_extraction(self):
         """Test enhanced amount extraction with confidence scoring."""
         amount_result, confidence = enhanced_amount_extraction(SAMPLE_OCR_TEXT)
@@ -211,6 +284,23 @@ class TestOCRService:
         assert amount_result > Decimal('100')
         assert 0 <= confidence <= 1.0  # Confidence should be between 0 and 1
 
+    def test_enhanced_amount_extraction_explicit_total(self):
+        """Test that explicit total lines are matched in full."""
+        amount_result, _ = enhanced_amount_extraction("Subtotal 1250.00\nTotal: Rs. 1412.50\n")
+        assert amount_result == Decimal('1412.50')
+
+    def test_enhanced_amount_extraction_overlapping_patterns(self):
+        """Test that a shorter currency match doesn't hide a higher-scoring keyword amount."""
+        amount_result, _ = enhanced_amount_extraction("Amount 1500.00 Rs 20")
+        assert amount_result == Decimal('1500.00')
+        amount_result, _ = enhanced_amount_extraction("Balance 2,450.00 NPR 50")
+        assert amount_result == Decimal('2450.00')
+
+    def test_enhanced_amount_extraction_ignores_dates_near_total(self):
+        """Test that the year of a date next to a total keyword is not taken as the amount."""
+        amount_result, _ = enhanced_amount_extraction("Bill No 12\n450 payable by 15/07/2024\n")
+        assert amount_result == Decimal('450')
+
     def test_extreme_future_date_rejection(self):
         """Test that extreme future dates are rejected."""
         # Create a sample text with an extreme future date